@@ -1,5 +1,7 @@
 from .status import Status
-from .obj import Obj
-from .analyzer import Analyzer
+from .obj import Obj, CheckedObj
+from .analyzer import Analyzer, AnalyzerPool
 from .cache import FIFOCache, ProtectedFIFOCache, LRUCache, ProtectedLRUCache, LFUCache, ProtectedLFUCache, LSOCache, ProtectedLSOCache, SSOCache, ProtectedSSOCache, RANCache, ProtectedRANCache, Clairvoyant
+from .stack import LRUStackSimulator
+from .sampling import SpatialSampler
 from .load import *
\ No newline at end of file
@@ -0,0 +1,233 @@
+import hashlib
+import os
+import subprocess
+import sys
+import unittest
+import numpy as np
+
+# 64 bits arithmetic of the hash functions
+MASK64 = (1 << 64) - 1
+
+# maximum value of the counters of the sketch (4 bits counters, as in TinyLFU)
+MAX_COUNT = 15
+
+
+def mix(key) -> int:
+    """
+    64 bits hash of an object identifier (Obj.index), the same in every process: integers are hashed by value, other
+    identifiers (for example strings, whose hash() is salted per process) by a digest of their encoding. The bits are
+    spread by the splitmix64 finalizer, as in cachesim.sampling.spatial_hash.
+    """
+    if isinstance(key, (int, np.integer)):
+        h = int(key) & MASK64
+    else:
+        h = int.from_bytes(hashlib.blake2b(key if isinstance(key, bytes) else str(key).encode(), digest_size=8).digest(), 'little')
+    h = (h + 0x9E3779B97F4A7C15) & MASK64
+    h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & MASK64
+    return h ^ (h >> 31)
+
+
+class CountMinSketch:
+    """
+    Count-min sketch of the request frequencies: depth rows of width saturating counters, an object is counted in one
+    counter of every row and its frequency is estimated by the smallest of its counters (never under estimated).
+    The memory does not depend on the number of objects, every operation visits depth counters.
+    """
+
+    def __init__(self, width: int, depth=4):
+        """
+        :param width: Number of counters of every row, rounded up to a power of 2.
+        :param depth: Number of rows (hash functions).
+        """
+        assert width > 0 and depth > 0, f"Sketch must have positive width and depth: '{width}', '{depth}' received!"
+        bits = max(1, (width - 1).bit_length())
+        self.__mask = (1 << bits) - 1
+        self.__rows = [row << bits for row in range(depth)]  # first counter of every row
+        self.__table = bytearray(depth << bits)
+
+    def __positions(self, h: int) -> list:
+        """Counter of the object in every row (double hashing of the 64 bits hash h)."""
+        mask, step = self.__mask, (h >> 32) | 1
+        return [row | ((h + i * step) & mask) for i, row in enumerate(self.__rows)]
+
+    def increment(self, h: int):
+        """Count a request of the object of hash h (see mix)."""
+        table = self.__table
+        for position in self.__positions(h):
+            if table[position] < MAX_COUNT: table[position] += 1
+
+    def estimate(self, h: int) -> int:
+        """Estimated number of requests of the object of hash h."""
+        table = self.__table
+        return min([table[position] for position in self.__positions(h)])
+
+    def halve(self):
+        """Halve every counter (aging: the old requests weigh less than the recent ones)."""
+        counters = np.frombuffer(self.__table, dtype=np.uint8)
+        counters >>= 1
+
+
+class Doorkeeper:
+    """
+    Bloom filter of the objects requested since the last reset: the first request of an object only sets its bits, so
+    that the objects requested once (one-hit wonders) do not take counters of the sketch.
+    """
+
+    def __init__(self, bits: int, hashes=3):
+        """
+        :param bits: Number of bits of the filter, rounded up to a power of 2.
+        :param hashes: Number of bits set per object.
+        """
+        assert bits > 0 and hashes > 0, f"Bloom filter must have positive size and number of hashes: '{bits}', '{hashes}' received!"
+        self.__mask = (1 << max(3, (bits - 1).bit_length())) - 1
+        self.__hashes = range(1, hashes + 1)
+        self.__filter = bytearray((self.__mask + 1) >> 3)
+
+    def __positions(self, h: int) -> list:
+        """Bits of the object (double hashing of the 64 bits hash h, other multiples than the sketch)."""
+        mask, step = self.__mask, (h >> 32) | 1
+        return [(h + i * step) & mask for i in self.__hashes]
+
+    def add(self, h: int) -> bool:
+        """Add the object of hash h (see mix), return True if it was already in the filter (or a false positive)."""
+        present = True
+        bloom = self.__filter
+        for position in self.__positions(h):
+            byte, bit = position >> 3, 1 << (position & 7)
+            if not bloom[byte] & bit:
+                present = False
+                bloom[byte] |= bit
+        return present
+
+    def __contains__(self, h: int) -> bool:
+        bloom = self.__filter
+        for position in self.__positions(h):
+            if not bloom[position >> 3] & (1 << (position & 7)): return False
+        return True
+
+    def clear(self):
+        self.__filter[:] = bytes(len(self.__filter))
+
+
+class TinyLFU:
+    """
+    TinyLFU admission filter (Einziger et al.): the frequency of the requested objects is estimated with a doorkeeper
+    and a count-min sketch, an object fetched enters the cache only if it is more frequent than the object the cache
+    would evict for it (the victim). Every sample requests the counters are halved and the doorkeeper is cleared, so
+    that the frequencies follow the changes of popularity. Constant memory and time per request.
+    Install it on any cache with Cache.set_admission (the eviction policy of the cache is unchanged).
+    """
+
+    def __init__(self, capacity=4096, sample=None, depth=4):
+        """
+        :param capacity: Expected number of objects in the cache, sizes the sketch (one counter per object and row).
+        :param sample: Number of requests between two halvings, None for 10 times the capacity. Sizes the doorkeeper (4 bits per request of a sample).
+        :param depth: Number of rows of the sketch.
+        """
+        assert capacity > 0, f"Admission filter must have a positive capacity: '{capacity}' received!"
+        self.__sample = 10 * capacity if sample is None else sample
+        assert self.__sample > 0, f"Admission filter must have a positive sample: '{sample}' received!"
+        self.__sketch = CountMinSketch(capacity, depth)
+        self.__doorkeeper = Doorkeeper(4 * self.__sample)
+        self.__requests = 0
+
+    def record(self, index):
+        """
+        Count a request (HIT or not).
+
+        :param index: Identifier of the object requested (Obj.index).
+        """
+        h = mix(index)
+        if self.__doorkeeper.add(h): self.__sketch.increment(h)
+        self.__requests += 1
+        if self.__requests >= self.__sample: self.__reset()
+
+    def frequency(self, index) -> int:
+        """Estimated number of requests of an object since the last halvings (the doorkeeper holds the first one)."""
+        h = mix(index)
+        return self.__sketch.estimate(h) + 1 if h in self.__doorkeeper else self.__sketch.estimate(h)
+
+    def admit(self, index, victim=None) -> bool:
+        """
+        Admission decision of an object fetched (after its request was recorded).
+
+        :param index: Identifier of the object fetched.
+        :param victim: Identifier of the object the cache would evict for it, None if the cache does not know it in advance (the object is then admitted from its second request).
+        :return: True if the object may enter the cache.
+        """
+        if victim is None: return self.frequency(index) > 1
+        return self.frequency(index) > self.frequency(victim)
+
+    def __reset(self):
+        self.__requests = 0
+        self.__sketch.halve()
+        self.__doorkeeper.clear()
+
+
+# admission filters of the sweeps (option "admission", see cachesim.sweep.Cell), key: name in the sweep files
+ADMISSIONS = {"none": None, "tinylfu": TinyLFU}
+
+
+# helper of TestAdmission, run in subprocesses (other hash salts): it must stay a module level function importable from cachesim.admission
+def _admission_decisions() -> list:
+    """Test requests: status codes of a LRU cache with a TinyLFU filter on objects identified by strings."""
+    from cachesim import LRUCache, Obj
+    cache = LRUCache(5000)
+    cache.set_admission(TinyLFU(capacity=8, sample=200))
+    return [cache.recv(time, Obj(f"/live/channel{time * 7919 % 97 % (time % 13 + 1)}/segment", 400, 3600, -1)).code for time in range(2000)]
+
+
+class TestAdmission(unittest.TestCase):
+
+    def test_tinylfu(self):
+        popular, once, never = 1000, 1001, 1002
+        admission = TinyLFU(capacity=64, sample=100)
+        for _ in range(5): admission.record(popular)
+        admission.record(once)
+        self.assertEqual(admission.frequency(popular), 5)
+        self.assertEqual(admission.frequency(once), 1)  # only in the doorkeeper
+        self.assertEqual(admission.frequency(never), 0)
+        self.assertTrue(admission.admit(popular, once))
+        self.assertFalse(admission.admit(once, popular))
+        self.assertFalse(admission.admit(once))  # one-hit wonders stay out without victim
+
+        # the frequencies are halved and the doorkeeper cleared every sample requests
+        for index in range(94): admission.record(index)
+        self.assertEqual(admission.frequency(popular), 2)
+        self.assertEqual(admission.frequency(once), 0)
+
+    def test_halving_period(self):
+        # an object requested 8 times loses half of its frequency at every halving: count the requests between them
+        marker = 10**6
+        admission = TinyLFU(capacity=64, sample=20)
+        for _ in range(8): admission.record(marker)
+        frequency, halvings = admission.frequency(marker), []
+        for request in range(9, 70):
+            admission.record(request)
+            if admission.frequency(marker) < frequency:
+                frequency = admission.frequency(marker)
+                halvings.append(request)
+        self.assertEqual(halvings, [20, 40, 60])
+
+    def test_reproducible(self):
+        # the decisions do not depend on the salt of hash() (the sketch of a checkpoint is read in another process)
+        from cachesim import Status
+        decisions = _admission_decisions()
+        self.assertIn(Status.HIT.code, decisions)
+        self.assertIn(Status.PASS.code, decisions)  # objects kept out by the filter
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for seed in ("1", "2"):
+            output = subprocess.run([sys.executable, "-c", "from cachesim.admission import _admission_decisions; print(_admission_decisions())"],
+                                    cwd=root, env=dict(os.environ, PYTHONHASHSEED=seed), capture_output=True, text=True, check=True).stdout
+            self.assertEqual(output.strip(), str(decisions))
+
+    def test_sketch(self):
+        # the estimates are never below the real frequencies, saturate at MAX_COUNT
+        sketch = CountMinSketch(256)
+        counts = {index: index % 20 for index in range(200)}
+        for index, count in counts.items():
+            for _ in range(count): sketch.increment(mix(index))
+        self.assertTrue(all(min(count, MAX_COUNT) <= sketch.estimate(mix(index)) <= MAX_COUNT for index, count in counts.items()))
+        sketch.halve()
+        self.assertTrue(all(min(count, MAX_COUNT) // 2 <= sketch.estimate(mix(index)) <= MAX_COUNT // 2 for index, count in counts.items()))
@@ -1,9 +1,27 @@
-from cachesim import Status
+from cachesim.metrics import StageMetrics
+from cachesim.status import Status, status_codes
 import csv
 import datetime as dt
+import json
 import multiprocessing
-import pandas as pd
-from collections import Counter
+import numpy as np
+import os
+import tempfile
+import threading
+import unittest
+
+
+def time_buckets(timestamps: np.ndarray, interval: float) -> tuple:
+    """
+    Split requests in time order by time buckets (aligned on the epoch).
+
+    :param timestamps: time of the requests, in time order
+    :param interval: length of the buckets (in seconds)
+    :return: number of every bucket (start of the bucket / interval) and index of its first request
+    """
+    buckets = np.floor(timestamps / interval).astype(np.int64)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(buckets)) + 1])
+    return buckets[starts], starts
 
 
 class Analyzer:
@@ -12,13 +30,13 @@ class Analyzer:
     """
 
     def __init__(self, cache_queue: multiprocessing.Queue, writing_frquency_time=60, writing_frequency_number=0, movies_time_interval = 0, CHR_final = True, served_from_cache=True,
-                 file_name_frequency_time="CHR_by_time", file_name_frequency_number="CHR_regular", file_name_CHR_final="CHR_final", file_name_CHR_by_movie = "CHR_movies", file_name_served_from_cache="traffic_served_from_cache"):
+                 file_name_frequency_time="CHR_by_time", file_name_frequency_number="CHR_regular", file_name_CHR_final="CHR_final", file_name_CHR_by_movie = "CHR_movies", file_name_served_from_cache="traffic_served_from_cache", file_name_profile="profile", state=None):
         """
         Analyzer initialization.
-        :param cache_queue: queue between the process in charge of the caching simulation and the analyzer process
-        :param writing_frquency_time: frequency in time to write results in file (in seconds), e.g: 60 means that the results will be written once every minutes (approximately, results are only sent periodically to the analyzer), 0 to disable
+        :param cache_queue: queue between the process in charge of the caching simulation and the analyzer process, None if the data are given with receive and end (see analyzer_service)
+        :param writing_frquency_time: frequency in time to write results in file (in seconds), e.g: 60 means that the results of every minute (epoch aligned buckets, according to the time of the requests) are written, 0 to disable
         :param writing_frequency_number: frequency used to write the measurements results in txt file (0 for not writing anything in file), e.g: 1,000 will write the results once every 1,000 objects processed, 0 to disable
-        :param movies_time_interval: interval in time to which statistics about the cache hit ratio of the different movies should be written in file
+        :param movies_time_interval: interval in time to which statistics about the cache hit ratio of the different movies should be written in file (epoch aligned buckets, like writing_frquency_time), 0 to disable
         :param CHR_final: True if the final cache hit ratio should be written in file at the end, false otherwise
         :param served_from_cache: True for counting the size of the objects served from cache (e.g 103gb/200gb were served from cache)
         :param file_name_frequency_time: name of the file where the analyzes by time should be written
@@ -26,22 +44,25 @@ class Analyzer:
         :param file_name_CHR_final: name of the file where the final CHR should be written
         :param file_name_CHR_by_movie: name of the file where the analyzes by movie should be written
         :param file_name_served_from_cache: name of the file where the analyzes for the traffic served from the cache should be written
+        :param file_name_profile: name of the file where the profile of the cache should be written (see save_profile)
+        :param state: state of an analyzer with the same parameters (see checkpoint) to resume from, the results written after the checkpoint are removed from the files
         """
         self.__q = cache_queue  # Queue between the process managing the analyzer process and the cache simulation process (data are received to this analyzer from the cache simulation process)
 
         self.__hit = 0  # Number of times the cache returns a "hit" answer
         self.__miss = 0  # Number of times the cache returns a "miss" answer
         self.__pass = 0  # Number of times the cache returns a "pass" answer
-        self.__previous = [0,0,0] # Previous values for hit, miss and pass
-        self.__movies = {} # Dictionnary containing the simulator answers (hit, miss, pass) by movies. Key: name of the movie, value: tuple with number of (hit, miss, pass)
+        self.__time_bucket = None  # Time bucket not written yet (start time) and its number of hit, miss and pass
+        self.__time_counts = np.zeros(3, dtype=np.int64)
+        self.__movies_bucket = None  # Time bucket of the movies results not written yet (start time)
+        self.__movies = {} # Dictionnary containing the simulator answers (hit, miss, pass) by movies for the current bucket. Key: name of the movie, value: array with number of (hit, miss, pass)
 
-        self.__last_time = 0  # Last timestamp registered by the analyzer object
-        self.__last_time_movie = 0  # Last timestamp registered by the analyzer object for movie results
         self.__last_total = 0  # Keep trace of the last total number of analyzes done
 
         self.__served_from_cache = served_from_cache
-        self.__traffic_served_from_cache = pd.DataFrame() # Dataframe to store traffic served from cache (e.g 10gb hit, 9gb miss, 1gb pass)
+        self.__traffic_served_from_cache = np.zeros(3, dtype=np.int64) # Traffic served from cache by status (e.g 10gb hit, 9gb miss, 1gb pass)
         self.__file_name_served_from_cache = file_name_served_from_cache
+        self.__file_name_profile = file_name_profile
         
         self.__CHR_final = CHR_final  # Look at CHR_final parameter description for more info
         self.__frequency_number = writing_frequency_number  # Look at writing_frequency_number parameter description for more info
@@ -49,31 +70,37 @@ class Analyzer:
         self.__movies_time_interval = movies_time_interval # Look at movies_time_interval parameter description for more info
         self.__file_name_CHR_final = file_name_CHR_final  # Look at file_name_CHR_final parameter description for more info
 
-        # Creation of storing files
+        # Creation of storing files (or truncation to their length at the checkpoint)
+        offsets = state["offsets"] if state is not None else {}
         # Cache hit ratio by frequency
         if self.__frequency_number != 0:
-            self.__file = open("./results/" + file_name_frequency_number + ".csv", "w",
-                               encoding='UTF8')  # Open txt file for writing the analyzes results
+            self.__file = self.__open(file_name_frequency_number, offsets.get("regular"))  # Open txt file for writing the analyzes results
             self.__writer = csv.writer(self.__file)  # Open CSV file
-            self.__writer.writerow(['Record', 'Hit', 'Miss', 'Pass', 'CHR'])  # Write CSV header
+            if state is None: self.__writer.writerow(['Record', 'Hit', 'Miss', 'Pass', 'CHR'])  # Write CSV header
 
         # Cache hit ratio by time
         if self.__frequency_time != 0:
-            self.__file_time = open("./results/" + file_name_frequency_time + ".csv", "w",
-                                    encoding='UTF8')  # Open txt file for writing the analyzes results
+            self.__file_time = self.__open(file_name_frequency_time, offsets.get("time"))  # Open txt file for writing the analyzes results
             self.__writer_time = csv.writer(self.__file_time)  # Open CSV file
-            self.__writer_time.writerow(['Time', 'Total', 'Hit', 'Miss', 'Pass', 'CHR'])  # Write CSV header
+            if state is None: self.__writer_time.writerow(['Time', 'Total', 'Hit', 'Miss', 'Pass', 'CHR'])  # Write CSV header
 
         # Cache hit ratio by movie
         if self.__movies_time_interval != 0:
-            self.__file_movie = open("./results/" + file_name_CHR_by_movie + ".csv", "w",
-                                    encoding='UTF8')  # Open txt file for writing the analyzes results
+            self.__file_movie = self.__open(file_name_CHR_by_movie, offsets.get("movies"))  # Open txt file for writing the analyzes results
             self.__writer_movie = csv.writer(self.__file_movie)  # Open CSV file
-            self.__writer_movie.writerow(['MovieID', 'Epoch_second', 'Hit', 'Miss', 'Pass', 'CHR'])  # Write CSV header
+            if state is None: self.__writer_movie.writerow(['MovieID', 'Epoch_second', 'Hit', 'Miss', 'Pass', 'CHR'])  # Write CSV header
+
+        if state is not None:
+            self.__hit, self.__miss, self.__pass = state["counts"]
+            self.__time_bucket, self.__time_counts = state["time"]
+            self.__movies_bucket, self.__movies = state["movies"]
+            self.__last_total = state["last_total"]
+            self.__traffic_served_from_cache = state["served"]
 
         # Launch function managing the receiving of the data from the cache simulation process and launching the corresponding analyzes tasks when received
-        self.receive_status()
-        cache_queue.close()
+        if cache_queue is not None:
+            self.receive_status()
+            cache_queue.close()
 
     def __del__(self):
         """
@@ -87,70 +114,157 @@ class Analyzer:
         if self.__frequency_time != 0:
             self.__file_time.close()
 
+        if self.__movies_time_interval != 0:
+            self.__file_movie.close()
+
+    @staticmethod
+    def __open(file_name, offset=None):
+        """Open a result file for writing, or for appending after offset (length of the file at the checkpoint)."""
+        if offset is None:
+            return open("./results/" + file_name + ".csv", "w", encoding='UTF8')
+        f = open("./results/" + file_name + ".csv", "r+", encoding='UTF8')
+        f.truncate(offset)
+        f.seek(offset)
+        return f
+
+    def checkpoint(self) -> dict:
+        """
+        State of the analyzer (accumulators and length of the result files written), to resume the analyzes later
+        (see state parameter).
+        """
+        offsets = {}
+        if self.__frequency_number != 0:
+            self.__file.flush()
+            offsets["regular"] = self.__file.tell()
+        if self.__frequency_time != 0:
+            self.__file_time.flush()
+            offsets["time"] = self.__file_time.tell()
+        if self.__movies_time_interval != 0:
+            self.__file_movie.flush()
+            offsets["movies"] = self.__file_movie.tell()
+        return {"counts": (self.__hit, self.__miss, self.__pass), "time": (self.__time_bucket, self.__time_counts.copy()),
+                "movies": (self.__movies_bucket, {movie: counts.copy() for movie, counts in self.__movies.items()}),
+                "last_total": self.__last_total, "served": self.__traffic_served_from_cache.copy(), "offsets": offsets}
+
     def receive_status(self):
         """
-        Receive the fata from the cache simulation process and launch the analyzes on these data. 
-        :param cache_queue:
+        Receive the data from the cache simulation process and launch the analyzes on these data. Each message holds
+        the time of the requests (one per request, or the time of the last request of the batch), their status
+        (list of Status or array of status codes, see Status.code), the group of their objects and their sizes.
         """
         status = self.__q.get()  # Receive the data from the cache simulation process
-        self.__last_time_movie = status[0]
 
         while status is not None:  # None is sent by the cache simulation when the simulation is over
-            timestamp = status[0]
-            count_status = Counter(status[1])  # Count the number of hit, pass and miss received
-
-            # Corresponding status counter are incremented accordingly to the data received
-            self.__hit += count_status[Status.HIT]
-            self.__pass += count_status[Status.PASS]
-            self.__miss += count_status[Status.MISS]
-
-            # If frequency conditions are met, start to write the CHR results
-            if (self.__hit + self.__miss + self.__pass) - self.__last_total >= self.__frequency_number != 0:
-                self.__last_total = self.__hit + self.__miss + self.__pass
-                self.save_frequency_results()
-
-            # If time conditions are met, start to write the CHR results
-            if timestamp - self.__last_time >= self.__frequency_time != 0:
-                self.__last_time = timestamp
-                self.save_time_results()
-
-            if self.__movies_time_interval != 0:
-                for index, movie_name in enumerate(status[2]):
-                    if movie_name == -1: continue # -1 means that the movie name is not documented
-                    if status[1][index] == Status.HIT:
-                        self.__movies[movie_name] = tuple(map(sum, zip(self.__movies.get(movie_name, (0,0,0)), (1,0,0))))
-                    elif status[1][index] == Status.PASS:
-                        self.__movies[movie_name] = tuple(map(sum, zip(self.__movies.get(movie_name, (0,0,0)), (0,0,1))))
-                    else:
-                        self.__movies[movie_name] = tuple(map(sum, zip(self.__movies.get(movie_name, (0,0,0)), (0,1,0))))
-
-                if timestamp - self.__last_time_movie >= self.__movies_time_interval:
-                    self.__last_time_movie = timestamp
-                    self.save_movies_results()
+            self.receive(status[0], status[1], status[2], status[3])
+            status = self.__q.get()
 
-            if self.__served_from_cache:
-                # Associate the cache status (hit, miss, pass) with the size of the object and concatenate it with the previous obtained results. Then group by cache status and sum the results
-                self.__traffic_served_from_cache = pd.concat([self.__traffic_served_from_cache, pd.DataFrame({'cache_status': map(str, status[1]), 'size': status[2]})]).groupby(by='cache_status', as_index=False)['size'].sum()
+        self.end()
 
-            status = self.__q.get()
+    def receive(self, timestamps, status, groups, sizes):
+        """
+        Launch the analyzes on the data of a message (see receive_status).
+
+        :param timestamps: time of the requests (one per request, or the time of the last request of the batch)
+        :param status: list of Status or array of status codes (see Status.code)
+        :param groups: group of the object of every request, -1 if not documented
+        :param sizes: size of the object of every request
+        """
+        codes = status if isinstance(status, np.ndarray) else status_codes(status)
+        if len(codes) > 0:
+            timestamps = np.broadcast_to(np.asarray(timestamps, dtype=np.float64), codes.shape)
+            self.analyze(timestamps, codes, np.asarray(groups, dtype=np.int64), np.asarray(sizes, dtype=np.int64))
 
-        # End of the data: write the last analyzes before end of the function
+    def end(self):
+        """
+        End of the data: write the last analyzes.
+        """
         if (self.__hit + self.__miss + self.__pass) != self.__last_total and self.__frequency_number != 0:
-                self.__last_total = self.__hit + self.__miss + self.__pass
-                self.save_frequency_results()
+            self.__writer.writerow([self.__hit + self.__miss + self.__pass, self.__hit, self.__miss, self.__pass, round(self.cache_hit_ratio() * 100, 3)])
+            self.__file.flush()
 
-        if timestamp != self.__last_time and self.__frequency_time != 0:
-            self.__last_time = timestamp
-            self.save_time_results()
-        
-        if self.__CHR_final and self.__last_total!=0:
+        if self.__time_bucket is not None and self.__frequency_time != 0:
+            self.save_time_results(self.__time_bucket, self.__time_counts)
+
+        if self.__movies_bucket is not None and self.__movies_time_interval != 0:
+            self.save_movies_results()
+
+        if self.__CHR_final and self.__hit + self.__miss + self.__pass != 0:
             with open("./results/" + self.__file_name_CHR_final + ".csv",'w',encoding = 'utf-8') as f:
                 csv_writer = csv.writer(f)
                 csv_writer.writerow(['Total', 'CHR', 'Hit', 'Miss', 'Pass'])
                 csv_writer.writerow([self.__hit + self.__miss + self.__pass, self.cache_hit_ratio()*100, self.__hit, self.__miss, self.__pass])
         
         if self.__served_from_cache:
-            self.__traffic_served_from_cache.to_csv("./results/" + self.__file_name_served_from_cache + ".csv", encoding='utf-8', index=False)
+            with open("./results/" + self.__file_name_served_from_cache + ".csv",'w',encoding = 'utf-8') as f:
+                csv_writer = csv.writer(f)
+                csv_writer.writerow(['cache_status', 'size'])
+                for code, size in enumerate(self.__traffic_served_from_cache.tolist()):
+                    if size != 0: csv_writer.writerow([str(Status.from_code(code)), size])
+
+    def save_profile(self, snapshot: dict):
+        """
+        Write the profile of the requests to the cache analyzed on the disk (JSON).
+
+        :param snapshot: profile of the cache (see cachesim.profiling.CacheProfile.snapshot)
+        """
+        with open("./results/" + self.__file_name_profile + ".json", 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, indent=1)
+
+    def analyze(self, timestamps: np.ndarray, codes: np.ndarray, groups: np.ndarray, sizes: np.ndarray):
+        """
+        Account for a batch of requests, in time order.
+
+        :param timestamps: time of every request
+        :param codes: status code of every request (see Status.code)
+        :param groups: group of the object of every request (for example movie identifier), -1 if not documented
+        :param sizes: size of the object of every request
+        """
+        counts = np.bincount(codes, minlength=3)
+
+        # Cumulated results written every writing_frequency_number requests (exactly)
+        if self.__frequency_number != 0:
+            total = self.__hit + self.__miss + self.__pass
+            records = np.arange(self.__frequency_number - total % self.__frequency_number, len(codes) + 1, self.__frequency_number)
+            if len(records) > 0:
+                cumulated = np.cumsum(codes[:, None] == np.arange(3), axis=0)[records - 1] + [self.__hit, self.__miss, self.__pass]
+                for record, (hit, miss, pass_) in zip((records + total).tolist(), cumulated.tolist()):
+                    self.__writer.writerow([record, hit, miss, pass_, round(hit / record * 100, 3)])  # cache hit ratio (CHR) writing
+                self.__file.flush()
+                self.__last_total = int(records[-1] + total)
+
+        # Corresponding status counter are incremented accordingly to the data received
+        self.__hit += int(counts[0])
+        self.__miss += int(counts[1])
+        self.__pass += int(counts[2])
+
+        # Results by time bucket of writing_frquency_time seconds (a bucket is written once a later request is received)
+        if self.__frequency_time != 0:
+            buckets, starts = time_buckets(timestamps, self.__frequency_time)
+            bucket_counts = np.add.reduceat(codes[:, None] == np.arange(3), starts, axis=0).astype(np.int64)
+            if self.__time_bucket is not None:
+                if self.__time_bucket == buckets[0]: bucket_counts[0] += self.__time_counts
+                else: self.save_time_results(self.__time_bucket, self.__time_counts)
+            for bucket, bucket_count in zip(buckets[:-1].tolist(), bucket_counts[:-1]):
+                self.save_time_results(bucket, bucket_count)
+            self.__time_bucket, self.__time_counts = int(buckets[-1]), bucket_counts[-1]
+
+        # Results by movie, by time bucket of movies_time_interval seconds
+        if self.__movies_time_interval != 0:
+            buckets, starts = time_buckets(timestamps, self.__movies_time_interval)
+            for bucket, start, end in zip(buckets.tolist(), starts.tolist(), starts[1:].tolist() + [len(codes)]):
+                if self.__movies_bucket is not None and bucket != self.__movies_bucket:
+                    self.save_movies_results()
+                self.__movies_bucket = bucket
+                documented = groups[start:end] != -1 # -1 means that the movie name is not documented
+                movie_names, indices = np.unique(groups[start:end][documented], return_inverse=True)
+                movie_counts = np.bincount(indices * 3 + codes[start:end][documented], minlength=len(movie_names) * 3).reshape(-1, 3)
+                for movie_name, movie_count in zip(movie_names.tolist(), movie_counts):
+                    self.__movies[movie_name] = self.__movies.get(movie_name, 0) + movie_count
+
+        if self.__served_from_cache:
+            # Associate the cache status (hit, miss, pass) with the size of the object
+            for code in range(3):
+                self.__traffic_served_from_cache[code] += sizes[codes == code].sum()
 
     def hit(self):
         """
@@ -184,32 +298,276 @@ class Analyzer:
         """
         return self.__hit / (self.__hit + self.__miss + self.__pass)
 
-    def save_frequency_results(self):
+    def save_time_results(self, bucket: int, counts: np.ndarray):
         """
-        Write the analyzes results on the disk.
-        """
-        self.__writer.writerow([self.__hit + self.__miss + self.__pass, self.__hit, self.__miss, self.__pass,
-                                round(self.cache_hit_ratio() * 100, 3)])  # cache hit ratio (CHR) writing
-        self.__file.flush()
+        Write the analyzes results of a time bucket on the disk.
 
-    def save_time_results(self):
-        """
-        Write the analyzes results on the disk.
+        :param bucket: number of the bucket (the bucket starts at bucket * writing_frquency_time, epoch)
+        :param counts: number of hit, miss and pass in the bucket
         """
-        hit = self.__hit - self.__previous[0]
-        miss = self.__miss - self.__previous[1]
-        pass_ = self.__pass - self.__previous[2]
+        hit, miss, pass_ = counts.tolist()
         self.__writer_time.writerow(
-            [dt.datetime.utcfromtimestamp(self.__last_time).isoformat(), hit + miss + pass_, hit, miss, pass_,
+            [dt.datetime.fromtimestamp(bucket * self.__frequency_time, dt.timezone.utc).replace(tzinfo=None).isoformat(), hit + miss + pass_, hit, miss, pass_,
              round((hit / (hit + miss + pass_)) * 100, 3)])  # cache hit ratio (CHR) writing
         self.__file_time.flush()
-        self.__previous = [self.__hit, self.__miss, self.__pass]
     
     def save_movies_results(self):
         """
-        Write the analyzes results on the disk.
+        Write the analyzes results of the current movies time bucket on the disk.
         """
         for movie_name, simulation_result in self.__movies.items():
-            self.__writer_movie.writerow([movie_name, self.__last_time_movie, simulation_result[0], simulation_result[1], simulation_result[2], round((simulation_result[0] / (simulation_result[0] + simulation_result[1] + simulation_result[2])) * 100)])
+            hit, miss, pass_ = simulation_result.tolist()
+            self.__writer_movie.writerow([movie_name, self.__movies_bucket * self.__movies_time_interval, hit, miss, pass_, round((hit / (hit + miss + pass_)) * 100)])
         self.__file_movie.flush()
-        self.__movies.clear()
\ No newline at end of file
+        self.__movies.clear()
+
+
+def analyzer_service(q: multiprocessing.Queue, streams: dict, replies=None, states=None, metrics=None):
+    """
+    Process analyzing the results of many caches (streams), with one Analyzer per stream: the columns of each batch are
+    received once for every stream.
+
+    :param q: queue receiving [timestamps, group ids, sizes, status codes by stream name] for each batch, "checkpoint" to send the state of the analyzers, the profiles of the caches by stream name (dict, see Analyzer.save_profile), None at the end
+    :param streams: key: name of the stream, value: arguments of the Analyzer of the stream (after cache_queue)
+    :param replies: queue used to send the state of the analyzers (key: name of the stream, see Analyzer.checkpoint)
+    :param states: state of the analyzers to resume from (key: name of the stream), None to start from the beginning
+    :param metrics: metrics of the process (see cachesim.metrics.StageMetrics), None if not collected
+    """
+    metrics = metrics or StageMetrics()
+    analyzers = {name: Analyzer(None, *args, state=None if states is None else states[name]) for name, args in streams.items()}
+    with metrics.blocked("recv"):
+        message = q.get()
+    while message is not None:
+        if message == "checkpoint":
+            replies.put({name: analyzer.checkpoint() for name, analyzer in analyzers.items()})
+        elif isinstance(message, dict):
+            for name, snapshot in message.items():
+                analyzers[name].save_profile(snapshot)
+        else:
+            timestamps, groups, sizes, codes = message
+            groups, sizes = np.asarray(groups, dtype=np.int64), np.asarray(sizes, dtype=np.int64)
+            for name, stream_codes in codes.items():
+                analyzers[name].receive(timestamps, stream_codes, groups, sizes)
+            metrics.add(1, len(groups), np.asarray(timestamps).nbytes + groups.nbytes + sizes.nbytes + sum(np.asarray(stream_codes).nbytes for stream_codes in codes.values()))
+        with metrics.blocked("recv"):
+            message = q.get()
+    for analyzer in analyzers.values():
+        analyzer.end()
+    metrics.finish()
+    q.close()
+
+
+class AnalyzerPool:
+    """
+    Analyzers of many caches (named streams) run by a small fixed number of processes (see analyzer_service), instead
+    of one process and one queue for each cache. The result files are the same.
+    """
+
+    def __init__(self, streams: dict, processes=1, queue_size=16):
+        """
+        :param streams: key: name of the stream (for example the cache), value: arguments of the Analyzer of the stream (after cache_queue)
+        :param processes: number of analyzer processes, the streams are distributed between them
+        :param queue_size: maximum number of messages waiting for every analyzer process: put blocks while an analyzer is behind (back-pressure on the simulation)
+        """
+        self.__streams = streams
+        self.__names = list(streams)
+        self.__groups = [self.__names[process::processes] for process in range(min(processes, len(self.__names)))]  # names of the streams of every process
+        self.__queues = [multiprocessing.Queue(queue_size) for _ in self.__groups]
+        self.__replies = multiprocessing.Queue()  # state of the analyzers sent back at every checkpoint
+        self.__processes = []
+
+    @property
+    def names(self) -> list:
+        return self.__names
+
+    @property
+    def stages(self) -> list:
+        """Names of the analyzer processes in the metrics of the pipeline (see start)."""
+        return ["analyzer" + str(process) for process in range(len(self.__groups))]
+
+    def start(self, states=None, metrics=None):
+        """
+        Start the analyzer processes.
+
+        :param states: state of every stream to resume from (see checkpoint), None to start from the beginning
+        :param metrics: metrics of the pipeline with a stage for every analyzer process (see stages and cachesim.metrics.PipelineMetrics), None if not collected
+        """
+        for q, names, stage in zip(self.__queues, self.__groups, self.stages):
+            process = multiprocessing.Process(target=analyzer_service, args=(q, {name: self.__streams[name] for name in names}, self.__replies, None if states is None else {name: states[name] for name in names}, None if metrics is None else metrics.stage(stage)))
+            process.start()
+            self.__processes.append(process)
+
+    def put(self, timestamps, groups, sizes, codes: dict):
+        """
+        Send the results of a batch to the analyzers, waiting while the queue of an analyzer is full.
+
+        :param timestamps: time of the requests
+        :param groups: group of the object of every request
+        :param sizes: size of the object of every request
+        :param codes: key: name of the stream, value: status codes of the requests (see Status.code)
+        """
+        for q, names in zip(self.__queues, self.__groups):
+            q.put([timestamps, groups, sizes, {name: codes[name] for name in names if name in codes}])
+
+    def put_profiles(self, profiles: dict):
+        """
+        Send the profiles of the caches to the analyzers, written with their results.
+
+        :param profiles: key: name of the stream, value: profile of the cache (see cachesim.profiling.CacheProfile.snapshot)
+        """
+        for q, names in zip(self.__queues, self.__groups):
+            q.put({name: profiles[name] for name in names if name in profiles})
+
+    def checkpoint(self) -> dict:
+        """
+        State of every stream once the batches already put are analyzed (key: name of the stream, see Analyzer.checkpoint).
+        """
+        for q in self.__queues:
+            q.put("checkpoint")
+        states = {}
+        for _ in self.__queues:
+            states.update(self.__replies.get())
+        return states
+
+    def close(self):
+        """Notify the end of the data to the analyzers and wait until the results are written."""
+        for q in self.__queues:
+            q.put(None)
+        for process in self.__processes:
+            process.join()
+
+    def __len__(self):
+        return len(self.__names)
+
+
+class TestAnalyzer(unittest.TestCase):
+
+    def test_analyzer(self):
+        directory = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            os.mkdir("results")
+            try:
+                q = multiprocessing.Queue()
+                # requests from 100 to 189.5, a HIT every 3 requests, groups 1 and 2 alternate (or not documented)
+                timestamps = np.arange(100, 190, 0.5)
+                statuses = [Status.HIT if i % 3 == 0 else Status.MISS if i % 3 == 1 else Status.PASS for i in range(len(timestamps))]
+                groups = [-1 if i % 5 == 0 else 1 + i % 2 for i in range(len(timestamps))]
+                sizes = [10 + i for i in range(len(timestamps))]
+                for start in range(0, len(timestamps), 50):
+                    q.put([timestamps[start:start + 50], statuses[start:start + 50], groups[start:start + 50], sizes[start:start + 50]])
+                q.put(None)
+                Analyzer(q, 60, 100, 60, True, True, "time", "regular", "final", "movies", "served")
+
+                with open("results/time.csv") as f:
+                    rows = list(csv.reader(f))
+                self.assertEqual([row[:2] for row in rows], [['Time', 'Total'], ['1970-01-01T00:01:00', '40'], ['1970-01-01T00:02:00', '120'], ['1970-01-01T00:03:00', '20']])
+                with open("results/regular.csv") as f:
+                    rows = list(csv.reader(f))
+                self.assertEqual(rows[1:], [['100', '34', '33', '33', '34.0'], ['180', '60', '60', '60', '33.333']])
+                with open("results/final.csv") as f:
+                    self.assertEqual(list(csv.reader(f))[1], ['180', str(60 / 180 * 100), '60', '60', '60'])
+                with open("results/served.csv") as f:
+                    rows = list(csv.reader(f))
+                self.assertEqual(rows[0], ['cache_status', 'size'])
+                self.assertEqual(sum(int(row[1]) for row in rows[1:]), sum(sizes))
+                self.assertEqual(rows[1], ['Status.HIT', str(sum(sizes[::3]))])
+                with open("results/movies.csv") as f:
+                    rows = list(csv.reader(f))
+                self.assertEqual(sorted(int(row[2]) + int(row[3]) + int(row[4]) for row in rows[1:] if row[1] == '60'), [16, 16])
+                self.assertEqual(sum(int(row[2]) + int(row[3]) + int(row[4]) for row in rows[1:]), len([group for group in groups if group != -1]))
+            finally:
+                os.chdir(directory)
+
+    def test_pool(self):
+        directory = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            os.mkdir("results")
+            try:
+                # the streams of a pool write the same files as one Analyzer process for each stream
+                timestamps = np.arange(100, 190, 0.5)
+                codes = {"a": np.arange(len(timestamps), dtype=np.uint8) % 3, "b": np.zeros(len(timestamps), dtype=np.uint8), "c": np.full(len(timestamps), 2, dtype=np.uint8)}
+                groups, sizes = np.arange(len(timestamps)) % 4 - 1, np.arange(len(timestamps)) + 10
+                pool = AnalyzerPool({name: (60, 100, 60, True, True, name + "_time", name + "_regular", name + "_final", name + "_movies", name + "_served", name + "_profile") for name in codes}, processes=2)
+                self.assertEqual(pool.names, ["a", "b", "c"])
+                pool.start()
+                for start in range(0, len(timestamps), 50):
+                    pool.put(timestamps[start:start + 50], groups[start:start + 50], sizes[start:start + 50], {name: stream_codes[start:start + 50] for name, stream_codes in codes.items()})
+                pool.put_profiles({"b": {"requests": len(timestamps)}})
+                pool.close()
+                with open("results/b_profile.json") as f:
+                    self.assertEqual(json.load(f), {"requests": len(timestamps)})
+                self.assertFalse(os.path.exists("results/a_profile.json"))
+
+                for name, stream_codes in codes.items():
+                    q = multiprocessing.Queue()
+                    for start in range(0, len(timestamps), 50):
+                        q.put([timestamps[start:start + 50], stream_codes[start:start + 50], groups[start:start + 50], sizes[start:start + 50]])
+                    q.put(None)
+                    Analyzer(q, 60, 100, 60, True, True, "expected_time", "expected_regular", "expected_final", "expected_movies", "expected_served")
+                    for result in ("time", "regular", "final", "movies", "served"):
+                        with open(f"results/{name}_{result}.csv") as f, open(f"results/expected_{result}.csv") as expected:
+                            self.assertEqual(f.read(), expected.read())
+            finally:
+                os.chdir(directory)
+
+    def test_checkpoint(self):
+        directory = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            os.mkdir("results")
+            try:
+                timestamps = np.arange(0, 3600, 4.0)
+                codes = {"a": np.arange(len(timestamps), dtype=np.uint8) % 3, "b": (np.arange(len(timestamps)) % 7 == 0).astype(np.uint8)}
+                groups, sizes = np.arange(len(timestamps)) % 5 - 1, np.arange(len(timestamps)) + 10
+                streams = {name: (600, 100, 900, True, True, name + "_time", name + "_regular", name + "_final", name + "_movies", name + "_served") for name in codes}
+                batches = [(timestamps[start:start + 70], groups[start:start + 70], sizes[start:start + 70], {name: stream_codes[start:start + 70] for name, stream_codes in codes.items()}) for start in range(0, len(timestamps), 70)]
+
+                def results():
+                    contents = {}
+                    for name in codes:
+                        for result in ("time", "regular", "final", "movies", "served"):
+                            with open(f"results/{name}_{result}.csv") as f:
+                                contents[name, result] = f.read()
+                    return contents
+
+                pool = AnalyzerPool(streams)
+                pool.start()
+                for batch in batches:
+                    pool.put(*batch)
+                pool.close()
+                expected = results()
+
+                # a run interrupted after a checkpoint (the batches analyzed after it are lost) and resumed from it
+                pool = AnalyzerPool(streams, processes=2)
+                pool.start()
+                for batch in batches[:6]:
+                    pool.put(*batch)
+                states = pool.checkpoint()
+                for batch in batches[6:9]:
+                    pool.put(*batch)
+                pool.close()
+                for name in codes:
+                    with open(f"results/{name}_time.csv", "a") as f:
+                        f.write("partially written row" * 100)
+                pool = AnalyzerPool(streams, processes=2)
+                pool.start(states)
+                for batch in batches[6:]:
+                    pool.put(*batch)
+                pool.close()
+                self.assertEqual(results(), expected)
+
+                # the queues are bounded: a put waits until the analyzers received the previous messages
+                pool = AnalyzerPool(streams, queue_size=1)
+                pool.put(*batches[0])
+                blocked = threading.Thread(target=pool.put, args=batches[1])
+                blocked.start()
+                blocked.join(0.2)
+                self.assertTrue(blocked.is_alive())
+                pool.start()
+                blocked.join(10)
+                self.assertFalse(blocked.is_alive())
+                pool.close()
+            finally:
+                os.chdir(directory)
@@ -0,0 +1,395 @@
+import argparse
+import datetime
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+import numpy as np
+from cachesim import Obj, Status, Clairvoyant, LRUCache, RANCache, LRUStackSimulator, SpatialSampler, Analyzer
+from cachesim.load import CACHE_SIZES
+from cachesim.sweep import POLICIES
+from cachesim.trace import MAXAGE_UNKNOWN, TraceBatch, next_access_times
+
+# Benchmark of the simulator on synthetic traces: throughput, memory and eviction cost of every model, the results of
+# every run are appended to a history file (one JSON object per line) to catch regressions when the models change.
+
+# history of the benchmark runs
+BENCH_HISTORY = "./results/bench_history.jsonl"
+
+# maxage of the objects of the synthetic traces and their share: not cacheable, not indicated (default maxage), 1 minute, 10 minutes, 1 hour
+TRACE_MAXAGES = {0: 0.05, MAXAGE_UNKNOWN: 0.15, 60: 0.2, 600: 0.3, 3600: 0.3}
+
+# models benchmarked: cache models (name of the class), LRU stack simulation, spatial sampling and analysis of the status of the requests
+MODELS = [model.__name__ for model in POLICIES.values()] + ["Clairvoyant", "LRUStackSimulator", "SpatialSampler", "Analyzer"]
+
+
+def synthetic_trace(requests=50000, objects=10000, alpha=0.8, seed=0, rate=100) -> TraceBatch:
+    """
+    Synthetic trace, the same for the same parameters: the objects are requested following a Zipf popularity, their
+    sizes follow a Pareto distribution (heavy tail) and their maxage is drawn from TRACE_MAXAGES (some objects are not
+    cacheable, some have no maxage indicated). The requests arrive as a Poisson process.
+
+    :param requests: Number of requests.
+    :param objects: Number of objects.
+    :param alpha: Exponent of the Zipf popularity (the object of rank r is requested with a probability proportional to 1/r^alpha).
+    :param seed: Seed of the random generator.
+    :param rate: Mean number of requests per second.
+    """
+    generator = np.random.default_rng(seed)
+    popularity = 1 / np.arange(1, objects + 1) ** alpha
+    ranks = generator.choice(objects, requests, p=popularity / popularity.sum())
+    paths = generator.permutation(objects)[ranks]  # the identifiers of the objects do not follow their popularity
+    sizes = np.minimum(np.ceil(20 * (1 + generator.pareto(1.2, objects))), CACHE_SIZES[-1]).astype(np.int64)
+    maxages = generator.choice(list(TRACE_MAXAGES), objects, p=list(TRACE_MAXAGES.values()))
+    groups = generator.integers(-1, 50, objects)
+    return TraceBatch.from_columns({"timestamp": 1.6e9 + np.cumsum(generator.exponential(1 / rate, requests)), "path": paths,
+                                    "size": sizes[paths], "maxage": maxages[paths], "livechannel": groups[paths]})
+
+
+def replay(cache, columns: list, next_times=None, batch=True) -> np.ndarray:
+    """
+    Replay requests on a cache, the same way as the simulation (one Obj created per request, the requests placed at
+    once, see Cache.recv_batch).
+
+    :param cache: Cache.
+    :param columns: Timestamps, paths, sizes, maxages (default maxage applied) and groups of the requests, lists.
+    :param next_times: Next access time of every request, for the clairvoyant cache (see next_access_times).
+    :param batch: False to place the requests one by one with Cache.recv (the reference implementation).
+    :return: Status code of every request (see Status.code).
+    """
+    if batch:
+        if next_times is None: return cache.recv_batch(*columns)
+        return cache.recv_batch(*columns, next_accesses=next_times)
+    if next_times is None:
+        codes = [cache.recv(timestamp, Obj(path, size, maxage, group)).code for timestamp, path, size, maxage, group in zip(*columns)]
+    else:
+        codes = [cache.recv(timestamp, next_access, Obj(path, size, maxage, group)).code for timestamp, next_access, path, size, maxage, group in zip(columns[0], next_times, *columns[1:])]
+    return np.array(codes, dtype=np.uint8)
+
+
+def eviction_cost(cache, columns: list, next_times=None) -> tuple:
+    """
+    Count and time the evictions of a cache: the objects leaving the cache (see Cache._untrack) while an object is
+    stored are evicted. Every store is timed, the cost of an eviction is the extra time of the stores which evicted
+    objects over the mean time of the stores which did not evict any (unknown with less than 100 stores of each kind,
+    too noisy). The methods of the instance are replaced, the cache model is not modified.
+
+    :param cache: New cache (the requests are replayed on it).
+    :param columns: Requests (see replay).
+    :param next_times: Next access time of every request, for the clairvoyant cache.
+    :return: Number of objects evicted, number of objects removed otherwise (expired, dropped), mean time of an eviction (nanoseconds, None if unknown).
+    """
+    untrack, store = cache._untrack, cache._store
+    counters = [0, 0]  # objects evicted, objects removed otherwise
+    storing = [False]
+    durations, evictions = [], []  # time (ns) and number of objects evicted of every store
+
+    def counted_untrack(obj):
+        counters[0 if storing[0] else 1] += 1
+        untrack(obj)
+
+    def timed_store(fetched):
+        evicted = counters[0]
+        storing[0] = True
+        start = time.perf_counter_ns()
+        store(fetched)
+        durations.append(time.perf_counter_ns() - start)
+        storing[0] = False
+        evictions.append(counters[0] - evicted)
+
+    cache._untrack, cache._store = counted_untrack, timed_store
+    replay(cache, columns, next_times, batch=False)  # the batch loops of some models store the objects without _store
+    durations, evictions = np.array(durations, dtype=np.int64), np.array(evictions, dtype=np.int64)
+    evicting = evictions > 0
+    if min(evicting.sum(), (~evicting).sum()) < 100: return counters[0], counters[1], None
+    return counters[0], counters[1], float((durations[evicting].sum() - evicting.sum() * durations[~evicting].mean()) / evictions.sum())
+
+
+def bench_cache(model: str, size: int, batch: TraceBatch, default_maxage: int, repeat=3) -> dict:
+    """
+    Benchmark a cache model: the requests are replayed repeat times to measure the throughput (the fastest replay is
+    kept, the others being slowed down by the rest of the machine), once more to count and time the evictions, on a
+    new cache every time. The random caches are seeded so that their hit ratio is the same from one run to the other.
+
+    :param model: Name of the cache class (see MODELS).
+    :param size: Size of the cache.
+    :param batch: Requests.
+    :param default_maxage: Default maxage used if not indicated in the logs.
+    :param repeat: Number of replays timed.
+    """
+    model_class = Clairvoyant if model == "Clairvoyant" else next(policy for policy in POLICIES.values() if policy.__name__ == model)
+    columns = [batch.timestamp.tolist(), batch.path.tolist(), batch.size.tolist(), batch.maxages(default_maxage).tolist(), batch.livechannel.tolist()]
+    # knowledge of the future computed beforehand (not part of the simulation time)
+    next_times = next_access_times(columns[0], columns[1]) if model_class is Clairvoyant else None
+    options = {"write_log": False} if model_class is Clairvoyant else {"seed": 0} if issubclass(model_class, RANCache) else {}
+
+    seconds = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        codes = replay(model_class(size, **options), columns, next_times)
+        seconds = min(seconds, time.perf_counter() - start)
+    evictions, removed, cost = eviction_cost(model_class(size, **options), columns, next_times)
+    return {"model": model, "size": size, "requests": len(batch), "seconds": seconds, "requests_per_second": len(batch) / seconds,
+            "hit_ratio": float(np.mean(codes == Status.HIT.code)), "evictions": evictions, "removed": removed, "eviction_ns": cost}
+
+
+def bench_stack(sizes: list, batch: TraceBatch, default_maxage: int, batch_size=10000) -> dict:
+    """
+    Benchmark the LRU stack simulation of every cache size at once (batches of batch_size requests, as the simulation).
+
+    :param sizes: Sizes of the caches.
+    :param batch: Requests.
+    :param default_maxage: Default maxage used if not indicated in the logs.
+    :param batch_size: Number of requests simulated at once.
+    """
+    simulator = LRUStackSimulator(sizes)
+    columns = [batch.timestamp.tolist(), batch.path.tolist(), batch.size.tolist(), batch.maxages(default_maxage).tolist(), batch.livechannel.tolist()]
+    hits = np.zeros(len(sizes), dtype=np.int64)
+    start = time.perf_counter()
+    for first in range(0, len(batch), batch_size):
+        timestamps, paths, sizes_, maxages, groups = [column[first:first + batch_size] for column in columns]
+        codes = simulator.simulate(timestamps, [Obj(path, size, maxage, group) for path, size, maxage, group in zip(paths, sizes_, maxages, groups)])
+        hits += [np.count_nonzero(cache_codes == Status.HIT.code) for cache_codes in codes]
+    seconds = time.perf_counter() - start
+    return {"model": "LRUStackSimulator", "size": None, "requests": len(batch), "seconds": seconds, "requests_per_second": len(batch) / seconds,
+            "hit_ratio": (hits / len(batch)).tolist(), "evictions": None, "removed": None, "eviction_ns": None}
+
+
+def bench_sampler(sizes: list, batch: TraceBatch, default_maxage: int, rate=0.1, batch_size=10000) -> dict:
+    """
+    Benchmark the spatial sampling of LRU caches of every size (requests of the whole trace per second).
+
+    :param sizes: Sizes of the caches.
+    :param batch: Requests.
+    :param default_maxage: Default maxage used if not indicated in the logs.
+    :param rate: Sampling rate.
+    :param batch_size: Number of requests simulated at once.
+    """
+    sampler = SpatialSampler([LRUCache(size) for size in sizes], rate)
+    start = time.perf_counter()
+    for first in range(0, len(batch), batch_size):
+        sampler.simulate(TraceBatch.from_columns({column: values[first:first + batch_size] for column, values in batch.columns().items()}), default_maxage)
+    seconds = time.perf_counter() - start
+    return {"model": "SpatialSampler", "size": None, "requests": len(batch), "seconds": seconds, "requests_per_second": len(batch) / seconds,
+            "hit_ratio": [estimate[7] / 100 for estimate in sampler.estimates()], "evictions": None, "removed": None, "eviction_ns": None}
+
+
+def bench_analyzer(batch: TraceBatch, default_maxage: int, size=1000, batch_size=10000) -> dict:
+    """
+    Benchmark the analysis of the status of the requests (every result of the Analyzer enabled), for the status of a
+    LRU cache. The result files are written in a temporary directory.
+
+    :param batch: Requests.
+    :param default_maxage: Default maxage used if not indicated in the logs.
+    :param size: Size of the LRU cache whose status are analyzed.
+    :param batch_size: Number of requests analyzed at once.
+    """
+    columns = [batch.timestamp.tolist(), batch.path.tolist(), batch.size.tolist(), batch.maxages(default_maxage).tolist(), batch.livechannel.tolist()]
+    codes = replay(LRUCache(size), columns)
+    directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as results:
+        os.chdir(results)  # the analyzer writes in ./results
+        os.mkdir("results")
+        try:
+            analyzer = Analyzer(None, 30, 1000, 3600)
+            start = time.perf_counter()
+            for first in range(0, len(batch), batch_size):
+                last = first + batch_size
+                analyzer.receive(batch.timestamp[first:last].copy(), codes[first:last], batch.livechannel[first:last].copy(), batch.size[first:last].copy())
+            analyzer.end()
+            seconds = time.perf_counter() - start
+        finally:
+            os.chdir(directory)
+    return {"model": "Analyzer", "size": size, "requests": len(batch), "seconds": seconds, "requests_per_second": len(batch) / seconds,
+            "hit_ratio": analyzer.cache_hit_ratio(), "evictions": None, "removed": None, "eviction_ns": None}
+
+
+def bench_model(model: str, size, batch: TraceBatch, default_maxage: int, sizes=CACHE_SIZES, repeat=3) -> dict:
+    """Benchmark of a model (see MODELS), size None for the models simulating every size at once. The fastest of repeat runs is kept."""
+    if model == "LRUStackSimulator": runs = [bench_stack(sizes, batch, default_maxage) for _ in range(repeat)]
+    elif model == "SpatialSampler": runs = [bench_sampler(sizes, batch, default_maxage) for _ in range(repeat)]
+    elif model == "Analyzer": runs = [bench_analyzer(batch, default_maxage) for _ in range(repeat)]
+    else: return bench_cache(model, size, batch, default_maxage, repeat)
+    return min(runs, key=lambda run: run["seconds"])
+
+
+def measure(pipe, model: str, size, batch: TraceBatch, default_maxage: int, sizes: list, repeat: int):
+    """
+    Process running a benchmark: the peak resident memory of the process is sent with the results (kB on Linux). The
+    process is forked, it starts with the memory of the parent process (the trace included): the growth is the peak
+    over the peak before the benchmark.
+    """
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result = bench_model(model, size, batch, default_maxage, sizes, repeat)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    pipe.send(dict(result, peak_rss_kb=peak, rss_growth_kb=peak - before))
+    pipe.close()
+
+
+def benchmark(batch: TraceBatch, models=MODELS, sizes=CACHE_SIZES, default_maxage=300, repeat=3, verbose=False) -> list:
+    """
+    Benchmark models on a trace, each cache in its own process (so that its peak memory is measured alone).
+
+    :param batch: Requests.
+    :param models: Names of the models (see MODELS).
+    :param sizes: Sizes of the caches.
+    :param default_maxage: Default maxage used if not indicated in the logs.
+    :param repeat: Number of runs of every benchmark, the fastest is kept.
+    :param verbose: True to print the results as they come.
+    :return: Results of every cache: model, size, requests, seconds, requests_per_second, hit_ratio, evictions,
+        removed (expired or dropped), eviction_ns (mean time of an eviction), peak_rss_kb and rss_growth_kb.
+    """
+    unknown = set(models) - set(MODELS)
+    assert not unknown, f"Unknown models {sorted(unknown)}, the models are {MODELS}."
+    context = multiprocessing.get_context("fork")
+    results = []
+    for model in models:
+        for size in ([None] if model in ("LRUStackSimulator", "SpatialSampler") else [1000] if model == "Analyzer" else sizes):
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=measure, args=(sender, model, size, batch, default_maxage, sizes, repeat))
+            process.start()
+            sender.close()
+            results.append(receiver.recv())
+            process.join()
+            if verbose: print(format_result(results[-1]), flush=True)
+    return results
+
+
+def format_result(result: dict) -> str:
+    """One line summary of the result of a benchmark."""
+    eviction = "-" if result["eviction_ns"] is None else f"{result['eviction_ns']:.0f} ns"
+    hit_ratio = result["hit_ratio"] if isinstance(result["hit_ratio"], list) else [result["hit_ratio"]]
+    return f"{result['model']:<20} {str(result['size']):>8} {result['requests_per_second']:>10.0f} req/s  peak {result['peak_rss_kb'] / 1024:>7.1f} MB (+{result['rss_growth_kb'] / 1024:.1f})  eviction {eviction:>8}  CHR {' '.join(f'{ratio:.3f}' for ratio in hit_ratio)}"
+
+
+def commit() -> str:
+    """Git commit of the simulator, None if unknown."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_record(trace: dict, default_maxage: int, results: list) -> dict:
+    """
+    Record of a benchmark run in the history: when and where it ran, the trace and the results.
+
+    :param trace: Parameters of the synthetic trace (see synthetic_trace).
+    :param default_maxage: Default maxage used if not indicated in the logs.
+    :param results: Results (see benchmark).
+    """
+    return {"time": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'), "commit": commit(),
+            "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "trace": trace, "default_maxage": default_maxage, "results": results}
+
+
+def save_history(record: dict, file_name=BENCH_HISTORY):
+    """Append the record of a benchmark run (see run_record) to the history file (its directory is created if needed)."""
+    os.makedirs(os.path.dirname(file_name) or ".", exist_ok=True)
+    with open(file_name, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def read_history(file_name=BENCH_HISTORY) -> list:
+    """Records of the benchmark runs of the history file, in order (empty if there is no history)."""
+    if not os.path.exists(file_name): return []
+    with open(file_name, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def regressions(previous: dict, current: dict, tolerance=0.1) -> list:
+    """
+    Compare two benchmark runs on the same trace: the caches slower or using more memory than the tolerance, and the
+    caches whose hit ratio changed (the behavior of the model changed).
+
+    :param previous: Record of the reference run (see run_record).
+    :param current: Record of the new run.
+    :param tolerance: Relative change of the throughput and of the peak memory tolerated.
+    :return: Description of every regression.
+    """
+    if previous["trace"] != current["trace"] or previous["default_maxage"] != current["default_maxage"]: return []
+    reference = {(result["model"], result["size"]): result for result in previous["results"]}
+    found = []
+    for result in current["results"]:
+        before = reference.get((result["model"], result["size"]))
+        if before is None: continue
+        name = f"{result['model']} {result['size']}"
+        if result["requests_per_second"] < before["requests_per_second"] * (1 - tolerance):
+            found.append(f"{name}: {before['requests_per_second']:.0f} -> {result['requests_per_second']:.0f} req/s")
+        if result["peak_rss_kb"] > before["peak_rss_kb"] * (1 + tolerance):
+            found.append(f"{name}: peak memory {before['peak_rss_kb']} -> {result['peak_rss_kb']} kB")
+        if not np.allclose(result["hit_ratio"], before["hit_ratio"]):
+            found.append(f"{name}: hit ratio {before['hit_ratio']} -> {result['hit_ratio']}")
+    return found
+
+
+def main(arguments=None) -> int:
+    """Command line: python -m cachesim.bench [options], the exit status is 1 if a regression is found."""
+    parser = argparse.ArgumentParser(prog="python -m cachesim.bench", description="Benchmark the cache models on a synthetic trace.")
+    parser.add_argument("--requests", type=int, default=50000, help="number of requests of the trace")
+    parser.add_argument("--objects", type=int, default=10000, help="number of objects of the trace")
+    parser.add_argument("--alpha", type=float, default=0.8, help="exponent of the Zipf popularity")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the trace")
+    parser.add_argument("--maxage", type=int, default=300, help="default maxage")
+    parser.add_argument("--models", nargs="+", default=MODELS, help="models benchmarked (see MODELS, or names of the policies of the sweeps)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=CACHE_SIZES, help="sizes of the caches")
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs of every benchmark, the fastest is kept")
+    parser.add_argument("--history", default=BENCH_HISTORY, help="history file, compared to the last run on the same trace and appended")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative slowdown or memory growth reported as a regression")
+    options = parser.parse_args(arguments)
+    models = [POLICIES[model].__name__ if model in POLICIES else model for model in options.models]  # names of the sweeps accepted
+
+    trace = {"requests": options.requests, "objects": options.objects, "alpha": options.alpha, "seed": options.seed}
+    batch = synthetic_trace(**trace)
+    record = run_record(dict(trace, sizes=options.sizes), options.maxage, benchmark(batch, models, options.sizes, options.maxage, options.repeat, verbose=True))
+    previous = [run for run in read_history(options.history) if run["trace"] == record["trace"] and run["default_maxage"] == record["default_maxage"]]
+    found = regressions(previous[-1], record, options.tolerance) if previous else []
+    for regression in found:
+        print("Regression:", regression)
+    save_history(record, options.history)
+    return 1 if found else 0
+
+
+class TestBench(unittest.TestCase):
+
+    def test_synthetic_trace(self):
+        batch = synthetic_trace(20000, 2000, seed=1)
+        self.assertTrue(np.array_equal(batch.path, synthetic_trace(20000, 2000, seed=1).path))
+        self.assertTrue(np.all(np.diff(batch.timestamp) >= 0))
+        self.assertTrue({0, MAXAGE_UNKNOWN} <= set(batch.maxage.tolist()))
+        self.assertGreater(np.max(batch.size), 20 * np.median(batch.size))  # heavy tail
+        counts = np.sort(np.bincount(batch.path))[::-1]
+        self.assertGreater(counts[:20].sum(), 0.1 * len(batch))  # popular objects
+
+    def test_benchmark(self):
+        batch = synthetic_trace(3000, 500, rate=10)
+        results = benchmark(batch, ["LRUCache", "Clairvoyant", "LRUStackSimulator", "Analyzer"], [100, 100000], repeat=1)
+        self.assertEqual([(result["model"], result["size"]) for result in results],
+                         [("LRUCache", 100), ("LRUCache", 100000), ("Clairvoyant", 100), ("Clairvoyant", 100000), ("LRUStackSimulator", None), ("Analyzer", 1000)])
+        lru_small, lru_big, clairvoyant = results[0], results[1], results[3]
+        self.assertGreater(lru_small["evictions"], 0)
+        self.assertIsNotNone(lru_small["eviction_ns"])
+        self.assertGreater(lru_big["removed"], 0)  # expired
+        self.assertGreaterEqual(clairvoyant["hit_ratio"], lru_big["hit_ratio"])
+        self.assertAlmostEqual(results[4]["hit_ratio"][0], lru_small["hit_ratio"], delta=0.05)
+        self.assertTrue(all(result["requests_per_second"] > 0 and result["peak_rss_kb"] > 0 for result in results))
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "results", "history.jsonl")  # the directory does not exist yet
+            record = run_record({"requests": 3000}, 300, results)
+            save_history(record, file_name)
+            previous = read_history(file_name)[-1]
+            self.assertEqual(regressions(previous, record), [])
+            previous["results"][0]["requests_per_second"] *= 2
+            self.assertEqual(len(regressions(previous, record)), 1)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
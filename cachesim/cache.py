@@ -1,11 +1,19 @@
-import bisect
+import heapq
+import itertools
+import math
+from collections import OrderedDict
 from cachesim import Obj, Status
+from cachesim.status import status_codes
+from cachesim.obj import CheckedObj
+from cachesim.profiling import CacheProfile
+from cachesim.trace import next_access_times
 import logging
+import numpy as np
 import random
 import unittest
+from time import perf_counter_ns
 from typing import Optional
 from abc import ABC, abstractmethod
-from elasticsearch import Elasticsearch
 
 
 class Cache(ABC):
@@ -31,6 +39,25 @@ class Cache(ABC):
 
         self.__write_log = write_log
 
+        # hash index of the cached objects (key: Obj.index, value: cached Obj), kept up to date by the cache models
+        self._index = {}
+
+        # total size of the cached objects, updated when objects enter or leave the cache
+        self._used_bytes = 0
+
+        # expiry index: min-heap of [expiry time, sequence number, object] entries, shared by every cache model
+        # entries are invalidated lazily, the live entry of each cached object is kept in _expiry_entries (key: Obj.index)
+        self._expiry = []
+        self._expiry_entries = {}
+        self._expiry_seq = itertools.count()
+
+        # number of objects removed from the cache (evicted, expired or discarded), profile of the requests (see enable_profiling)
+        self._removed = 0
+        self._profile = None
+
+        # admission filter consulted after _admit (see set_admission), None to admit on _admit only
+        self._admission = None
+
         # setup logging
         if logger is None:
             self.__logger = logging.getLogger(name=self.__class__.__name__)
@@ -43,6 +70,22 @@ class Cache(ABC):
         """Total size of the cache."""
         return self.__maxsize
 
+    @maxsize.setter
+    def maxsize(self, maxsize: int):
+        """Resize the cache (for example to follow a sampling rate), the objects in excess are evicted when the next object is stored."""
+        assert maxsize > 0 and isinstance(maxsize, int), f"Cache must have positive integer size: '{maxsize}' received!"
+        self.__maxsize = maxsize
+
+    @property
+    def used_bytes(self) -> int:
+        """Total size of the objects currently in the cache."""
+        return self._used_bytes
+
+    @property
+    def occupancy(self) -> float:
+        """Fill level of the cache (ratio between used and total size)."""
+        return self._used_bytes / self.__maxsize
+
     @property
     def clock(self) -> float:
         """Current time."""
@@ -54,6 +97,45 @@ class Cache(ABC):
         assert self.__clock is None or time >= self.__clock, f"Time passes, you will never become younger!"
         self.__clock = time
 
+    @property
+    def profiling(self) -> Optional[CacheProfile]:
+        """Profile of the requests, None if the profiling is disabled."""
+        return self._profile
+
+    def enable_profiling(self) -> CacheProfile:
+        """
+        Profile the next requests: the phases of every request (see cachesim.profiling.PHASES) are timed and the objects
+        leaving the cache are counted. The requests are slower while the profiling is enabled, the decisions of the cache
+        are the same. The profile is kept if it is already enabled.
+
+        :return: Profile of the requests (see CacheProfile.snapshot).
+        """
+        if self._profile is None: self._profile = CacheProfile()
+        return self._profile
+
+    def disable_profiling(self) -> Optional[CacheProfile]:
+        """Stop the profiling and return the profile of the requests (None if the profiling was not enabled)."""
+        profile, self._profile = self._profile, None
+        return profile
+
+    @property
+    def admission(self):
+        """Admission filter of the cache, None if there is none."""
+        return self._admission
+
+    def set_admission(self, admission):
+        """
+        Install an admission filter (for example cachesim.admission.TinyLFU) in front of the eviction policy: every
+        request is recorded by the filter, and an object admitted by _admit enters the cache only if the filter admits
+        it too. When the object does not fit in the free space, the filter compares it with the object the cache would
+        evict first (see _victim).
+
+        :param admission: Admission filter (record and admit methods), None to remove the filter.
+        :return: Previous admission filter.
+        """
+        previous, self._admission = self._admission, admission
+        return previous
+
     def recv(self, time: float, obj: Obj) -> Status:
         """
         Call this function to place a request to the cache.
@@ -62,12 +144,16 @@ class Cache(ABC):
         :param obj: The object (Obj) requested.
         :return: Request status (Status).
         """
+        if self._profile is not None: return self.__profiled_recv(time, obj)
 
         if time>self.clock: self._delete_expired(time)
 
         # update the internal clock
         self.clock = time
 
+        # count the request in the admission filter
+        if self._admission is not None: self._admission.record(obj.index)
+
         # try to get the object from cache
         stored = self._lookup(obj)
         if stored is not None:
@@ -80,7 +166,7 @@ class Cache(ABC):
         obj.fetched = True
 
         # cache admission
-        if obj.cacheable and obj.size <= self.maxsize and self._admit(obj):
+        if obj.cacheable and obj.size <= self.maxsize and self._admit(obj) and self.__filter(obj):
 
             # store
             obj.enter = self.clock
@@ -93,6 +179,127 @@ class Cache(ABC):
             self.__log(obj, Status.PASS)
             return Status.PASS
 
+    def recv_batch(self, timestamps, paths, sizes, maxages, groups=None, obj_type=Obj) -> np.ndarray:
+        """
+        Place a batch of requests to the cache (for example a chunk of a trace), in time order. The decisions are the
+        same as the ones of recv (the reference implementation) for every request, without its overhead per request:
+        the order of the times is checked once for the batch and the status codes are returned instead of Status.
+        The requests are replayed by _recv_batch, overload it to provide a specialized loop for a cache model.
+
+        :param timestamps: Time (epoch) of the requests.
+        :param paths: Identifiers of the objects requested (Obj.index).
+        :param sizes: Sizes of the objects.
+        :param maxages: Maxage of the objects (the default maxage already applied, see TraceBatch.maxages).
+        :param groups: Groups of the objects, None if not documented.
+        :param obj_type: Type of the objects requested (Obj or CheckedObj).
+        :return: Status code of every request (see Status.code), uint8 array.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if len(timestamps) == 0: return np.zeros(0, dtype=np.uint8)
+        assert timestamps[0] >= self.clock and np.all(timestamps[1:] >= timestamps[:-1]), f"Time passes, you will never become younger!"
+        groups = [-1] * len(timestamps) if groups is None else np.asarray(groups).tolist()
+        requests = zip(timestamps.tolist(), np.asarray(paths).tolist(), np.asarray(sizes).tolist(), np.asarray(maxages).tolist(), groups)
+        if self._profile is not None or self.__write_log or self._admission is not None:
+            # profiled, logged or filtered requests go through recv
+            return np.array([self.recv(time, obj_type(path, size, maxage, group)).code for time, path, size, maxage, group in requests], dtype=np.uint8)
+        return np.array(self._recv_batch(requests, obj_type), dtype=np.uint8)
+
+    def _recv_batch(self, requests, obj_type) -> list:
+        """
+        Replay requests in time order (see recv_batch), the steps of recv are followed with the methods of the instance
+        bound once. The expiry index is only visited when its first object expired.
+
+        :param requests: Iterator of (time, path, size, maxage, group) tuples.
+        :param obj_type: Type of the objects requested.
+        :return: Status code of every request.
+        """
+        hit, miss, pass_ = Status.HIT.code, Status.MISS.code, Status.PASS.code
+        lookup, admit, store, delete_expired = self._lookup, self._admit, self._store, self._delete_expired
+        lazy_expiry = type(self)._delete_expired is Cache._delete_expired  # nothing to delete if the first object of the expiry index did not expire
+        maxsize = self.maxsize
+        clock = self.__clock
+        codes = []
+        append = codes.append
+        for time, path, size, maxage, group in requests:
+            if time > clock:
+                if not lazy_expiry or (self._expiry and self._expiry[0][0] < time): delete_expired(time)
+                clock = self.__clock = time
+
+            obj = obj_type(path, size, maxage, group)
+            stored = lookup(obj)
+            if stored is not None:
+                stored.enter = clock
+                append(hit)
+                continue
+
+            obj.fetched = True
+            if obj.cacheable and size <= maxsize and admit(obj):
+                obj.enter = clock
+                store(obj)
+                append(miss)
+            else:
+                append(pass_)
+        return codes
+
+    def __profiled_recv(self, time: float, obj: Obj) -> Status:
+        """Same as recv, timing every phase of the request in the profile."""
+        profile = self._profile
+        profile.requests += 1
+
+        if time > self.clock:
+            removed = self._removed
+            start = perf_counter_ns()
+            self._delete_expired(time)
+            profile.add("expire", perf_counter_ns() - start)
+            profile.expirations += self._removed - removed
+
+        self.clock = time
+
+        if self._admission is not None: self._admission.record(obj.index)
+
+        removed = self._removed
+        start = perf_counter_ns()
+        stored = self._lookup(obj)
+        profile.add("lookup", perf_counter_ns() - start)
+        profile.removals += self._removed - removed
+        if stored is not None:
+            stored.enter = self.clock
+            self.__log(stored, Status.HIT)
+            return Status.HIT
+
+        obj.fetched = True
+
+        if obj.cacheable and obj.size <= self.maxsize:
+            start = perf_counter_ns()
+            admitted = self._admit(obj) and self.__filter(obj)
+            profile.add("admit", perf_counter_ns() - start)
+            if admitted:
+                obj.enter = self.clock
+                removed = self._removed
+                start = perf_counter_ns()
+                self._store(obj)
+                elapsed = perf_counter_ns() - start
+                profile.add("evict" if self._removed != removed else "store", elapsed)
+                profile.evictions += self._removed - removed
+                self.__log(obj, Status.MISS)
+                return Status.MISS
+
+        self.__log(obj, Status.PASS)
+        return Status.PASS
+
+    def __filter(self, fetched: Obj) -> bool:
+        """Decision of the admission filter on an object admitted by _admit (True without filter or if the object fits in the free space)."""
+        if self._admission is None or self._used_bytes + fetched.size <= self.maxsize: return True
+        victim = self._victim()
+        return self._admission.admit(fetched.index, None if victim is None else victim.index)
+
+    def _victim(self) -> Optional[Obj]:
+        """
+        Overload this method to give the object the cache would evict first (used by the admission filters), None if
+        the cache is empty or if the model does not know it before evicting (for example a random eviction).
+        """
+        return None
+
     @abstractmethod
     def _admit(self, fetched: Obj) -> bool:
         """
@@ -103,13 +310,42 @@ class Cache(ABC):
         """
         pass
 
-    @abstractmethod
     def _delete_expired(self, time: float):
         """
-        Implement this method to delete the objects expired in the cache.
+        Delete the objects expired in the cache. Only the objects whose expiry time (enter + maxage) is in the past are
+        visited: the expiry index is popped and every object found expired is given to _remove. Entries of objects that
+        left the cache are dropped, entries of objects whose expiry was pushed back by a HIT are rescheduled.
+        Overload this method to provide another expiry policy.
 
         :param time: Current time.
         """
+        heap = self._expiry
+        while heap and heap[0][0] < time:
+            entry = heapq.heappop(heap)
+            obj = entry[2]
+            if self._expiry_entries.get(obj.index) is not entry: continue # stale entry (object evicted or replaced)
+            if obj.isexpired(time):
+                self._remove(obj)
+            else:
+                self.__schedule_expiry(obj)
+
+    def discard(self, index):
+        """
+        Remove an object from the cache if it is cached (for example when it leaves a sample of the requests).
+
+        :param index: Identifier of the object (Obj.index).
+        """
+        obj = self._index.get(index)
+        if obj is not None: self._remove(obj)
+
+    @abstractmethod
+    def _remove(self, obj: Obj):
+        """
+        Implement this method to remove an object from the cache (used for the objects expired).
+        The implementation must call _untrack once the object is removed from the cache structure.
+
+        :param obj: Object cached to remove.
+        """
         pass
 
     @abstractmethod
@@ -132,6 +368,54 @@ class Cache(ABC):
         """
         pass
 
+    def _track(self, obj: Obj):
+        """
+        Register an object entering the cache in the index and in the occupancy counter.
+
+        :param obj: Object stored.
+        """
+        self._index[obj.index] = obj
+        self._used_bytes += obj.size
+        self.__schedule_expiry(obj)
+
+        # drop the stale entries when they make up most of the expiry index
+        if len(self._expiry) > 2 * len(self._expiry_entries) + 64:
+            self._expiry = list(self._expiry_entries.values())
+            heapq.heapify(self._expiry)
+
+    def _untrack(self, obj: Obj):
+        """
+        Unregister an object leaving the cache (evicted, expired or replaced) from the index and the occupancy counter.
+
+        :param obj: Object removed.
+        """
+        del self._index[obj.index]
+        del self._expiry_entries[obj.index]
+        self._used_bytes -= obj.size
+        self._removed += 1
+
+    def _replace(self, cached: Obj, obj: Obj):
+        """
+        Replace a cached object by a new version of it (same index) in the index and the occupancy counter.
+        The expiry entry of the cached object is reused unless the new version expires earlier.
+
+        :param cached: Object currently in the cache.
+        :param obj: New version of the object (fetched, enter time set).
+        """
+        self._index[obj.index] = obj
+        self._used_bytes += obj.size - cached.size
+        entry = self._expiry_entries[obj.index]
+        if obj.enter + obj.maxage < entry[0]:
+            self.__schedule_expiry(obj)
+        else:
+            entry[2] = obj
+
+    def __schedule_expiry(self, obj: Obj):
+        """Push the expiry time of a cached object in the expiry index."""
+        entry = [obj.enter + obj.maxage, next(self._expiry_seq), obj]
+        self._expiry_entries[obj.index] = entry
+        heapq.heappush(self._expiry, entry)
+
     def __log(self, obj, status: Status):
         """Basic logging"""
         if self.__write_log:
@@ -152,6 +436,9 @@ class NonCache(Cache):
     def _store(self, fetched: Obj):
         pass
 
+    def _remove(self, obj: Obj):
+        self._untrack(obj)
+
     def _delete_expired(self, time: int) -> bool:
         pass
 
@@ -164,27 +451,62 @@ class FIFOCache(Cache):
     def __init__(self, maxsize: int, logger=None, write_log=False):
         super().__init__(maxsize, logger, write_log)
 
-        # implement a FIFO for the cache itself
-        self._cache = []
+        # implement a FIFO for the cache itself: the insertion ordered index doubles as the queue
+        self._cache = self._index = OrderedDict()
 
     def _lookup(self, requested: Obj) -> Optional[Obj]:
         # check if object already in cache
-        return next((x for x in self._cache if x == requested), None)
+        return self._index.get(requested.index)
 
     def _admit(self, fetched: Obj) -> bool:
         return True
 
     def _store(self, fetched: Obj):
         # put the new object at the end of the cache
-        self._cache.append(fetched)
+        self._track(fetched)
 
         # trigger cache eviction if needed
-        while fetched.size <= self.maxsize < sum(self._cache):
-            self._cache.pop(0)
-
-
-    def _delete_expired(self, time: float):
-        self._cache = [obj for obj in self._cache if not obj.isexpired(time)]
+        while fetched.size <= self.maxsize < self._used_bytes:
+            self._untrack(next(iter(self._cache.values())))
+
+    def _recv_batch(self, requests, obj_type) -> list:
+        # same as Cache._recv_batch with the lookup, store and eviction inlined
+        hit, miss, pass_ = Status.HIT.code, Status.MISS.code, Status.PASS.code
+        admit, track, untrack = self._admit, self._track, self._untrack
+        cache = self._cache
+        maxsize = self.maxsize
+        clock = self.clock
+        codes = []
+        append = codes.append
+        for time, path, size, maxage, group in requests:
+            if time > clock:
+                if self._expiry and self._expiry[0][0] < time: self._delete_expired(time)
+                clock = self.clock = time
+
+            stored = cache.get(path)
+            if stored is not None:
+                stored.enter = clock
+                append(hit)
+                continue
+
+            obj = obj_type(path, size, maxage, group)
+            obj.fetched = True
+            if maxage > 0 and size <= maxsize and admit(obj):
+                obj.enter = clock
+                track(obj)
+                while size <= maxsize < self._used_bytes:
+                    untrack(next(iter(cache.values())))
+                append(miss)
+            else:
+                append(pass_)
+        return codes
+
+    def _remove(self, obj: Obj):
+        self._untrack(obj)
+
+    def _victim(self) -> Optional[Obj]:
+        # first object of the queue
+        return next(iter(self._cache.values()), None)
 
 
 class ProtectedFIFOCache(FIFOCache):
@@ -204,19 +526,18 @@ class LRUCache(Cache):
     def __init__(self, maxsize: int, logger=None, write_log=False):
         super().__init__(maxsize, logger, write_log)
 
-        # implement a LRU for the cache itself
-        self._cache = []
+        # implement a LRU for the cache itself: the ordered index goes from the least to the most recently used object
+        self._cache = self._index = OrderedDict()
 
     def _lookup(self, requested: Obj) -> Optional[Obj]:
         # check if object already in cache
-        cached_obj = next((x for x in self._cache if x == requested), None)
-        # If in cache replace the element at the end of the list
-        if cached_obj is not None:
-            self._cache.remove(cached_obj)
-            requested.enter = self.clock
-            requested.fetched = True
-            self._cache.append(requested)
-        else: return None
+        cached_obj = self._index.get(requested.index)
+        if cached_obj is None: return None
+        # If in cache replace the element and move it at the end of the queue
+        requested.enter = self.clock
+        requested.fetched = True
+        self._replace(cached_obj, requested)
+        self._cache.move_to_end(requested.index)
         return requested
 
     def _admit(self, fetched: Obj) -> bool:
@@ -224,15 +545,55 @@ class LRUCache(Cache):
 
     def _store(self, fetched: Obj):
         # put the new object at the end of the cache
-        self._cache.append(fetched)
-
-        # trigger cache eviction if needed
-        while fetched.size <= self.maxsize < sum(self._cache):
-            self._cache.pop(0)
-
-
-    def _delete_expired(self, time: float):
-        self._cache = [obj for obj in self._cache if not obj.isexpired(time)]
+        self._track(fetched)
+
+        # trigger cache eviction if needed (least recently used object first)
+        while fetched.size <= self.maxsize < self._used_bytes:
+            self._untrack(next(iter(self._cache.values())))
+
+    def _recv_batch(self, requests, obj_type) -> list:
+        # same as Cache._recv_batch with the lookup, store and eviction inlined
+        hit, miss, pass_ = Status.HIT.code, Status.MISS.code, Status.PASS.code
+        admit, track, untrack, replace = self._admit, self._track, self._untrack, self._replace
+        cache = self._cache
+        move_to_end = cache.move_to_end
+        maxsize = self.maxsize
+        clock = self.clock
+        codes = []
+        append = codes.append
+        for time, path, size, maxage, group in requests:
+            if time > clock:
+                if self._expiry and self._expiry[0][0] < time: self._delete_expired(time)
+                clock = self.clock = time
+
+            obj = obj_type(path, size, maxage, group)
+            obj.fetched = True
+            cached = cache.get(path)
+            if cached is not None:
+                # the requested object replaces the cached one, at the end of the queue
+                obj.enter = clock
+                replace(cached, obj)
+                move_to_end(path)
+                append(hit)
+                continue
+
+            if maxage > 0 and size <= maxsize and admit(obj):
+                obj.enter = clock
+                track(obj)
+                while size <= maxsize < self._used_bytes:
+                    untrack(next(iter(cache.values())))
+                append(miss)
+            else:
+                append(pass_)
+        return codes
+
+
+    def _remove(self, obj: Obj):
+        self._untrack(obj)
+
+    def _victim(self) -> Optional[Obj]:
+        # least recently used object
+        return next(iter(self._cache.values()), None)
 
 class ProtectedLRUCache(LRUCache):
     """
@@ -244,46 +605,109 @@ class ProtectedLRUCache(LRUCache):
 
 class LFUCache(Cache):
     """
-    Least frequently used cache model.
+    Least frequently used cache model, the least recently used object is evicted in case of tie.
+    The cached objects are kept in buckets by request frequency, each bucket being ordered from the least to the most
+    recently used object, so that requests and evictions do not depend on the number of objects cached.
     """
 
-    def __init__(self, maxsize: int, logger=None, write_log=False):
+    def __init__(self, maxsize: int, logger=None, write_log=False, history=None, aging=0):
+        """
+        :param history: Maximum number of request frequencies remembered for the objects not in the cache. None for no
+            limit (every object ever requested), 0 to forget the frequency of an object as soon as it leaves the cache.
+        :param aging: Number of requests after which every frequency is halved, 0 to disable the aging.
+        """
         super().__init__(maxsize, logger, write_log)
-        self._cache = []
-        self._frequency = {}
+        assert history is None or history >= 0, f"Frequency history must be None or a non negative integer: '{history}' received!"
+        assert aging >= 0, f"Aging period must be a non negative integer: '{aging}' received!"
+
+        self._buckets = {} # key: frequency, value: cached objects with this frequency (OrderedDict Obj.index -> Obj)
+        self._frequencies = [] # min-heap of the bucket frequencies (emptied buckets are dropped lazily)
+        self._frequency = {} # frequency of the cached objects (key: Obj.index)
+        self._history = OrderedDict() # frequency of the objects not in the cache, least recently requested first
+
+        self.__history_size = history
+        self.__aging = aging
+        self.__requests = 0
 
     def _lookup(self, requested: Obj) -> Optional[Obj]:
-        # Update frequency
-        self._frequency[requested.index] = self._frequency.get(requested.index, 0) + 1
+        self.__requests += 1
+        if self.__requests == self.__aging: self.__age()
+
         # check if object already in cache
-        cached_obj = next((x for x in self._cache if x == requested), None)
-        # If in cache replace the element at the end of the list (LRU is used in case of tie)
-        if cached_obj is not None:
-            self._cache.remove(cached_obj)
-            requested.enter = self.clock
-            requested.fetched = True
-            self._cache.append(requested)
-        else: return None
+        cached_obj = self._index.get(requested.index)
+        if cached_obj is None:
+            # Update frequency (the entry is kept for _store if the object enters the cache)
+            self.__remember(requested.index, self._history.pop(requested.index, 0) + 1, reserve=1)
+            return None
+
+        # Update frequency: move the object at the end of the next bucket (LRU is used in case of tie)
+        frequency = self.__unlink(cached_obj)
+        requested.enter = self.clock
+        requested.fetched = True
+        self._replace(cached_obj, requested)
+        self.__link(requested, frequency + 1)
         return requested
 
     def _admit(self, fetched: Obj) -> bool:
         return True
 
     def _store(self, fetched: Obj):
-        self._cache.append(fetched)
-        # trigger cache eviction if needed
-        while fetched.size <= self.maxsize < sum(self._cache):
-            max_frequency=self._cache[0].index
-            drop = 0 # index of the object to drop from the cache
-            for index_cache in range(1, len(self._cache)):
-                if self._frequency[self._cache[index_cache].index]<max_frequency:
-                    max_frequency = self._frequency[self._cache[index_cache].index]
-                    drop = index_cache
-            self._cache.pop(drop)
-        
+        self._track(fetched)
+        self.__link(fetched, self._history.pop(fetched.index))
 
-    def _delete_expired(self, time: float):
-        self._cache = [obj for obj in self._cache if not obj.isexpired(time)]
+        # trigger cache eviction if needed
+        while fetched.size <= self.maxsize < self._used_bytes:
+            while self._frequencies[0] not in self._buckets: heapq.heappop(self._frequencies)
+            self._remove(next(iter(self._buckets[self._frequencies[0]].values())))
+
+
+    def _remove(self, obj: Obj):
+        frequency = self.__unlink(obj)
+        self._untrack(obj)
+        self.__remember(obj.index, frequency)
+
+    def _victim(self) -> Optional[Obj]:
+        # least recently used object of the lowest frequency bucket
+        while self._frequencies and self._frequencies[0] not in self._buckets: heapq.heappop(self._frequencies)
+        return next(iter(self._buckets[self._frequencies[0]].values())) if self._frequencies else None
+
+    def __link(self, obj: Obj, frequency: int):
+        """Put a cached object at the end of the bucket of its frequency."""
+        bucket = self._buckets.get(frequency)
+        if bucket is None:
+            bucket = self._buckets[frequency] = OrderedDict()
+            heapq.heappush(self._frequencies, frequency)
+            if len(self._frequencies) > 2 * len(self._buckets) + 64:
+                self._frequencies = sorted(self._buckets)
+        bucket[obj.index] = obj
+        self._frequency[obj.index] = frequency
+
+    def __unlink(self, obj: Obj) -> int:
+        """Take a cached object out of its bucket and return its frequency."""
+        frequency = self._frequency.pop(obj.index)
+        bucket = self._buckets[frequency]
+        del bucket[obj.index]
+        if not bucket: del self._buckets[frequency]
+        return frequency
+
+    def __remember(self, index, frequency: int, reserve=0):
+        """Record the frequency of an object not in the cache, forgetting the least recently requested ones over the limit."""
+        self._history[index] = frequency
+        if self.__history_size is not None:
+            while len(self._history) > self.__history_size + reserve:
+                self._history.popitem(last=False)
+
+    def __age(self):
+        """Halve every frequency. Objects of merged buckets keep the order of their previous frequency."""
+        self.__requests = 0
+        buckets = self._buckets
+        self._buckets = {}
+        self._frequency = {}
+        for frequency in sorted(buckets):
+            for obj in buckets[frequency].values():
+                self.__link(obj, max(frequency // 2, 1))
+        self._frequencies = sorted(self._buckets)
+        self._history = OrderedDict((index, frequency // 2) for index, frequency in self._history.items() if frequency > 1)
 
 class ProtectedLFUCache(LFUCache):
     """
@@ -300,26 +724,46 @@ class LSOCache(Cache):
 
     def __init__(self, maxsize: int, logger=None, write_log=False):
         super().__init__(maxsize, logger, write_log)
+
+        # max-heap of [-size, -sequence number, object] entries: the biggest object is evicted first, the most recently
+        # stored one in case of tie. Removed objects are dropped lazily, the live entries are kept in _entries (key: Obj.index)
         self._cache = []
+        self._entries = {}
+        self._seq = itertools.count()
 
     def _lookup(self, requested: Obj) -> Optional[Obj]:
         # check if object already in cache
-        return next((x for x in self._cache if x == requested), None)
+        return self._index.get(requested.index)
 
     def _admit(self, fetched: Obj) -> bool:
         return True
 
     def _store(self, fetched: Obj):
-        # put the new object in the sorted list by size
-        bisect.insort(self._cache, fetched)
+        # put the new object in the heap ordered by size
+        entry = [-fetched.size, -next(self._seq), fetched]
+        self._entries[fetched.index] = entry
+        heapq.heappush(self._cache, entry)
+        self._track(fetched)
 
         # trigger cache eviction if needed
-        while fetched.size <= self.maxsize < sum(self._cache):
-            self._cache.pop() # delete the object with the biggest size
+        while fetched.size <= self.maxsize < self._used_bytes:
+            entry = heapq.heappop(self._cache)
+            if self._entries.get(entry[2].index) is entry: self._remove(entry[2]) # delete the object with the biggest size
 
+        # drop the removed objects when they make up most of the heap
+        if len(self._cache) > 2 * len(self._entries) + 64:
+            self._cache = list(self._entries.values())
+            heapq.heapify(self._cache)
 
-    def _delete_expired(self, time: float):
-        self._cache = [obj for obj in self._cache if not obj.isexpired(time)]
+
+    def _remove(self, obj: Obj):
+        del self._entries[obj.index]
+        self._untrack(obj)
+
+    def _victim(self) -> Optional[Obj]:
+        # top of the heap, once the removed objects on top are dropped
+        while self._cache and self._entries.get(self._cache[0][2].index) is not self._cache[0]: heapq.heappop(self._cache)
+        return self._cache[0][2] if self._cache else None
 
 
 class ProtectedLSOCache(LSOCache):
@@ -338,25 +782,45 @@ class SSOCache(Cache):
 
     def __init__(self, maxsize: int, logger=None, write_log=False):
         super().__init__(maxsize, logger, write_log)
+
+        # min-heap of [size, sequence number, object] entries: the smallest object is evicted first, the least recently
+        # stored one in case of tie. Removed objects are dropped lazily, the live entries are kept in _entries (key: Obj.index)
         self._cache = []
+        self._entries = {}
+        self._seq = itertools.count()
 
     def _lookup(self, requested: Obj) -> Optional[Obj]:
         # check if object already in cache
-        return next((x for x in self._cache if x == requested), None)
+        return self._index.get(requested.index)
 
     def _admit(self, fetched: Obj) -> bool:
         return True
 
     def _store(self, fetched: Obj):
-        # put the new object in the sorted list by size
-        bisect.insort(self._cache, fetched)
+        # put the new object in the heap ordered by size
+        entry = [fetched.size, next(self._seq), fetched]
+        self._entries[fetched.index] = entry
+        heapq.heappush(self._cache, entry)
+        self._track(fetched)
 
         # trigger cache eviction if needed
-        while fetched.size <= self.maxsize < sum(self._cache):
-            self._cache.pop(0) # delete the object with the smallest size
-            
-    def _delete_expired(self, time: float):
-        self._cache = [obj for obj in self._cache if not obj.isexpired(time)]
+        while fetched.size <= self.maxsize < self._used_bytes:
+            entry = heapq.heappop(self._cache)
+            if self._entries.get(entry[2].index) is entry: self._remove(entry[2]) # delete the object with the smallest size
+
+        # drop the removed objects when they make up most of the heap
+        if len(self._cache) > 2 * len(self._entries) + 64:
+            self._cache = list(self._entries.values())
+            heapq.heapify(self._cache)
+
+    def _remove(self, obj: Obj):
+        del self._entries[obj.index]
+        self._untrack(obj)
+
+    def _victim(self) -> Optional[Obj]:
+        # top of the heap, once the removed objects on top are dropped
+        while self._cache and self._entries.get(self._cache[0][2].index) is not self._cache[0]: heapq.heappop(self._cache)
+        return self._cache[0][2] if self._cache else None
 
         
 class ProtectedSSOCache(SSOCache):
@@ -373,28 +837,45 @@ class RANCache(Cache):
     Random cache model.
     """
 
-    def __init__(self, maxsize: int, logger=None, write_log=False):
+    def __init__(self, maxsize: int, logger=None, write_log=False, seed=None):
+        """
+        :param seed: Seed of the random generator used for eviction (None for a non reproducible seed).
+        """
         super().__init__(maxsize, logger, write_log)
+
+        # array of the cached objects and position of each object in the array (key: Obj.index)
         self._cache = []
+        self._positions = {}
+
+        # random generator owned by the cache, independent from the other caches and from the random module
+        self._random = random.Random(seed)
 
     def _lookup(self, requested: Obj) -> Optional[Obj]:
         # check if object already in cache
-        return next((x for x in self._cache if x == requested), None)
+        return self._index.get(requested.index)
 
     def _admit(self, fetched: Obj) -> bool:
         return True
 
     def _store(self, fetched: Obj):
         # put the new object at the end of the cache
+        self._positions[fetched.index] = len(self._cache)
         self._cache.append(fetched)
+        self._track(fetched)
 
         # trigger cache eviction if needed
-        while fetched.size <= self.maxsize < sum(self._cache):
-            self._cache.pop(random.randrange(len(self._cache)))
+        while fetched.size <= self.maxsize < self._used_bytes:
+            self._remove(self._cache[self._random.randrange(len(self._cache))])
 
 
-    def _delete_expired(self, time: float):
-        self._cache = [obj for obj in self._cache if not obj.isexpired(time)]
+    def _remove(self, obj: Obj):
+        # move the last object of the array in place of the removed one
+        position = self._positions.pop(obj.index)
+        last = self._cache.pop()
+        if position < len(self._cache):
+            self._cache[position] = last
+            self._positions[last.index] = position
+        self._untrack(obj)
 
 
 class ProtectedRANCache(RANCache):
@@ -410,128 +891,120 @@ class Clairvoyant(Cache):
     """
     Clairvoyant (Belady) cache model. This model uses knowledge of the future and is the optimal caching method (unsusable in practice).
     The algorithm uses the knowledge of the future to find the optimal cache replacement policy. The objects with the furthest next access times are evicted.
-    The cache is implemented as a Python dictionary linking the next access times (keys) and the objects in the cache (values).
-    When an object enters the cache the next access time is searched in Elasticsearch and stored in the Python dict.
+    The next access time of every request is computed beforehand, in a single pass over the trace (see cachesim.trace.next_access_times), and given with the request.
+    The cache is implemented as a max-heap on the next access times of the objects in the cache.
+    Objects never requested again are not stored (or dropped from the cache on their last HIT).
     If the cache is full the object with the furthest next access time is evicted.
     """
 
-    def __init__(self, maxsize: int, es_instance: Elasticsearch, index_name, logger=None, write_log=True):
-        """ Init function
-        :param es_instance: instance used for running the ES searches
-        :param index_name: name of the index to perform the search for finding next access time of the object"""
-        super().__init__(maxsize, None, write_log)
-
-        # dico with key = next access time (int, epoch in second), value = object in the cache
-        self._cache = {}
-
-        # ES IDs of the documents already processed
-        self._es_ids = []
-
-        self._es = es_instance
-
-        self.__write_log = write_log
+    def __init__(self, maxsize: int, logger=None, write_log=True):
+        super().__init__(maxsize, logger, write_log)
 
-        self.__index_name = index_name
+        # max-heap of [-next access time, sequence number, object] entries: the object requested the furthest in the future
+        # is evicted first, the first one pushed in case of tie. Outdated entries are dropped lazily, the live entries are kept in _entries (key: Obj.index)
+        self._cache = []
+        self._entries = {}
+        self._seq = itertools.count()
 
-        # setup logging
-        if logger is None:
-            self.__logger = logging.getLogger(name=self.__class__.__name__)
-            # self._logger.setLevel(logging.DEBUG)  TODO: FIX this
-        else:
-            self.__logger = logger
+        # next access time of the object of the request being processed
+        self.__next_access = math.inf
 
     def _lookup(self, requested: Obj) -> Optional[Obj]:
         # check if object already in cache
-        return next((x for x in [obj for sublist in self._cache.values() for obj in sublist] if x == requested), None)
+        cached_obj = self._index.get(requested.index)
+        if cached_obj is not None:
+            # update the next access time (the object is useless in the cache if it is never requested again)
+            if self.__next_access == math.inf: self._remove(cached_obj)
+            else: self.__push(cached_obj)
+        return cached_obj
 
     def _admit(self, fetched: Obj) -> bool:
         return fetched.size <= self.maxsize * 0.1
 
     def _store(self, fetched: Obj):
         """ Store object according to clairvoyant (Belady) algorithm.
-        1. If some objects contained in the cache have an expired next access time we update it to the real next access time (depending to the clock state)
-        2. We search the next access time for the object entering in the cache and we store the object and the next access time in the Python dictionary
+        1. Objects never requested again are not stored
+        2. The object is stored in the heap with its next access time
         3. If cache is full we drop the objects with the furthest next access times until the cache is not full anymore
         """
-        # 1. When time is already passed update the next access time
-        while self._cache and min(self._cache.keys())<self.clock:
-            min_key = min(self._cache.keys()) # time already passed
-            for obj_index in range(len(self._cache[min_key])): # update the access time for all objects for which the time is passed
-                query = {"bool": {"filter": [{"term": {"path": self._cache[min_key][obj_index].index}}], "must": [{"range": {"@timestamp":{"gte": f'{self.clock:.9f}', "format": "epoch_second"}}}], "must_not": [{"terms": {"_id": self._es_ids}}]}}
-                search_results = self._es.search(index=self.__index_name, query=query, size=1, docvalue_fields=[{"field": "@timestamp","format": "epoch_second"}], sort=[{"@timestamp": {"order": "asc"}}], version=False)
-                if len(search_results["hits"]["hits"])>0: self._cache.setdefault(float(search_results["hits"]["hits"][0]["fields"]["@timestamp"][0]), []).append(self._cache[min_key][obj_index]) # if the object is never called again in the future
-            del self._cache[min_key] # when we processed every object destroy the dict element
-
-        # 2. Search the next time access for the new object (search the next timestamp for the object and exclude the objects already processed (ES doc IDs))
-        query = {"bool": {"filter": [{"term": {"path": fetched.index}}], "must": [{"range": {"@timestamp":{"gte": f'{self.clock:.9f}', "format": "epoch_second"}}}], "must_not": [{"terms": {"_id": self._es_ids}}]}} 
-        search_results = self._es.search(index=self.__index_name, query=query, size=1, docvalue_fields=[{"field": "@timestamp","format": "epoch_second"}], sort=[{"@timestamp": {"order": "asc"}}], version=False)
-        if len(search_results["hits"]["hits"])==0: return # don't store the object if never called after
-        self._cache.setdefault(float(search_results["hits"]["hits"][0]["fields"]["@timestamp"][0]), []).append(fetched)
+        # 1. Don't store the object if never called after
+        if self.__next_access == math.inf: return
+
+        # 2. Store the object with its next access time
+        self.__push(fetched)
+        self._track(fetched)
 
         # 3. Trigger cache eviction if needed
-        while fetched.size <= self.maxsize < sum([obj for sublist in self._cache.values() for obj in sublist]):
-            max_key = max(self._cache.keys()) # Furthest access time
-            self._cache[max_key].pop(0) # Evict one element with furthest next access time
-            if len(self._cache[max_key]) == 0: del self._cache[max_key]
+        while fetched.size <= self.maxsize < self._used_bytes:
+            entry = heapq.heappop(self._cache) # Furthest access time
+            if self._entries.get(entry[2].index) is entry: self._remove(entry[2])
+
+    def _remove(self, obj: Obj):
+        del self._entries[obj.index]
+        self._untrack(obj)
 
     def _delete_expired(self, time: float):
         pass
 
-    def recv(self, time: float, es_id, obj: Obj) -> Status:
+    def __push(self, obj: Obj):
+        """Push a cached object in the heap with the next access time of the current request."""
+        entry = [-self.__next_access, next(self._seq), obj]
+        self._entries[obj.index] = entry
+        heapq.heappush(self._cache, entry)
+
+        # drop the outdated entries when they make up most of the heap
+        if len(self._cache) > 2 * len(self._entries) + 64:
+            self._cache = list(self._entries.values())
+            heapq.heapify(self._cache)
+
+    def recv(self, time: float, next_access: float, obj: Obj) -> Status:
         """
         Call this function to place a request to the cache.
 
         :param time: Time (epoch) of the object request.
+        :param next_access: Time (epoch) of the next request on the same object, math.inf if it is never requested again.
         :param obj: The object (Obj) requested.
-        :param es_id: id of the document referenced in ES
         :return: Request status (Status).
         """
-        if self.clock < time: self._es_ids.clear() # if clock moves forward since last time we can clear the IDs list because the ES queries only search the documents after the time of the clock
-        # update the internal clock
-        self.clock = time
-
-        # update the es list IDs with the coming document ID
-        self._es_ids.append(es_id)
-
-        # try to get the object from cache
-        stored = self._lookup(obj)
-        if stored is not None:
-            # HIT, "serv" object from cache
-            self.__log(stored, Status.HIT)
-            return Status.HIT
+        self.__next_access = next_access
+        return super().recv(time, obj)
 
-        # MISS: not in cache or expired --> just simulate fetch!
-        obj.fetched = True
-
-        # cache admission
-        if obj.cacheable and obj.size <= self.maxsize and self._admit(obj):
-
-            # store
-            obj.enter = self.clock
-            self._store(obj)
-
-            self.__log(obj, Status.MISS)
-            return Status.MISS
-
-        else:
-            self.__log(obj, Status.PASS)
-            return Status.PASS
+    def recv_batch(self, timestamps, paths, sizes, maxages, groups=None, obj_type=Obj, next_accesses=None) -> np.ndarray:
+        """
+        Place a batch of requests to the cache (see Cache.recv_batch), with the next access time of every request.
+        The requests go through recv, every decision depends on the next access time of its request.
 
-    def __log(self, obj, status: Status):
-        """Basic logging"""
-        if(self.__write_log):
-            self.__logger.warning(f"{self.clock} {status} {obj}")
+        :param next_accesses: Time (epoch) of the next request on the same object of every request, math.inf if it is never requested again (see next_access_times). Required.
+        """
+        if next_accesses is None:
+            raise TypeError("Clairvoyant.recv_batch() requires the next access time of every request: 'next_accesses' missing (see next_access_times)!")
+        assert len(next_accesses) == len(timestamps), f"One next access time per request: '{len(next_accesses)}' for '{len(timestamps)}' requests received!"
+        groups = [-1] * len(timestamps) if groups is None else np.asarray(groups).tolist()
+        requests = zip(np.asarray(timestamps).tolist(), np.asarray(next_accesses).tolist(), np.asarray(paths).tolist(), np.asarray(sizes).tolist(), np.asarray(maxages).tolist(), groups)
+        return np.array([self.recv(time, next_access, obj_type(path, size, maxage, group)).code for time, next_access, path, size, maxage, group in requests], dtype=np.uint8)
 
 
 
 class TestCaches(unittest.TestCase):
     def setUp(self):
         # define objects
-        self.x = Obj('x', 1000, 300)
-        self.a = Obj('a', 100, 300)
-        self.b = Obj('b', 100, 300)
-        self.c = Obj('c', 100, 300)
-        self.d = Obj('d', 30, 300)
+        self.x = CheckedObj('x', 1000, 300, -1)
+        self.a = CheckedObj('a', 100, 300, -1)
+        self.b = CheckedObj('b', 100, 300, -1)
+        self.c = CheckedObj('c', 100, 300, -1)
+        self.d = CheckedObj('d', 30, 300, -1)
+
+    def test_obj(self):
+        obj = Obj('a', 100, 300, -1)
+        self.assertFalse(hasattr(obj, '__dict__'))  # slots only
+        self.assertEqual((obj.size, obj.maxage, obj.cacheable), (100, 300, True))
+
+        # the checks are opt-in
+        self.assertRaises(AssertionError, lambda: self.a.size)  # not fetched yet
+        self.assertRaises(AssertionError, self.a.isexpired, 0)  # not in the cache
+        self.assertEqual(self.a.size_not_fetched, 100)
+        self.a.fetched = True
+        self.assertEqual(self.a.size, 100)
 
     def test_noncache(self):
         # create cache
@@ -554,6 +1027,36 @@ class TestCaches(unittest.TestCase):
         self.assertEqual(cache.recv(3, self.a), Status.HIT)  # 2nd request on a, must be HIT
         self.assertEqual(cache.recv(4, self.c), Status.MISS)  # MISS
 
+    def test_expiry(self):
+        # an object whose expiry is pushed back by a HIT is rescheduled when its first expiry time is reached
+        cache = FIFOCache(1000)
+        cache.recv(0, CheckedObj('a', 100, 10, -1))
+        self.assertEqual(cache.recv(5, CheckedObj('a', 100, 10, -1)), Status.HIT)  # a stays until 15
+        cache.recv(12, CheckedObj('b', 100, 300, -1))
+        self.assertIn('a', cache._index)
+        self.assertEqual(cache._expiry_entries['a'][0], 15)
+        cache.recv(16, CheckedObj('c', 100, 300, -1))
+        self.assertNotIn('a', cache._index)
+        self.assertEqual(cache._removed, 1)
+
+        # the entries of replaced and removed objects become stale and are dropped without removing anything
+        cache = LRUCache(1000)
+        cache.recv(0, CheckedObj('a', 100, 100, -1))
+        self.assertEqual(cache.recv(1, CheckedObj('a', 100, 5, -1)), Status.HIT)  # the new version expires earlier
+        self.assertEqual((len(cache._expiry), cache._expiry_entries['a'][0]), (2, 6))
+        cache.discard('a')
+        self.assertEqual((len(cache._expiry), len(cache._expiry_entries), cache._removed), (2, 0, 1))
+        cache.recv(200, CheckedObj('b', 100, 300, -1))
+        self.assertEqual([entry[2].index for entry in cache._expiry], ['b'])
+        self.assertEqual(cache._removed, 1)
+
+        # the stale entries of the evicted objects are compacted: the expiry index stays bounded
+        cache = FIFOCache(100)
+        for time in range(500):
+            self.assertEqual(cache.recv(time, CheckedObj(time, 100, 3600, -1)), Status.MISS)
+            self.assertLessEqual(len(cache._expiry), 2 * 2 + 64)  # two live entries while the new object is stored, before the eviction
+        self.assertEqual(cache._removed, 499)
+
     def test_protectedfifocache(self):
         # create cache
         cache = ProtectedFIFOCache(400)
@@ -565,4 +1068,167 @@ class TestCaches(unittest.TestCase):
         self.assertEqual(cache.recv(3, self.d), Status.MISS)  # MISS
         self.assertEqual(cache.recv(3.1, self.d), Status.HIT)  # 2nd request on a, must be HIT
         self.assertEqual(cache.recv(3.2, self.d), Status.HIT)  # 3rd request on a, must be HIT
-        self.assertEqual(cache.recv(1000, self.d), Status.MISS)  # expired, must be MISS
\ No newline at end of file
+        self.assertEqual(cache.recv(1000, self.d), Status.MISS)  # expired, must be MISS
+    def test_lrucache(self):
+        # create cache
+        cache = LRUCache(250)
+
+        # place requests
+        self.assertEqual(cache.recv(0, self.a), Status.MISS)  # MISS
+        self.assertEqual(cache.recv(1, self.b), Status.MISS)  # MISS
+        self.assertEqual(cache.recv(2, self.a), Status.HIT)  # a becomes the most recently used object
+        self.assertEqual(cache.recv(3, self.c), Status.MISS)  # MISS, b is evicted
+        self.assertEqual(cache.recv(4, self.a), Status.HIT)  # a is still in cache
+        self.assertEqual(cache.recv(5, self.b), Status.MISS)  # b was evicted
+        self.assertEqual(sorted(cache._index), ['a', 'b'])  # index follows the content of the cache
+        self.assertEqual(cache.used_bytes, 200)  # occupancy follows the content of the cache
+        self.assertEqual(cache.occupancy, 0.8)
+
+    def test_lfucache(self):
+        for history in (None, 0):
+            # create cache
+            cache = LFUCache(250, history=history)
+
+            # place requests
+            self.assertEqual(cache.recv(0, self.a), Status.MISS)  # MISS
+            self.assertEqual(cache.recv(1, self.a), Status.HIT)  # a requested twice
+            self.assertEqual(cache.recv(2, self.b), Status.MISS)  # MISS
+            self.assertEqual(cache.recv(3, self.c), Status.MISS)  # MISS, b is evicted (least recently used of frequency 1)
+            self.assertEqual(cache.recv(4, self.b), Status.MISS)  # MISS, c is evicted (frequency 1)
+            self.assertEqual(cache.recv(5, self.a), Status.HIT)  # a requested three times
+            self.assertEqual(cache.recv(6, self.c), Status.MISS)  # MISS, b is evicted (least recently used of the lowest frequency)
+            self.assertEqual(cache.recv(7, self.b), Status.MISS)  # MISS, c is evicted
+            self.assertEqual(cache.recv(8, self.a), Status.HIT)  # the most frequent object is never evicted
+            self.assertEqual(len(cache._history), 1 if history is None else 0)  # only c is remembered, without limit
+
+    def test_lsocache(self):
+        # create cache
+        cache = LSOCache(300)
+
+        # place requests
+        self.assertEqual(cache.recv(0, self.a), Status.MISS)  # MISS
+        self.assertEqual(cache.recv(1, self.b), Status.MISS)  # MISS
+        self.assertEqual(cache.recv(2, self.d), Status.MISS)  # MISS
+        self.assertEqual(cache.recv(3, CheckedObj('e', 80, 300, -1)), Status.MISS)  # MISS, b is evicted (biggest, more recent than a)
+        self.assertEqual(sorted(cache._index), ['a', 'd', 'e'])
+        self.assertEqual(cache.recv(4, self.a), Status.HIT)  # a is still in cache
+        self.assertEqual(cache.recv(5, CheckedObj('f', 120, 300, -1)), Status.MISS)  # MISS, f is the biggest and evicted right away
+        self.assertEqual((sorted(cache._index), cache.used_bytes), (['a', 'd', 'e'], 210))
+        self.assertIs(cache._victim(), cache._index['a'])
+
+        # the heap entries of the objects removed otherwise are dropped lazily, and compacted
+        for i in range(500):
+            cache.recv(6 + i / 1000, CheckedObj(i, 10, 300, -1))
+            cache.discard(i)
+            self.assertLessEqual(len(cache._cache), 2 * (len(cache._entries) + 1) + 64)
+        self.assertEqual(sorted(cache._index), ['a', 'd', 'e'])
+        self.assertIs(cache._victim(), cache._index['a'])
+
+    def test_ssocache(self):
+        # create cache
+        cache = SSOCache(250)
+
+        # place requests
+        self.assertEqual(cache.recv(0, self.a), Status.MISS)  # MISS
+        self.assertEqual(cache.recv(1, self.b), Status.MISS)  # MISS
+        self.assertEqual(cache.recv(2, self.c), Status.MISS)  # MISS, a is evicted (smallest, stored before b and c)
+        self.assertEqual(sorted(cache._index), ['b', 'c'])
+        self.assertEqual(cache.recv(3, self.d), Status.MISS)  # MISS, fits in the free space
+        self.assertEqual(cache.recv(4, CheckedObj('e', 40, 300, -1)), Status.MISS)  # MISS, d is evicted (smallest)
+        self.assertEqual((sorted(cache._index), cache.used_bytes), (['b', 'c', 'e'], 240))
+        self.assertIs(cache._victim(), cache._index['e'])
+
+        # the heap entries of the objects removed otherwise are dropped lazily, and compacted
+        for i in range(500):
+            cache.recv(5 + i / 1000, CheckedObj(i, 5, 300, -1))
+            cache.discard(i)
+            self.assertLessEqual(len(cache._cache), 2 * (len(cache._entries) + 1) + 64)
+        self.assertEqual(sorted(cache._index), ['b', 'c', 'e'])
+        self.assertIs(cache._victim(), cache._index['e'])
+
+    def test_rancache(self):
+        # two caches with the same seed take the same random decisions
+        statuses = []
+        for cache in (RANCache(200, seed=42), RANCache(200, seed=42)):
+            statuses.append([cache.recv(time, CheckedObj(time % 30, 10 + time % 7, 300, -1)) for time in range(300)])
+            self.assertEqual(sorted(cache._positions.values()), list(range(len(cache._cache))))  # positions stay consistent
+            self.assertLessEqual(cache.used_bytes, 200)
+        self.assertEqual(statuses[0], statuses[1])
+        self.assertIn(Status.HIT, statuses[0])
+
+    def test_clairvoyant(self):
+        # create cache (ten objects of size 100 fill the cache)
+        cache = Clairvoyant(1000, write_log=False)
+        paths = list(range(10)) + [10] + list(range(9)) + [10, 9]
+        next_accesses = next_access_times(range(len(paths)), paths)
+
+        # place requests
+        statuses = [cache.recv(time, next_accesses[time], CheckedObj(path, 100, 300, -1)) for time, path in enumerate(paths)]
+        self.assertEqual(statuses[:11], [Status.MISS] * 11)  # 10 evicts 9, requested the furthest in the future
+        self.assertEqual(statuses[11:21], [Status.HIT] * 10)
+        self.assertEqual(statuses[21], Status.MISS)
+        self.assertEqual(len(cache._index), 0)  # objects never requested again are not kept
+
+        # the batches take the same decisions, with the signature of Cache.recv_batch and the next access times in keyword
+        cache = Clairvoyant(1000, write_log=False)
+        codes = cache.recv_batch(list(range(len(paths))), paths, [100] * len(paths), [300] * len(paths), next_accesses=next_accesses, obj_type=CheckedObj)
+        self.assertEqual(codes.tolist(), status_codes(statuses).tolist())
+        self.assertRaises(TypeError, cache.recv_batch, [30], [0], [100], [300])
+
+    def test_recv_batch(self):
+        # the batches of requests take the same decisions as the requests placed one by one (objects of size 100, one not cacheable, maxage 300 and 10)
+        timestamps = [time * 3.0 for time in range(300)]
+        paths = [(time * 7) % 23 for time in range(300)]
+        sizes = [100] * 300
+        maxages = [0 if path == 22 else 10 if path % 2 else 300 for path in paths]
+        for cache_type in (FIFOCache, ProtectedFIFOCache, LRUCache, ProtectedLRUCache, LFUCache, SSOCache):
+            reference, cache = cache_type(800), cache_type(800)
+            statuses = [reference.recv(time, CheckedObj(path, 100, maxage, -1)) for time, path, maxage in zip(timestamps, paths, maxages)]
+            codes = np.concatenate([cache.recv_batch(timestamps[start:start + 64], paths[start:start + 64], sizes[start:start + 64], maxages[start:start + 64], obj_type=CheckedObj) for start in range(0, 300, 64)])
+            self.assertEqual(codes.tolist(), status_codes(statuses).tolist(), cache_type.__name__)
+            self.assertEqual((cache.used_bytes, sorted(cache._index)), (reference.used_bytes, sorted(reference._index)))
+        self.assertEqual(len(LRUCache(800).recv_batch([], [], [], [])), 0)
+
+    def test_admission(self):
+        from cachesim.admission import TinyLFU
+        # the victim is the next object evicted by the cache model
+        for cache_type in (FIFOCache, LRUCache, LFUCache, LSOCache, SSOCache):
+            cache = cache_type(500)
+            for time, (path, size) in enumerate([(0, 100), (1, 50), (2, 200), (0, 100), (3, 150), (1, 50)]):
+                cache.recv(time, CheckedObj(path, size, 300, -1))
+            victim = cache._victim()
+            cache.recv(10, CheckedObj(9, 100, 300, -1))
+            self.assertNotIn(victim.index, cache._index, cache_type.__name__)
+
+        # ten popular objects requested between objects requested once: the filter keeps the one-hit wonders out
+        requests = [(time, CheckedObj(time // 2 % 10 if time % 2 else 1000 + time, 100, 3600, -1)) for time in range(2000)]
+        statuses = {}
+        for admission in (None, TinyLFU(capacity=16)):
+            cache = ProtectedLRUCache(1000)
+            cache.set_admission(admission)
+            statuses[admission is None] = [cache.recv(time, obj) for time, obj in requests]
+        self.assertGreater(statuses[False].count(Status.HIT), statuses[True].count(Status.HIT) + 800)
+        self.assertEqual(cache.recv_batch([3000], [0], [100], [3600]).tolist(), [Status.HIT.code])  # the batches go through the filter too
+        self.assertIs(cache.set_admission(None), admission)
+
+    def test_profiling(self):
+        import pickle
+        # same requests with and without profiling: objects of size 100 (one not cacheable), maxage 300 and 10
+        requests = [(time * 7.0, CheckedObj(path % 13, 100, 0 if path % 13 == 12 else 10 if path % 2 else 300, -1)) for time, path in enumerate(range(0, 400, 3))]
+        reference = LRUCache(500)
+        cache = LRUCache(500)
+        profile = cache.enable_profiling()
+        statuses = [cache.recv(time, obj) for time, obj in requests]
+        self.assertEqual(statuses, [reference.recv(time, CheckedObj(obj.index, obj.size, obj.maxage, obj.group)) for time, obj in requests])
+
+        snapshot = pickle.loads(pickle.dumps(cache)).profiling.snapshot(cache)
+        phases = snapshot["phases"]
+        self.assertEqual((snapshot["policy"], snapshot["maxsize"], snapshot["requests"]), ("LRUCache", 500, len(requests)))
+        self.assertEqual(phases["lookup"]["calls"], len(requests))
+        self.assertEqual(phases["store"]["calls"] + phases["evict"]["calls"], statuses.count(Status.MISS))
+        self.assertEqual(sum(phases["lookup"]["histogram"]), len(requests))
+        self.assertGreater(snapshot["evictions"], 0)
+        self.assertGreater(snapshot["expirations"], 0)
+        self.assertEqual(snapshot["evictions"] + snapshot["expirations"], cache._removed)
+        self.assertIs(cache.disable_profiling(), profile)
+        self.assertIsNone(cache.profiling)
@@ -0,0 +1,35 @@
+import os
+import pickle
+
+# version of the checkpoint files, changed when their content is not compatible anymore
+CHECKPOINT_VERSION = 3
+
+
+def save_checkpoint(file_name: str, checkpoint: dict):
+    """
+    Write a checkpoint of a simulation on the disk. The file is replaced atomically: a crash while writing leaves the
+    previous checkpoint.
+
+    :param file_name: Name of the checkpoint file.
+    :param checkpoint: State of the simulation (for example the caches, the state of the analyzers and the cursor of the source of the logs), picklable.
+    """
+    temporary = file_name + ".tmp"
+    with open(temporary, 'wb') as f:
+        pickle.dump(dict(checkpoint, version=CHECKPOINT_VERSION), f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, file_name)
+
+
+def load_checkpoint(file_name: str) -> dict:
+    """
+    Read a checkpoint written by save_checkpoint.
+
+    :param file_name: Name of the checkpoint file.
+    :return: State of the simulation, None if there is no checkpoint.
+    """
+    if not os.path.exists(file_name): return None
+    with open(file_name, 'rb') as f:
+        checkpoint = pickle.load(f)
+    assert checkpoint.get("version") == CHECKPOINT_VERSION, f"The checkpoint {file_name} was written by an incompatible version."
+    return checkpoint
@@ -0,0 +1,235 @@
+import contextlib
+import json
+import multiprocessing
+import threading
+import time
+import unittest
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# counters of every stage of the pipeline: batches and documents handled, bytes of these batches, time blocked
+# receiving the batches from the previous stage, time blocked sending them to the next one (seconds), time (epoch)
+# at which the stage finished (0 while it runs)
+FIELDS = ("batches", "documents", "bytes", "recv_seconds", "send_seconds", "finished")
+
+
+class StageMetrics:
+    """
+    Counters of a stage of the pipeline (see FIELDS), updated by the process running the stage and read by the process
+    coordinating the pipeline (see PipelineMetrics). Every stage is updated by a single process: no lock is needed.
+    """
+
+    def __init__(self, values=None, offset=0):
+        """
+        :param values: shared array holding the counters of every stage (see PipelineMetrics), None for counters private to the process (metrics not collected)
+        :param offset: position of the counters of the stage in the array
+        """
+        self.__values = values if values is not None else [0.0] * len(FIELDS)
+        self.__offset = offset
+
+    def add(self, batches=0, documents=0, nbytes=0):
+        """
+        Account for the batches handled by the stage.
+
+        :param batches: number of batches
+        :param documents: number of documents (logs) of the batches
+        :param nbytes: size of the batches (bytes)
+        """
+        self.__values[self.__offset] += batches
+        self.__values[self.__offset + 1] += documents
+        self.__values[self.__offset + 2] += nbytes
+
+    @contextlib.contextmanager
+    def blocked(self, direction: str):
+        """
+        Context in which the stage is blocked, waiting for the previous stage ("recv") or for the next one ("send").
+
+        :param direction: "recv" or "send"
+        """
+        field = self.__offset + (3 if direction == "recv" else 4)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.__values[field] += time.perf_counter() - start
+
+    def finish(self):
+        """Mark the stage as finished (the stage is not busy anymore)."""
+        self.__values[self.__offset + 5] = time.time()
+
+    def values(self) -> dict:
+        """Counters of the stage (key: field, see FIELDS)."""
+        return dict(zip(FIELDS, self.__values[self.__offset:self.__offset + len(FIELDS)]))
+
+
+class PipelineMetrics:
+    """
+    Metrics of the stages of a pipeline (for example fetch -> simulation -> analyzers): the counters are placed in
+    shared memory before the processes are created, every process updates the counters of its stage (see stage) and the
+    coordinating process takes snapshots of the whole pipeline.
+    """
+
+    def __init__(self, stages: dict):
+        """
+        :param stages: key: name of the stage, value: name of the previous stage (whose batches it receives), None for the first stage
+        """
+        self.__stages = dict(stages)
+        self.__values = multiprocessing.RawArray('d', len(FIELDS) * len(self.__stages))
+        self.__start = time.time()
+
+    def stage(self, name: str) -> StageMetrics:
+        """Counters of a stage, given to the process running it."""
+        return StageMetrics(self.__values, list(self.__stages).index(name) * len(FIELDS))
+
+    def snapshot(self, previous=None) -> dict:
+        """
+        State of the pipeline: for every stage its counters (see FIELDS) and
+            - documents_per_second, bytes_per_second: throughput since the start (or since the previous snapshot)
+            - busy: share of the time running and not blocked on the other stages (the stage with the highest is the bottleneck)
+            - backlog, backlog_bytes: batches sent by the previous stage and not received yet (size estimated from the mean size of the batches), None for the first stage
+
+        :param previous: previous snapshot, to compute the throughput over the interval since this snapshot
+        """
+        now = time.time()
+        stages = {name: self.stage(name).values() for name in self.__stages}
+        since = previous["time"] if previous is not None else self.__start
+        interval = now - since
+        for name, values in stages.items():
+            before = previous["stages"][name] if previous is not None else dict.fromkeys(FIELDS, 0.0)
+            values["documents_per_second"] = (values["documents"] - before["documents"]) / interval if interval > 0 else 0.0
+            values["bytes_per_second"] = (values["bytes"] - before["bytes"]) / interval if interval > 0 else 0.0
+            blocked = values["recv_seconds"] + values["send_seconds"] - before["recv_seconds"] - before["send_seconds"]
+            running = max(0.0, min(values["finished"] or now, now) - since)
+            values["busy"] = max(0.0, running - blocked) / interval if interval > 0 else 0.0
+            upstream = stages.get(self.__stages[name])
+            if upstream is None:
+                values["backlog"], values["backlog_bytes"] = None, None
+            else:
+                values["backlog"] = max(0, upstream["batches"] - values["batches"])
+                values["backlog_bytes"] = values["backlog"] * upstream["bytes"] / upstream["batches"] if upstream["batches"] else 0.0
+        return {"time": now, "elapsed": now - self.__start, "stages": stages}
+
+
+class MetricsReporter:
+    """
+    Thread writing snapshots of the metrics of a pipeline periodically on the disk (one JSON object per line), and
+    optionally serving the last snapshot on a local HTTP endpoint (GET returns the JSON snapshot).
+    """
+
+    def __init__(self, metrics: PipelineMetrics, file_name="metrics", interval=60, port=None):
+        """
+        :param metrics: metrics of the pipeline
+        :param file_name: name of the file where the snapshots are written (./results/<file_name>.jsonl), None to only serve them
+        :param interval: time between two snapshots (in seconds)
+        :param port: port of the HTTP endpoint (on localhost), None for no endpoint
+        """
+        self.__metrics = metrics
+        self.__file_name = file_name
+        self.__interval = interval
+        self.__last = metrics.snapshot()
+        self.__stop = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__server = None
+        if port is not None:
+            reporter = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    body = json.dumps(reporter.last).encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            self.__server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+    @property
+    def last(self) -> dict:
+        """Last snapshot taken."""
+        return self.__last
+
+    @property
+    def port(self) -> int:
+        """Port of the HTTP endpoint (useful when created with port 0), None if there is no endpoint."""
+        return None if self.__server is None else self.__server.server_address[1]
+
+    def start(self):
+        """Start taking snapshots (and serving them)."""
+        self.__thread.start()
+        if self.__server is not None:
+            threading.Thread(target=self.__server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        """Take a last snapshot and stop."""
+        self.__stop.set()
+        self.__thread.join()
+        self.__report()
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+
+    def __run(self):
+        while not self.__stop.wait(self.__interval):
+            self.__report()
+
+    def __report(self):
+        """Take a snapshot (throughput over the interval since the last one) and write it."""
+        self.__last = self.__metrics.snapshot(self.__last)
+        if self.__file_name is not None:
+            with open("./results/" + self.__file_name + ".jsonl", 'a', encoding='utf-8') as f:
+                f.write(json.dumps(self.__last) + "\n")
+
+
+def run_stage(stage: StageMetrics, target, *args):
+    """
+    Run the function of a stage (in its process) with its metrics (metrics keyword argument), the stage is marked as
+    finished when the function returns.
+    """
+    try:
+        return target(*args, metrics=stage)
+    finally:
+        stage.finish()
+
+
+# helper of TestMetrics, target of a process: it must stay a module level function (picklable, importable from cachesim.metrics)
+def _metered_stage(q, stage: StageMetrics, batches: int):
+    """Test stage: receive batches of 10 documents (8 bytes each) from a pipe and account for them."""
+    for _ in range(batches):
+        with stage.blocked("recv"):
+            q.recv()
+        stage.add(1, 10, 80)
+    stage.finish()
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_pipeline(self):
+        metrics = PipelineMetrics({"source": None, "sink": "source"})
+        source = metrics.stage("source")
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=_metered_stage, args=(receiver, metrics.stage("sink"), 3))
+        process.start()
+        reporter = MetricsReporter(metrics, None, interval=0.05, port=0)
+        reporter.start()
+        for _ in range(5):
+            with source.blocked("send"):
+                sender.send(list(range(10)))
+            source.add(1, 10, 80)
+        process.join(10)
+
+        snapshot = metrics.snapshot()
+        self.assertEqual({field: snapshot["stages"]["sink"][field] for field in ("batches", "documents", "bytes")}, {"batches": 3, "documents": 30, "bytes": 240})
+        self.assertEqual(snapshot["stages"]["sink"]["backlog"], 2)  # sent by the source, never received
+        self.assertEqual(snapshot["stages"]["sink"]["backlog_bytes"], 160)
+        self.assertIsNone(snapshot["stages"]["source"]["backlog"])
+        self.assertGreater(snapshot["stages"]["sink"]["recv_seconds"], 0)
+        self.assertGreater(snapshot["stages"]["sink"]["finished"], 0)
+        self.assertEqual(snapshot["stages"]["source"]["finished"], 0)
+        time.sleep(0.1)
+        with urllib.request.urlopen(f"http://127.0.0.1:{reporter.port}/") as response:
+            self.assertEqual(json.load(response)["stages"]["source"]["documents"], 50)
+        reporter.stop()
@@ -1,4 +1,11 @@
 class Obj:
+    """
+    Object requested to a cache. The fields are plain slots (no per-instance __dict__ and no property on the request
+    path), see CheckedObj for checking the invariants of the objects.
+    """
+
+    __slots__ = ("index", "size", "maxage", "group", "enter", "fetched")
+
     def __init__(self, index, size: int, maxage: int, group: int):
         """
         :param index: Uniq identifier of the object (hash key).
@@ -6,60 +13,25 @@ class Obj:
         :param maxage: Maximum caching time, if non positive, not cacheable.
         :param group: Group the object belongs to (for example movie identifier).
         """
-        self._index = index
-        self._size = size
-        self._maxage = maxage
-        self._group = group
+        self.index = index
+        self.size = size
+        self.maxage = maxage
+        self.group = group
 
-        self._enter = None  # time at the object entered the cache
-        self._fetched = False  # object retrieved from origin
-
-    @property
-    def index(self):
-        return self._index
-
-    @property
-    def size(self) -> int:
-        assert self.fetched, f"This property should not be known before object fetch!"
-        return self._size
-
-    @property
-    def maxage(self) -> int:
-        assert self.fetched, f"This property should not be known before object fetch!"
-        return self._maxage
+        self.enter = None  # time at the object entered the cache
+        self.fetched = False  # object retrieved from origin
 
     @property
     def size_not_fetched(self) -> int:
-        return self._size
-
-    @property
-    def group(self):
-        return self._group
+        return self.size
 
     @property
     def cacheable(self) -> bool:
         return self.maxage > 0
 
-    @property
-    def enter(self) -> float:
-        return self._enter
-
-    @enter.setter
-    def enter(self, time: float):
-        self._enter = time
-
     def isexpired(self, now: float) -> bool:
-        assert self.enter is not None, f"Object must first enter the cache to determine if it is expired."
         return self.enter + self.maxage < now
 
-    @property
-    def fetched(self) -> bool:
-        return self._fetched
-
-    @fetched.setter
-    def fetched(self, val: bool):
-        self._fetched = val
-
     def __add__(self, other):
         """For sum() function"""
         assert isinstance(other, Obj), f"Operator add has been implemented only for Obj type."
@@ -80,4 +52,39 @@ class Obj:
         return self.index == other.index
 
     def __str__(self):
-        return f"{self.index} {self._size}"
+        return f"{self.index} {self.size_not_fetched}"
+
+
+class CheckedObj(Obj):
+    """
+    Obj checking its invariants (debug, slower): size and maxage are not known before the object is fetched and the
+    expiration requires the time the object entered the cache.
+    """
+
+    __slots__ = ("_size", "_maxage")
+
+    @property
+    def size(self) -> int:
+        assert self.fetched, f"This property should not be known before object fetch!"
+        return self._size
+
+    @size.setter
+    def size(self, size: int):
+        self._size = size
+
+    @property
+    def maxage(self) -> int:
+        assert self.fetched, f"This property should not be known before object fetch!"
+        return self._maxage
+
+    @maxage.setter
+    def maxage(self, maxage: int):
+        self._maxage = maxage
+
+    @property
+    def size_not_fetched(self) -> int:
+        return self._size
+
+    def isexpired(self, now: float) -> bool:
+        assert self.enter is not None, f"Object must first enter the cache to determine if it is expired."
+        return super().isexpired(now)
@@ -0,0 +1,48 @@
+# phases of a request to a cache (see Cache.recv): deletion of the expired objects, lookup, admission, store of an
+# object without eviction, store of an object evicting other objects
+PHASES = ("expire", "lookup", "admit", "store", "evict")
+
+# number of buckets of the histograms of the durations (powers of 2 nanoseconds, the last bucket holds the longer calls)
+HISTOGRAM_BUCKETS = 40
+
+
+class CacheProfile:
+    """
+    Profile of the requests to a cache (see Cache.enable_profiling): number of calls, cumulated time and histogram of
+    the durations of every phase of the requests, and number of objects evicted, expired or removed otherwise (for
+    example dropped by the clairvoyant cache). Plain data, pickled with the cache.
+    """
+
+    def __init__(self):
+        self.requests = 0  # number of requests profiled
+        self.evictions = 0  # objects evicted to store another one
+        self.expirations = 0  # objects expired
+        self.removals = 0  # objects removed during the lookup
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.nanoseconds = dict.fromkeys(PHASES, 0)
+        self.histograms = {phase: [0] * HISTOGRAM_BUCKETS for phase in PHASES}  # bucket i: calls lasting less than 2^i ns (and at least 2^(i-1) ns)
+
+    def add(self, phase: str, nanoseconds: int):
+        """
+        Account for a call of a phase.
+
+        :param phase: Phase (see PHASES).
+        :param nanoseconds: Duration of the call.
+        """
+        self.calls[phase] += 1
+        self.nanoseconds[phase] += nanoseconds
+        self.histograms[phase][min(nanoseconds.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def snapshot(self, cache=None) -> dict:
+        """
+        Copy of the profile, made of JSON types.
+
+        :param cache: Cache profiled, to name its policy and size in the snapshot.
+        :return: requests, evictions, expirations, removals and for every phase the calls, seconds, mean duration (ns) and histogram (see histograms).
+        """
+        snapshot = {} if cache is None else {"policy": type(cache).__name__, "maxsize": cache.maxsize}
+        snapshot.update(requests=self.requests, evictions=self.evictions, expirations=self.expirations, removals=self.removals,
+                        phases={phase: {"calls": self.calls[phase], "seconds": self.nanoseconds[phase] / 1e9,
+                                        "mean_ns": self.nanoseconds[phase] / self.calls[phase] if self.calls[phase] else None,
+                                        "histogram": list(self.histograms[phase])} for phase in PHASES})
+        return snapshot
@@ -0,0 +1,194 @@
+import csv
+import heapq
+import numpy as np
+import unittest
+from cachesim import Obj, Status
+from cachesim.trace import TraceBatch
+
+# the objects are sampled by the value of a hash of their identifier, between 0 and HASH_MODULUS
+HASH_BITS = 24
+HASH_MODULUS = 1 << HASH_BITS
+
+
+def spatial_hash(paths: np.ndarray) -> np.ndarray:
+    """
+    Hash of the identifiers of the objects (splitmix64 finalizer, reduced to HASH_BITS bits): every request on the
+    same object has the same hash, and the hashes are uniformly distributed.
+
+    :param paths: Identifiers of the objects (integers).
+    """
+    with np.errstate(over='ignore'):
+        x = paths.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(64 - HASH_BITS)).astype(np.int64)
+
+
+class SpatialSampler:
+    """
+    Simulation of caches on a spatial sample of the requests (SHARDS): only the objects whose hash is below a threshold
+    are replayed, on caches scaled down by the sampling rate. The cache hit ratio of the sample estimates the one of the
+    whole trace; its standard error is estimated from the hit ratios of strata of the sample (by hash).
+
+    The number of requests sampled differs from the expected one (requests x rate) when a few popular objects are in
+    the sample or out of it, which biases the hit ratio (downwards on Zipf traces, by 10 points and more). The estimate
+    is adjusted as in SHARDS-adj (Waldspurger et al.): the difference between the expected and the sampled number of
+    requests is counted as hits (the popular objects missing or in excess are the ones hit the most).
+
+    With max_objects, the threshold is lowered each time the sample holds too many objects (the objects with the
+    highest hashes leave the sample and the caches), so that the memory used stays bounded whatever the trace.
+
+    The sizes of the objects are not scaled: the estimates are only reliable when the scaled caches still hold many
+    objects (they are biased downwards otherwise, which the standard error does not account for).
+    """
+
+    def __init__(self, caches: list, rate=0.01, max_objects=None, strata=16):
+        """
+        :param caches: Caches simulated (their size is the one of the cache simulated on the whole trace, it is scaled by the sampler).
+        :param rate: Initial sampling rate (share of the objects replayed).
+        :param max_objects: Maximum number of objects in the sample, None for a fixed sampling rate.
+        :param strata: Number of strata of the sample used to estimate the standard error.
+        """
+        assert 0 < rate <= 1, f"The sampling rate must be in ]0, 1]: '{rate}' received!"
+        self.__caches = caches
+        self.__maxsizes = [cache.maxsize for cache in caches]
+        self.__threshold = int(rate * HASH_MODULUS)  # requests on objects with a hash below the threshold are replayed
+        self.__max_objects = max_objects
+        self.__objects = {}  # key: Obj.index, value: hash of the objects sampled (only with max_objects)
+        self.__highest = []  # max-heap of [-hash, index] of the objects sampled (only with max_objects)
+        self.__strata = strata
+        self.__counts = np.zeros((len(caches), strata, 3), dtype=np.int64)  # number of HIT, MISS and PASS of every cache in every stratum
+        self.__requests = 0  # number of requests received (sampled or not)
+        self.__expected = 0.0  # expected number of requests sampled: sum of the sampling rates when the requests are received
+        self.__resize()
+
+    @property
+    def rate(self) -> float:
+        """Current sampling rate."""
+        return self.__threshold / HASH_MODULUS
+
+    @property
+    def caches(self) -> list:
+        return self.__caches
+
+    def __resize(self):
+        """Scale the caches to the sampling rate."""
+        for cache, maxsize in zip(self.__caches, self.__maxsizes):
+            cache.maxsize = max(1, round(maxsize * self.rate))
+
+    def __add(self, index, hashed: int):
+        """Add an object to the sample, lower the threshold if the sample holds too many objects."""
+        if index in self.__objects: return
+        self.__objects[index] = hashed
+        heapq.heappush(self.__highest, [-hashed, index])
+        while len(self.__objects) > self.__max_objects:
+            # the objects with the highest hash leave the sample
+            self.__threshold = -self.__highest[0][0]
+            while self.__highest and -self.__highest[0][0] >= self.__threshold:
+                _, removed = heapq.heappop(self.__highest)
+                del self.__objects[removed]
+                for cache in self.__caches:
+                    cache.discard(removed)
+            self.__resize()
+
+    def simulate(self, batch: TraceBatch, default_maxage: int, obj_type=Obj) -> list:
+        """
+        Replay the requests of a batch sampled on the caches.
+
+        :param batch: Requests.
+        :param default_maxage: Default maxage used if not indicated in the logs.
+        :param obj_type: Type of the objects replayed (Obj or CheckedObj).
+        :return: For every cache, the status codes of the requests sampled (see Status.code), their groups and their sizes (the groups and sizes are shared by the caches).
+        """
+        self.__requests += len(batch)
+        hashes = spatial_hash(batch.path)
+        rows = np.flatnonzero(hashes < self.__threshold)
+        codes = [[] for _ in self.__caches]
+        replayed = []  # requests replayed (the threshold can be lowered during the batch)
+        position = 0  # requests counted in the expected number of requests sampled, at the rate in force when they are received
+        for row, timestamp, path, size, maxage, group, hashed in zip(rows.tolist(), batch.timestamp[rows].tolist(), batch.path[rows].tolist(), batch.size[rows].tolist(), batch.maxages(default_maxage)[rows].tolist(), batch.livechannel[rows].tolist(), hashes[rows].tolist()):
+            if self.__max_objects is not None:
+                self.__expected += (row - position) * self.rate
+                position = row
+                if hashed >= self.__threshold: continue  # threshold lowered since the batch was filtered
+                self.__add(path, hashed)
+                if hashed >= self.__threshold: continue  # the object itself left the sample
+            stratum = hashed % self.__strata
+            replayed.append(row)
+            for counts, cache, cache_codes in zip(self.__counts, self.__caches, codes):
+                code = cache.recv(timestamp, obj_type(path, size, maxage, group)).code
+                counts[stratum, code] += 1
+                cache_codes.append(code)
+        self.__expected += (len(batch) - position) * self.rate
+        groups, sizes = batch.livechannel[replayed], batch.size[replayed]
+        return [[np.array(cache_codes, dtype=np.uint8), groups, sizes] for cache_codes in codes]
+
+    def estimates(self) -> list:
+        """
+        Estimated cache hit ratio of every cache on the whole trace, adjusted for the difference between the expected
+        and the sampled number of requests (see SpatialSampler). The standard error is the one of the adjusted hit
+        ratios of the strata, it accounts for the variations of the number of requests sampled.
+
+        :return: For every cache, [size, size simulated, sampling rate, requests sampled, hit, miss, pass, CHR, standard error of the CHR, requests expected, CHR of the sample without adjustment] (CHR in %).
+        """
+        estimates = []
+        for maxsize, cache, counts in zip(self.__maxsizes, self.__caches, self.__counts):
+            hit, miss, pass_ = counts.sum(axis=0).tolist()
+            total = hit + miss + pass_
+            adjusted = min(1.0, max(0.0, (hit + self.__expected - total) / self.__expected)) if self.__expected > 0 else float('nan')
+            strata_chr = (counts[:, 0] + self.__expected / self.__strata - counts.sum(axis=1)) / (self.__expected / self.__strata) if self.__expected > 0 else np.zeros(0)
+            stderr = np.clip(strata_chr, 0, 1).std(ddof=1) / np.sqrt(len(strata_chr)) if len(strata_chr) > 1 else float('nan')
+            estimates.append([maxsize, cache.maxsize, self.rate, total, hit, miss, pass_, adjusted * 100, stderr * 100, self.__expected, hit / total * 100 if total else float('nan')])
+        return estimates
+
+    def write_estimates(self, file_name="CHR_sampled"):
+        """
+        Write the estimated cache hit ratios on the disk.
+
+        :param file_name: Name of the file where the estimates should be written.
+        """
+        with open("./results/" + file_name + ".csv", 'w', encoding='utf-8') as f:
+            csv_writer = csv.writer(f)
+            csv_writer.writerow(['Cache', 'Size', 'Sampled_size', 'Rate', 'Total', 'Hit', 'Miss', 'Pass', 'CHR', 'CHR_stderr', 'Expected', 'CHR_unadjusted'])
+            for cache, estimate in zip(self.__caches, self.estimates()):
+                csv_writer.writerow([cache.__class__.__name__] + estimate)
+
+
+class TestSpatialSampler(unittest.TestCase):
+
+    def batch(self, requests=20000, objects=5000, seed=0):
+        generator = np.random.default_rng(seed)
+        paths = generator.zipf(1.2, requests) % objects
+        return TraceBatch.from_columns({"timestamp": np.arange(requests, dtype=np.float64), "path": paths, "size": 1 + paths % 50,
+                                        "maxage": np.full(requests, 10 ** 6), "livechannel": np.full(requests, -1)})
+
+    def test_sampling(self):
+        from cachesim import LRUCache
+        batch = self.batch()
+        sampler = SpatialSampler([LRUCache(20000)], rate=0.1)
+        self.assertEqual(sampler.caches[0].maxsize, 2000)
+        codes, groups, sizes = sampler.simulate(batch, 300)[0]
+        self.assertTrue(0.05 < len(codes) / len(batch) < 0.4)
+        self.assertEqual(len(codes), len(sizes))  # requests on ~10% of the objects (popular objects weigh more)
+
+        # the estimate is close to the hit ratio of the whole trace (same columns as the sampler)
+        cache = LRUCache(20000)
+        codes = cache.recv_batch(batch.timestamp, batch.path, batch.size, batch.maxages(300), batch.livechannel)
+        chr_ = np.count_nonzero(codes == Status.HIT.code) / len(batch) * 100
+        estimate = sampler.estimates()[0]
+        self.assertAlmostEqual(estimate[9], len(batch) * sampler.rate)
+        self.assertLess(abs(estimate[7] - chr_), 5)
+        self.assertGreater(chr_ - estimate[10], 10)  # without adjustment, the popular objects out of the sample bias the estimate
+
+    def test_max_objects(self):
+        from cachesim import FIFOCache
+        batch = self.batch()
+        sampler = SpatialSampler([FIFOCache(100000)], rate=1, max_objects=100)
+        sampler.simulate(batch, 300)
+        self.assertLess(sampler.rate, 0.1)
+        self.assertEqual(sampler.caches[0].maxsize, round(100000 * sampler.rate))
+        paths = np.unique(batch.path)
+        sampled = set(paths[spatial_hash(paths) < sampler.rate * HASH_MODULUS].tolist())
+        self.assertLessEqual(len(sampled), 100)
+        self.assertTrue(set(sampler.caches[0]._index) <= sampled)  # objects out of the sample were removed from the cache
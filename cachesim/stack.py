@@ -0,0 +1,194 @@
+import csv
+import heapq
+import math
+import numpy as np
+import unittest
+from cachesim import Obj, Status
+from cachesim.obj import CheckedObj
+
+
+class LRUStackSimulator:
+    """
+    Simulation of LRU caches of every size in a single pass over the requests. Thanks to the inclusion property of LRU,
+    a request is a HIT in every cache larger than its byte-weighted stack distance: the total size of the objects
+    requested since the last request on the same object (this object included), counting each object once. The stack
+    is stored in a Fenwick tree indexed by the time (sequence number) of the last request on every object.
+
+    The result is exactly the one of LRUCache when the objects keep the same size, fit in every cache simulated and do
+    not expire between two requests. Otherwise, it is an approximation: an object too big for a cache or expired still
+    counts in the stack distance of the objects it was requested after.
+    """
+
+    def __init__(self, maxsizes: list, precision=0.01):
+        """
+        :param maxsizes: Sizes of the caches for which the status of every request is returned (see simulate).
+        :param precision: Relative step between two sizes of the miss ratio curve (see miss_ratio_curve).
+        """
+        self.__maxsizes = list(maxsizes)
+
+        self.__tree = [0] * 1024  # Fenwick tree of the sizes of the objects, indexed by the sequence number of their last request
+        self.__sizes = [0] * 1024  # size of the object requested for every sequence number (0 if not the last request of the object anymore)
+        self.__total = 0  # total size of the objects in the stack
+        self.__seq = 0  # sequence number of the next request
+        self.__last = {}  # key: Obj.index, value: sequence number of the last request on the object
+        self.__expiry = []  # min-heap of [expire, seq, index], entries not matching __last are stale
+
+        # miss ratio curve: histograms of the requests by size of the smallest cache in which they are a HIT, or fit
+        self.__edges = np.unique(np.ceil((1 + precision) ** np.arange(0, math.log(2 ** 50, 1 + precision) + 1)))
+        self.__hits = np.zeros(len(self.__edges) + 1, dtype=np.int64)  # stack distance
+        self.__fits = np.zeros(len(self.__edges) + 1, dtype=np.int64)  # size of the cacheable requests
+        self.__fits_hits = np.zeros(len(self.__edges) + 1, dtype=np.int64)  # max(stack distance, size) of the cacheable requests
+        self.__requests = 0
+
+    @property
+    def maxsizes(self) -> list:
+        return self.__maxsizes
+
+    def __add(self, seq: int, size: int):
+        self.__sizes[seq] += size
+        self.__total += size
+        tree = self.__tree
+        while seq < len(tree):
+            tree[seq] += size
+            seq |= seq + 1
+
+    def __prefix(self, seq: int) -> int:
+        """Total size of the objects last requested before seq (included)."""
+        total = 0
+        tree = self.__tree
+        while seq >= 0:
+            total += tree[seq]
+            seq = (seq & (seq + 1)) - 1
+        return total
+
+    def __compact(self):
+        """Renumber the last requests of the objects in the stack from 0 (the tree can grow only up to twice the number of objects)."""
+        live = sorted((seq, index) for index, seq in self.__last.items())
+        capacity = max(1024, 2 * len(live))
+        renumber = {}
+        self.__sizes, sizes = [0] * capacity, self.__sizes
+        for new, (seq, index) in enumerate(live):
+            renumber[seq] = new
+            self.__last[index] = new
+            self.__sizes[new] = sizes[seq]
+        # linear construction of the Fenwick tree
+        self.__tree = tree = self.__sizes.copy()
+        for seq in range(capacity):
+            parent = seq | (seq + 1)
+            if parent < capacity: tree[parent] += tree[seq]
+        self.__expiry = [[expire, renumber[seq], index] for expire, seq, index in self.__expiry if seq in renumber and self.__last[index] == renumber[seq]]
+        heapq.heapify(self.__expiry)
+        self.__seq = len(live)
+
+    def _delete_expired(self, time: float):
+        """Remove the expired objects from the stack (they are expired in every cache)."""
+        expiry = self.__expiry
+        while expiry and expiry[0][0] < time:
+            _, seq, index = heapq.heappop(expiry)
+            if self.__last.get(index) == seq:
+                del self.__last[index]
+                self.__add(seq, -self.__sizes[seq])
+
+    def recv(self, time: float, obj: Obj) -> float:
+        """
+        Place a request to the simulated caches.
+
+        :param time: Time (epoch) of the object request.
+        :param obj: The object (Obj) requested.
+        :return: Stack distance of the request: the request is a HIT in every cache at least as large, math.inf if not in the stack.
+        """
+        self._delete_expired(time)
+
+        distance = math.inf
+        seq = self.__last.pop(obj.index, None)
+        if seq is not None:
+            distance = self.__total - self.__prefix(seq - 1)
+            self.__add(seq, -self.__sizes[seq])
+
+        obj.fetched = True
+        # the object is stored by the caches where it is cacheable and fits, and stays where it is a HIT
+        if obj.cacheable or seq is not None:
+            if self.__seq == len(self.__tree): self.__compact()
+            self.__last[obj.index] = self.__seq
+            self.__add(self.__seq, obj.size)
+            heapq.heappush(self.__expiry, [time + obj.maxage, self.__seq, obj.index])
+            self.__seq += 1
+        return distance
+
+    def simulate(self, timestamps: list, objs: list) -> list:
+        """
+        Place requests to the simulated caches.
+
+        :param timestamps: Time (epoch) of the requests.
+        :param objs: Objects requested, objs[i] is requested at timestamps[i].
+        :return: For every cache size (see maxsizes), the status code (see Status.code) of the requests, uint8 array.
+        """
+        distances = np.array([self.recv(time, obj) for time, obj in zip(timestamps, objs)], dtype=np.float64)
+        sizes = np.array([obj.size for obj in objs], dtype=np.float64)
+        cacheable = np.array([obj.cacheable for obj in objs], dtype=bool)
+
+        # histograms of the miss ratio curve: a request is in the first bin whose edge is at least its value
+        self.__requests += len(objs)
+        self.__hits += np.bincount(np.searchsorted(self.__edges, distances), minlength=len(self.__hits))[:len(self.__hits)]
+        self.__fits += np.bincount(np.searchsorted(self.__edges, sizes[cacheable]), minlength=len(self.__fits))
+        self.__fits_hits += np.bincount(np.searchsorted(self.__edges, np.maximum(distances, sizes)[cacheable]), minlength=len(self.__fits_hits))[:len(self.__fits_hits)]
+
+        return [np.where(distances <= maxsize, Status.HIT.code, np.where(cacheable & (sizes <= maxsize), Status.MISS.code, Status.PASS.code)).astype(np.uint8) for maxsize in self.__maxsizes]
+
+    def miss_ratio_curve(self) -> list:
+        """
+        Number of HIT, MISS and PASS of the requests simulated for caches of (almost) every size, from 1 byte to 1PB by
+        steps of the precision.
+
+        :return: List of [size, hit, miss, pass].
+        """
+        hits = np.cumsum(self.__hits)[:-1]
+        misses = np.cumsum(self.__fits)[:-1] - np.cumsum(self.__fits_hits)[:-1]
+        return [[int(size), int(hit), int(miss), self.__requests - int(hit) - int(miss)] for size, hit, miss in zip(self.__edges, hits, misses)]
+
+    def write_miss_ratio_curve(self, file_name="MRC_LRU"):
+        """
+        Write the miss ratio curve on the disk (layout of the final CHR written by the Analyzer, with the size of the cache).
+
+        :param file_name: Name of the file where the curve should be written.
+        """
+        with open("./results/" + file_name + ".csv", 'w', encoding='utf-8') as f:
+            csv_writer = csv.writer(f)
+            csv_writer.writerow(['Size', 'Total', 'CHR', 'Hit', 'Miss', 'Pass'])
+            for size, hit, miss, pass_ in self.miss_ratio_curve():
+                csv_writer.writerow([size, self.__requests, hit / self.__requests * 100 if self.__requests else 0, hit, miss, pass_])
+
+
+class TestLRUStackSimulator(unittest.TestCase):
+
+    def test_lru_caches(self):
+        from cachesim import LRUCache
+        import random
+
+        # objects of constant size, smaller than every cache and never expiring: same status as LRUCache
+        generator = random.Random(0)
+        maxsizes = [300, 1000, 5000]
+        caches = [LRUCache(maxsize, write_log=False) for maxsize in maxsizes]
+        simulator = LRUStackSimulator(maxsizes)
+        paths = [int(generator.paretovariate(0.7)) % 200 for _ in range(3000)]  # more requests than the initial tree: compaction
+        timestamps = list(range(len(paths)))
+        objs = [CheckedObj(path, 10 + path * 7 % 200, 10 ** 6 if path % 9 else 0, -1) for path in paths]
+        statuses = simulator.simulate(timestamps, objs)
+        for cache, status_list in zip(caches, statuses):
+            self.assertEqual(status_list.tolist(), [cache.recv(time, CheckedObj(path, 10 + path * 7 % 200, 10 ** 6 if path % 9 else 0, -1)).code for time, path in zip(timestamps, paths)])
+
+        # the miss ratio curve matches the statuses at the sizes of the grid
+        curve = {size: (hit, miss, pass_) for size, hit, miss, pass_ in simulator.miss_ratio_curve()}
+        self.assertIn(300, curve)
+        for maxsize, status_list in zip(maxsizes, statuses):
+            if maxsize in curve:
+                self.assertEqual(curve[maxsize], tuple(np.bincount(status_list, minlength=3).tolist()))
+
+    def test_expiry(self):
+        simulator = LRUStackSimulator([100])
+        a, b = CheckedObj('a', 50, 10, -1), CheckedObj('b', 50, 10, -1)
+        self.assertEqual(simulator.recv(0, a), math.inf)
+        self.assertEqual(simulator.recv(1, b), math.inf)
+        self.assertEqual(simulator.recv(2, a), 100)  # b was requested after a
+        self.assertEqual(simulator.recv(10, CheckedObj('a', 50, 10, -1)), 50)
+        self.assertEqual(simulator.recv(12, CheckedObj('b', 50, 10, -1)), math.inf)  # b expired at 11
@@ -1,4 +1,6 @@
+import unittest
 from enum import Enum
+import numpy as np
 
 
 class Status(Enum):
@@ -6,3 +8,53 @@ class Status(Enum):
     HIT = 'hit'  # object returned from cache
     MISS = 'miss'  # object not in cache, fetched from origin
     PASS = 'pass'  # forced cache bypass (object too big or cache admission denied it)
+
+    @property
+    def code(self) -> int:
+        """Stable integer code of the status, used to exchange the status of many requests as an array (see status_codes)."""
+        return STATUS_CODES[self]
+
+    @staticmethod
+    def from_code(code: int) -> "Status":
+        """Status of an integer code (see code)."""
+        assert 0 <= code < len(STATUSES), f"Unknown status code: '{code}' received!"
+        return STATUSES[code]
+
+
+# STATUSES[code] is the status of the code: the codes are shared by the simulators and the analyzers, they must not change
+STATUSES = (Status.HIT, Status.MISS, Status.PASS)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+
+def status_codes(statuses: list) -> np.ndarray:
+    """
+    Codes (see Status.code) of a list of Status, as an uint8 array.
+
+    :param statuses: list of Status
+    """
+    statuses = np.array(statuses, dtype=object)
+    codes = np.zeros(len(statuses), dtype=np.uint8)
+    misses, passes = statuses == Status.MISS, statuses == Status.PASS
+    assert np.count_nonzero(statuses == Status.HIT) + np.count_nonzero(misses) + np.count_nonzero(passes) == len(statuses), f"Only Status can be encoded."
+    codes[misses] = Status.MISS.code
+    codes[passes] = Status.PASS.code
+    return codes
+
+
+class TestStatus(unittest.TestCase):
+
+    def test_codes(self):
+        # the codes are stable and go back to their status
+        self.assertEqual([status.code for status in (Status.HIT, Status.MISS, Status.PASS)], [0, 1, 2])
+        for status in Status:
+            self.assertIs(Status.from_code(status.code), status)
+            self.assertIs(Status.from_code(np.uint8(status.code)), status)
+        codes = status_codes([Status.PASS, Status.HIT, Status.MISS, Status.HIT])
+        self.assertEqual((codes.dtype, codes.tolist()), (np.uint8, [2, 0, 1, 0]))
+        self.assertEqual([Status.from_code(code) for code in codes.tolist()], [Status.PASS, Status.HIT, Status.MISS, Status.HIT])
+        self.assertEqual(len(status_codes([])), 0)
+
+        # unknown codes and statuses are rejected
+        for code in (3, -1, 255):
+            self.assertRaises(AssertionError, Status.from_code, code)
+        self.assertRaises(AssertionError, status_codes, [Status.HIT, "hit"])
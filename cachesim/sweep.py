@@ -0,0 +1,211 @@
+import heapq
+import itertools
+import json
+import math
+import os
+import tempfile
+import unittest
+from cachesim import FIFOCache, ProtectedFIFOCache, LRUCache, ProtectedLRUCache, LFUCache, ProtectedLFUCache, LSOCache, ProtectedLSOCache, SSOCache, ProtectedSSOCache, RANCache, ProtectedRANCache, AnalyzerPool
+from cachesim.admission import ADMISSIONS
+
+# cache models of the sweeps, key: name of the policy in the sweep files and in the names of the result files
+POLICIES = {"FIFO": FIFOCache, "PFIFO": ProtectedFIFOCache, "LRU": LRUCache, "PLRU": ProtectedLRUCache,
+            "LFU": LFUCache, "PLFU": ProtectedLFUCache, "LSO": LSOCache, "PLSO": ProtectedLSOCache,
+            "SSO": SSOCache, "PSSO": ProtectedSSOCache, "RAN": RANCache, "PRAN": ProtectedRANCache}
+
+# time (microseconds) to simulate a request with a cache of 100kB of every policy, measured on a zipf trace: used to balance the workers
+POLICY_COSTS = {"FIFO": 2.0, "PFIFO": 3.3, "LRU": 3.5, "PLRU": 3.6, "LFU": 5.0, "PLFU": 3.3,
+                "LSO": 2.6, "PLSO": 2.4, "SSO": 2.2, "PSSO": 3.1, "RAN": 3.3, "PRAN": 3.4}
+
+# extra time (microseconds) of the admission filter per request, measured the same way
+ADMISSION_COST = 9.0
+
+# settings of the analyzers of a sweep (arguments of Analyzer) and their default value
+ANALYZER_SETTINGS = {"writing_frquency_time": 30, "writing_frequency_number": 1000000, "movies_time_interval": 21600, "CHR_final": True, "served_from_cache": True}
+
+
+def read_sweep(file_name: str) -> dict:
+    """
+    Read a sweep file (JSON, or TOML if the file name ends with .toml). A sweep describes a grid of caches and the
+    settings of their analyzers, for example:
+
+    {"caches": [{"policies": ["PLRU", "PLFU"], "sizes": [1000, 10000]},
+                {"policies": ["PRAN"], "sizes": [1000], "options": {"seed": [0, 1]}}],
+     "analyzer": {"movies_time_interval": 0},
+     "workers": 8}
+
+    Every group of caches is expanded as policies x sizes x options (see expand), an option given as a list is swept
+    over its values. The analyzer settings default to ANALYZER_SETTINGS, workers to default_workers.
+
+    :param file_name: Name of the sweep file.
+    """
+    if file_name.endswith(".toml"):
+        import tomllib  # Python 3.11
+        with open(file_name, 'rb') as f:
+            sweep = tomllib.load(f)
+    else:
+        with open(file_name, encoding='utf-8') as f:
+            sweep = json.load(f)
+    assert "caches" in sweep, f"The sweep {file_name} does not describe any cache."
+    unknown = set(sweep.get("analyzer", {})) - set(ANALYZER_SETTINGS)
+    assert not unknown, f"Unknown analyzer settings in {file_name}: {sorted(unknown)}."
+    return sweep
+
+
+def estimate_cost(policy: str, size: int) -> float:
+    """
+    Estimated time to simulate a request with a cache (arbitrary unit): the cost of the policy, slightly higher for
+    larger caches (more objects stored).
+
+    :param policy: Name of the policy (see POLICIES).
+    :param size: Size of the cache.
+    """
+    return POLICY_COSTS[policy] * (1 + 0.1 * math.log10(size))
+
+
+def cache_cost(cache) -> float:
+    """Estimated cost (see estimate_cost) of an existing cache."""
+    policy = next((policy for policy, model in POLICIES.items() if type(cache) is model), None)
+    cost = estimate_cost(policy, cache.maxsize) if policy is not None else max(POLICY_COSTS.values())
+    return cost + ADMISSION_COST if cache.admission is not None else cost
+
+
+class Cell:
+    """
+    Cache of a sweep: a policy, a size and the options of the cache model. The option admission names the admission
+    filter installed on the cache (see cachesim.admission.ADMISSIONS, "none" for no filter), the options
+    admission_<argument> are given to the filter (for example admission_capacity).
+    """
+
+    def __init__(self, name: str, policy: str, size: int, options: dict):
+        """
+        :param name: Name of the cell, used in the names of the result files.
+        :param policy: Name of the policy (see POLICIES).
+        :param size: Size of the cache.
+        :param options: Other arguments of the cache model, and of its admission filter.
+        """
+        assert policy in POLICIES, f"Unknown policy '{policy}', the policies are {list(POLICIES)}."
+        admission = options.get("admission", "none")
+        assert admission in ADMISSIONS, f"Unknown admission filter '{admission}', the filters are {list(ADMISSIONS)}."
+        self.name = name
+        self.policy = policy
+        self.size = size
+        self.options = options
+
+    @property
+    def cost(self) -> float:
+        cost = estimate_cost(self.policy, self.size)
+        return cost + ADMISSION_COST if ADMISSIONS[self.options.get("admission", "none")] is not None else cost
+
+    def cache(self):
+        """New cache of the cell, with its admission filter."""
+        options = {option: value for option, value in self.options.items() if option != "admission" and not option.startswith("admission_")}
+        cache = POLICIES[self.policy](self.size, **options)
+        admission = ADMISSIONS[self.options.get("admission", "none")]
+        if admission is not None:
+            cache.set_admission(admission(**{option[len("admission_"):]: value for option, value in self.options.items() if option.startswith("admission_")}))
+        return cache
+
+    def __repr__(self):
+        return f"Cell({self.name})"
+
+
+def expand(sweep: dict) -> list:
+    """
+    Cells of a sweep, in the order of the sweep: for every group of caches, policies x sizes x options. The name of a
+    cell is <policy>_<size>, followed by _<option><value> for every option swept (given as a list).
+
+    :param sweep: Description of the sweep (see read_sweep).
+    """
+    cells = []
+    for group in sweep["caches"]:
+        options = group.get("options", {})
+        swept = [option for option, values in options.items() if isinstance(values, list)]
+        for policy, size, values in itertools.product(group["policies"], group["sizes"], itertools.product(*[options[option] for option in swept])):
+            cell_options = dict(options, **dict(zip(swept, values)))
+            name = "_".join([policy, str(size)] + [f"{option}{value}" for option, value in zip(swept, values)])
+            cells.append(Cell(name, policy, size, cell_options))
+    names = [cell.name for cell in cells]
+    assert len(set(names)) == len(names), f"The cells of a sweep must have different names: {sorted(name for name in set(names) if names.count(name) > 1)}."
+    return cells
+
+
+def analyzer_streams(names: list, settings=None) -> dict:
+    """
+    Arguments of the analyzer of every cache (results written in CHR_<name>_* files, profile of the cache in CHR_<name>_profile.json).
+
+    :param names: Names of the caches.
+    :param settings: Analyzer settings (see ANALYZER_SETTINGS), the missing ones take the default value.
+    :return: key: name of the stream (name of the cache), value: arguments of the Analyzer (see AnalyzerPool)
+    """
+    settings = dict(ANALYZER_SETTINGS, **(settings or {}))
+    return {name: tuple(settings.values()) + ("CHR_" + name + "_time", "CHR_" + name + "_regular", "CHR_" + name + "_final", "CHR_" + name + "_movies", "traffic_served_from_cache_" + name, "CHR_" + name + "_profile") for name in names}
+
+
+def sweep_analyzers(cells: list, sweep: dict, processes=1) -> AnalyzerPool:
+    """
+    Analyzers of the cells of a sweep (one stream for each cell, named after the cell).
+
+    :param cells: Cells of the sweep (see expand).
+    :param sweep: Description of the sweep (see read_sweep).
+    :param processes: Number of analyzer processes.
+    """
+    return AnalyzerPool(analyzer_streams([cell.name for cell in cells], sweep.get("analyzer")), sweep.get("analyzer_processes", processes))
+
+
+def default_workers() -> int:
+    """Number of simulation processes using every core: one core is left to the process coordinating the simulation, one to the analyzers."""
+    return max(1, (os.cpu_count() or 1) - 2)
+
+
+def schedule(costs: list, workers=None) -> list:
+    """
+    Distribute caches between workers so that the workers finish at about the same time: the caches are assigned by
+    decreasing cost to the worker with the lowest total cost (longest processing time first).
+
+    :param costs: Estimated cost of every cache (see estimate_cost).
+    :param workers: Number of workers, None for default_workers (never more than the number of caches).
+    :return: For every worker, the indices of its caches (in increasing order).
+    """
+    workers = max(1, min(len(costs), workers or default_workers()))
+    loads = [(0.0, worker) for worker in range(workers)]  # min-heap of (total cost, worker)
+    assignment = [[] for _ in range(workers)]
+    for index in sorted(range(len(costs)), key=lambda index: -costs[index]):
+        load, worker = heapq.heappop(loads)
+        assignment[worker].append(index)
+        heapq.heappush(loads, (load + costs[index], worker))
+    return [sorted(indices) for indices in assignment if indices]
+
+
+class TestSweep(unittest.TestCase):
+
+    def test_expand(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "sweep.toml")
+            with open(file_name, 'w', encoding='utf-8') as f:
+                f.write('[[caches]]\npolicies = ["PLRU", "PLFU"]\nsizes = [100, 1000]\n\n[[caches]]\npolicies = ["RAN"]\nsizes = [50]\noptions = {seed = [0, 1]}\n\n[analyzer]\nmovies_time_interval = 0\n')
+            sweep = read_sweep(file_name)
+        cells = expand(sweep)
+        self.assertEqual([cell.name for cell in cells], ["PLRU_100", "PLRU_1000", "PLFU_100", "PLFU_1000", "RAN_50_seed0", "RAN_50_seed1"])
+        self.assertEqual([(type(cache).__name__, cache.maxsize) for cache in [cell.cache() for cell in cells]][-2:], [("RANCache", 50), ("RANCache", 50)])
+        self.assertEqual(cells[5].cache()._random.random(), RANCache(50, seed=1)._random.random())
+        streams = analyzer_streams([cell.name for cell in cells], sweep["analyzer"])
+        self.assertEqual(streams["PLFU_100"][:6], (30, 1000000, 0, True, True, "CHR_PLFU_100_time"))
+        self.assertRaises(AssertionError, expand, {"caches": [{"policies": ["LRU", "LRU"], "sizes": [10]}]})
+
+    def test_admission(self):
+        cells = expand({"caches": [{"policies": ["PLRU"], "sizes": [1000], "options": {"admission": ["none", "tinylfu"], "admission_capacity": 64}}]})
+        self.assertEqual([cell.name for cell in cells], ["PLRU_1000_admissionnone", "PLRU_1000_admissiontinylfu"])
+        caches = [cell.cache() for cell in cells]
+        self.assertIsNone(caches[0].admission)
+        self.assertEqual(type(caches[1].admission).__name__, "TinyLFU")
+        self.assertGreater(cells[1].cost, cells[0].cost)
+        self.assertEqual(cache_cost(caches[1]), cells[1].cost)
+        self.assertRaises(AssertionError, expand, {"caches": [{"policies": ["LRU"], "sizes": [10], "options": {"admission": "lfu"}}]})
+
+    def test_schedule(self):
+        costs = [8, 7, 6, 5, 4, 3, 2, 2, 1]
+        assignment = schedule(costs, 3)
+        self.assertEqual(sorted(index for indices in assignment for index in indices), list(range(len(costs))))
+        self.assertEqual(sorted(sum(costs[index] for index in indices) for indices in assignment), [12, 13, 13])
+        self.assertEqual(len(schedule(costs[:2], 8)), 2)
@@ -0,0 +1,298 @@
+import json
+import math
+import numpy as np
+import os
+import tempfile
+import unittest
+from multiprocessing import shared_memory
+
+
+# columns of a trace batch: name and type
+COLUMNS = (("timestamp", np.float64), ("path", np.int64), ("size", np.int64), ("maxage", np.int32), ("livechannel", np.int32))
+
+# maxage value of the requests for which the maxage is not indicated in the logs (the default maxage is used at replay)
+MAXAGE_UNKNOWN = np.iinfo(np.int32).min
+
+
+class TraceBatch:
+    """
+    Batch of requests (logs) stored by column: timestamp (epoch, float64), path (object identifier, int64),
+    size (int64), maxage (int32, MAXAGE_UNKNOWN if not indicated) and livechannel (group of the object, int32, -1 if not indicated).
+    The columns can be placed in a single shared memory block, so that the batch is decoded once and read without copy by
+    every process: only a small descriptor (see descriptor and attach) crosses the process boundaries.
+    """
+
+    def __init__(self, length: int, shared=False, name=None):
+        """
+        Allocate a batch. Use from_hits to decode Elasticsearch results and attach to open a shared batch.
+
+        :param length: Number of requests in the batch.
+        :param shared: True to allocate the columns in shared memory.
+        :param name: Name of an existing shared memory block holding the columns (see attach).
+        """
+        self.__length = length
+        self.__shm = None
+        self.cursor = None  # position of the source after the batch (row of a trace, sort values of Elasticsearch) to resume from, None if unknown
+        offsets, nbytes = [], 0
+        for _, dtype in COLUMNS:
+            offsets.append(nbytes)
+            nbytes += length * np.dtype(dtype).itemsize
+        if shared or name is not None:
+            self.__shm = shared_memory.SharedMemory(name=name, create=name is None, size=max(nbytes, 1))
+            buffer = self.__shm.buf
+        else:
+            buffer = bytearray(nbytes)
+        for (column, dtype), offset in zip(COLUMNS, offsets):
+            setattr(self, column, np.frombuffer(buffer, dtype=dtype, count=length, offset=offset))
+
+    @classmethod
+    def from_hits(cls, hits: list, shared=False) -> "TraceBatch":
+        """
+        Decode the logs returned by an Elasticsearch search (hits) into a batch.
+
+        :param hits: Documents with the fields path, contentlength, maxage and livechannel in _source and @timestamp (epoch_second) in fields.
+        :param shared: True to allocate the columns in shared memory.
+        """
+        batch = cls(len(hits), shared)
+        batch.timestamp[:] = [float(log["fields"]["@timestamp"][0]) for log in hits]
+        batch.path[:] = [int(log["_source"]["path"]) for log in hits]
+        batch.size[:] = [int(log["_source"]["contentlength"]) for log in hits]
+        batch.maxage[:] = [int(log["_source"]["maxage"]) if isinstance(log["_source"]["maxage"], int) else MAXAGE_UNKNOWN for log in hits]
+        batch.livechannel[:] = [-1 if log["_source"]["livechannel"] is None else int(log["_source"]["livechannel"]) for log in hits]
+        return batch
+
+    @classmethod
+    def from_docvalues(cls, hits: list, shared=False) -> "TraceBatch":
+        """
+        Decode the logs returned by an Elasticsearch search requesting only docvalue fields (no _source) into a batch.
+
+        :param hits: Documents with the fields @timestamp (epoch_second), path, contentlength and optionally maxage and livechannel in fields.
+        :param shared: True to allocate the columns in shared memory.
+        """
+        fields = [log["fields"] for log in hits]
+        batch = cls(len(hits), shared)
+        batch.timestamp[:] = [float(log["@timestamp"][0]) for log in fields]
+        batch.path[:] = [int(log["path"][0]) for log in fields]
+        batch.size[:] = [int(log["contentlength"][0]) for log in fields]
+        batch.maxage[:] = [int(log["maxage"][0]) if "maxage" in log else MAXAGE_UNKNOWN for log in fields]
+        batch.livechannel[:] = [int(log["livechannel"][0]) if "livechannel" in log else -1 for log in fields]
+        return batch
+
+    @classmethod
+    def from_columns(cls, columns: dict, shared=False) -> "TraceBatch":
+        """
+        Batch made of existing columns (for example read from a trace file). The columns are used without copy unless
+        the batch is placed in shared memory.
+
+        :param columns: Arrays of the same length for every column of COLUMNS (key: name of the column).
+        :param shared: True to copy the columns in shared memory.
+        """
+        length = len(columns[COLUMNS[0][0]])
+        assert all(len(columns[column]) == length for column, _ in COLUMNS), f"The columns of a batch must have the same length."
+        if shared:
+            batch = cls(length, shared)
+            for column, _ in COLUMNS:
+                getattr(batch, column)[:] = columns[column]
+            return batch
+        batch = cls(0)
+        batch.__length = length
+        for column, dtype in COLUMNS:
+            setattr(batch, column, np.asarray(columns[column], dtype=dtype))
+        return batch
+
+    @classmethod
+    def attach(cls, descriptor: tuple) -> "TraceBatch":
+        """
+        Open a batch placed in shared memory by another process.
+
+        :param descriptor: Descriptor of the batch (see descriptor).
+        """
+        name, length = descriptor
+        return cls(length, name=name)
+
+    def descriptor(self) -> tuple:
+        """Small picklable description of a shared batch: name of the shared memory block and number of requests."""
+        assert self.__shm is not None, f"Only batches in shared memory can be described."
+        return self.__shm.name, self.__length
+
+    def copy(self) -> "TraceBatch":
+        """Copy of the batch in the private memory of the process."""
+        batch = TraceBatch(self.__length)
+        for column, _ in COLUMNS:
+            getattr(batch, column)[:] = getattr(self, column)
+        batch.cursor = self.cursor
+        return batch
+
+    def columns(self) -> dict:
+        """Columns of the batch (key: name of the column), without copy."""
+        return {column: getattr(self, column) for column, _ in COLUMNS}
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the columns of the batch (bytes)."""
+        return sum(getattr(self, column).nbytes for column, _ in COLUMNS)
+
+    def maxages(self, default_maxage: int) -> np.ndarray:
+        """Maxage column where the unknown values are replaced by the default maxage."""
+        return np.where(self.maxage == MAXAGE_UNKNOWN, default_maxage, self.maxage)
+
+    def close(self):
+        """Release the access of this process to the shared batch (the columns cannot be used anymore)."""
+        if self.__shm is not None:
+            for column, _ in COLUMNS:
+                setattr(self, column, None)
+            self.__shm.close()
+
+    def unlink(self):
+        """Destroy the shared memory block of the batch, once every process is done with it."""
+        if self.__shm is not None:
+            self.__shm.unlink()
+
+    def __len__(self):
+        return self.__length
+
+
+class TraceWriter:
+    """
+    Write a trace on the disk, in a directory holding one .npy file per column and per chunk (chunk_<n>.<column>.npy)
+    and a header (header.json) with the columns, the number of requests of every chunk and the time range of the trace.
+    The header is written last (see close): a directory without header is an incomplete trace.
+    """
+
+    def __init__(self, directory: str, source=None):
+        """
+        :param directory: Directory of the trace (created if it does not exist).
+        :param source: Description of the origin of the trace stored in the header (for example the ES index).
+        """
+        assert not os.path.exists(os.path.join(directory, "header.json")), f"A trace already exists in {directory}."
+        os.makedirs(directory, exist_ok=True)
+        self.__directory = directory
+        self.__header = {"version": 1, "source": source, "columns": [[column, np.dtype(dtype).str] for column, dtype in COLUMNS], "rows": 0, "chunks": [], "start": None, "end": None}
+
+    def append(self, batch: TraceBatch):
+        """
+        Write a batch as a new chunk of the trace, the requests must follow the ones already written (in time order).
+
+        :param batch: Requests written.
+        """
+        if len(batch) == 0: return
+        chunk = len(self.__header["chunks"])
+        for column, _ in COLUMNS:
+            np.save(os.path.join(self.__directory, f"chunk_{chunk:06d}.{column}.npy"), getattr(batch, column))
+        self.__header["chunks"].append(len(batch))
+        self.__header["rows"] += len(batch)
+        if self.__header["start"] is None: self.__header["start"] = float(batch.timestamp[0])
+        self.__header["end"] = float(batch.timestamp[-1])
+
+    def close(self):
+        """Write the header: the trace is complete."""
+        with open(os.path.join(self.__directory, "header.json"), 'w', encoding='utf-8') as f:
+            json.dump(self.__header, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None: self.close()
+
+
+def read_header(directory: str) -> dict:
+    """
+    Header of a trace written by TraceWriter: columns, rows (number of requests), chunks (number of requests of every
+    chunk), start and end (time of the first and last requests) and source.
+
+    :param directory: Directory of the trace.
+    """
+    path = os.path.join(directory, "header.json")
+    assert os.path.exists(path), f"No complete trace in {directory} (header.json is missing)."
+    with open(path, encoding='utf-8') as f:
+        header = json.load(f)
+    assert [tuple(column) for column in header["columns"]] == [(column, np.dtype(dtype).str) for column, dtype in COLUMNS], f"The columns of the trace in {directory} are not supported."
+    return header
+
+
+def read_trace(directory: str, batch_size=None, start=0):
+    """
+    Iterate over the requests of a trace written by TraceWriter. The chunks are memory-mapped: the batches are views
+    of the files, read from the disk when they are used.
+
+    :param directory: Directory of the trace.
+    :param batch_size: Maximum number of requests of the batches, None for one batch per chunk.
+    :param start: Number of requests skipped at the beginning of the trace (to resume a replay).
+    :return: Generator of TraceBatch, in trace order (the cursor of every batch is the row following it).
+    """
+    header = read_header(directory)
+    offset = 0  # row of the trace of the first request of the chunk
+    for chunk, rows in enumerate(header["chunks"]):
+        offset += rows
+        if offset <= start: continue
+        columns = {column: np.load(os.path.join(directory, f"chunk_{chunk:06d}.{column}.npy"), mmap_mode='r') for column, _ in COLUMNS}
+        step = batch_size or rows
+        for first in range(max(0, start - offset + rows), rows, step):
+            batch = TraceBatch.from_columns({column: values[first:first + step] for column, values in columns.items()})
+            batch.cursor = offset - rows + first + len(batch)
+            yield batch
+
+
+def next_access_times(timestamps, paths) -> list:
+    """
+    Compute, for every request of a trace, the time of the next request on the same object (knowledge of the future
+    used by the clairvoyant cache). The trace is walked once, in reverse order.
+
+    :param timestamps: Time (epoch) of the requests, in trace order.
+    :param paths: Identifier of the object requested (Obj.index), paths[i] is requested at timestamps[i].
+    :return: List of the next access times, next[i] is the time of the next request on paths[i] (math.inf if the object is never requested again).
+    """
+    assert len(timestamps) == len(paths), f"Every request must have a timestamp and a path."
+    next_times = [math.inf] * len(paths)
+    last_seen = {} # key: path, value: time of the earliest request seen so far (walking backwards)
+    for i in range(len(paths) - 1, -1, -1):
+        next_times[i] = last_seen.get(paths[i], math.inf)
+        last_seen[paths[i]] = timestamps[i]
+    return next_times
+
+
+class TestTrace(unittest.TestCase):
+
+    def test_trace_file(self):
+        hits = [{"_source": {"path": str(i % 7), "contentlength": 100 + i, "maxage": None if i % 3 == 0 else 300, "livechannel": None if i % 2 else i % 5}, "fields": {"@timestamp": [str(1000 + i / 4)]}} for i in range(25)]
+        batches = [TraceBatch.from_hits(hits[:10]), TraceBatch.from_hits(hits[10:])]
+        with tempfile.TemporaryDirectory() as directory:
+            with TraceWriter(directory, source="test") as writer:
+                for batch in batches:
+                    writer.append(batch)
+            header = read_header(directory)
+            self.assertEqual(header["rows"], 25)
+            self.assertEqual(header["chunks"], [10, 15])
+            self.assertEqual((header["start"], header["end"]), (1000.0, 1006.0))
+            self.assertEqual([len(batch) for batch in read_trace(directory, batch_size=4)], [4, 4, 2, 4, 4, 4, 3])
+            for column, _ in COLUMNS:
+                expected = np.concatenate([getattr(batch, column) for batch in batches])
+                np.testing.assert_array_equal(np.concatenate([getattr(batch, column) for batch in read_trace(directory)]), expected)
+            self.assertEqual(read_trace(directory).__next__().maxages(60).tolist()[:4], [60, 300, 300, 60])
+            resumed = list(read_trace(directory, batch_size=4, start=13))
+            self.assertEqual([(len(batch), batch.cursor) for batch in resumed], [(4, 17), (4, 21), (4, 25)])
+            np.testing.assert_array_equal(np.concatenate([batch.path for batch in resumed]), np.concatenate([batch.path for batch in batches])[13:])
+            self.assertRaises(AssertionError, TraceWriter, directory)
+
+    def test_shared_batch(self):
+        columns = {"timestamp": np.arange(1000, 1010, 0.5), "path": np.arange(20) % 7, "size": np.arange(100, 120), "maxage": np.where(np.arange(20) % 3, 300, MAXAGE_UNKNOWN), "livechannel": np.arange(20) % 5 - 1}
+        batch = TraceBatch.from_columns(columns, shared=True)
+        descriptor = batch.descriptor()
+        self.assertEqual(descriptor[1], 20)
+
+        # the descriptor opens the same columns, without copy
+        attached = TraceBatch.attach(descriptor)
+        for column, dtype in COLUMNS:
+            self.assertEqual(getattr(attached, column).dtype, dtype)
+            np.testing.assert_array_equal(getattr(attached, column), columns[column])
+        batch.path[0] = 42
+        self.assertEqual(attached.path[0], 42)
+        self.assertEqual(attached.nbytes, batch.nbytes)
+
+        # the block is destroyed once unlinked
+        attached.close()
+        attached.unlink()
+        batch.close()
+        self.assertRaises(FileNotFoundError, TraceBatch.attach, descriptor)
+        self.assertRaises(AssertionError, TraceBatch(3).descriptor)
@@ -1,6 +1,19 @@
 from elasticsearch import Elasticsearch
-from cachesim import Obj
+from cachesim import Obj, CheckedObj
+from cachesim.metrics import StageMetrics
+from cachesim.trace import COLUMNS, TraceBatch, TraceWriter, MAXAGE_UNKNOWN, read_header, read_trace
+import multiprocessing as mp
+import numpy as np
+import os
+import queue
 import sys
+import threading
+import time
+import unittest
+
+
+# type of the objects replayed, CACHESIM_CHECKS=1 in the environment to check the invariants of the objects (debug, slower)
+ReplayObj = CheckedObj if os.environ.get("CACHESIM_CHECKS") == "1" else Obj
 
 
 def connect_elasticsearch(domain, port):
@@ -33,16 +46,84 @@ def fail_message(message, write_in_file=True):
             print(message, file=f)
 
 
-def es_query_scroll(q, index_name, host, port, search_size=10000, stop_after=-1):
+def send_batch(q, hits, slots=None, cursor=None, metrics=None):
+    """
+    Decode logs in a TraceBatch placed in shared memory and send its descriptor.
+
+    :param q: pipe connection used to send the descriptor
+    :param hits: logs returned by Elasticsearch
+    :param slots: semaphore acquired before allocating the batch, None for no bound
+    :param cursor: position of the source after the batch, to resume from (see TraceBatch.cursor)
+    :param metrics: metrics of the fetching stage (see cachesim.metrics.StageMetrics), None if not collected
+    """
+    metrics = metrics or StageMetrics()
+    with metrics.blocked("send"): # waiting for a free slot (the batches in flight are not processed yet)
+        if slots is not None: slots.acquire()
+    batch = TraceBatch.from_hits(hits, shared=True)
+    with metrics.blocked("send"):
+        q.send([batch.descriptor(), cursor])
+    metrics.add(1, len(batch), batch.nbytes)
+    batch.close()
+
+
+def send_columns(q, columns, slots=None, cursor=None, metrics=None):
+    """
+    Copy columns of logs in a TraceBatch placed in shared memory and send its descriptor.
+
+    :param q: pipe connection used to send the descriptor
+    :param columns: columns of the logs (see cachesim.trace.COLUMNS)
+    :param slots: semaphore acquired before allocating the batch, None for no bound
+    :param cursor: position of the source after the batch, to resume from (see TraceBatch.cursor)
+    :param metrics: metrics of the fetching stage (see cachesim.metrics.StageMetrics), None if not collected
+    """
+    metrics = metrics or StageMetrics()
+    with metrics.blocked("send"): # waiting for a free slot (the batches in flight are not processed yet)
+        if slots is not None: slots.acquire()
+    batch = TraceBatch.from_columns(columns, shared=True)
+    with metrics.blocked("send"):
+        q.send([batch.descriptor(), cursor])
+    metrics.add(1, len(batch), batch.nbytes)
+    batch.close()
+
+
+def receive_batches(q, slots=None, metrics=None):
+    """
+    Iterate over the TraceBatch sent by a fetching process (see send_batch), until None is received. Each batch is
+    destroyed, and its slot released, when the next one is requested.
+
+    :param q: pipe connection used to receive the descriptors
+    :param slots: semaphore released for every batch destroyed, None if the sender does not bound the batches
+    :param metrics: metrics of the receiving stage (see cachesim.metrics.StageMetrics), None if not collected
+    """
+    metrics = metrics or StageMetrics()
+    with metrics.blocked("recv"):
+        message = q.recv()
+    while message is not None:
+        descriptor, cursor = message
+        batch = TraceBatch.attach(descriptor)
+        batch.cursor = cursor
+        metrics.add(1, len(batch), batch.nbytes)
+        yield batch
+        batch.close()
+        batch.unlink()
+        if slots is not None: slots.release()
+        with metrics.blocked("recv"):
+            message = q.recv()
+
+
+def es_query_scroll(q, index_name, host, port, search_size=10000, stop_after=-1, slots=None, metrics=None):
     """
     Fetch the logs data from Elasticsearch using search queries and scroll API. The logs are then sent to the main
-    process to be replayed.
-    :param q: multiprocessing queue used to send the logs' data to the main process
+    process to be replayed: each page of results is decoded once in a TraceBatch placed in shared memory and only its
+    descriptor is sent, the receiver is in charge of unlinking the batch.
+    :param q: multiprocessing queue used to send the logs' data (batch descriptors) to the main process
     :param index_name: name of the ES index used for running the search
     :param host: IP address of ES instance
     :param port: port of ES instance
     :param search_size: number of documents returned by each individual search (by default limited to 10,000 in ES)
     :param stop_after: the search stop after this number of data processed, -1 for not setting any limit
+    :param slots: semaphore acquired for every batch sent and released by the receiver once the batch is unlinked (bounds the shared memory used), None for no bound
+    :param metrics: metrics of the fetching stage (see cachesim.metrics.StageMetrics), None if not collected
     """
 
     # Requests from ES cluster
@@ -76,7 +157,7 @@ def es_query_scroll(q, index_name, host, port, search_size=10000, stop_after=-1)
     while len(search_results['hits']['hits']) > 0 and (stop_after == -1 or stop_after > total_processed):
         # Update the scroll ID
         sid = search_results['_scroll_id']
-        q.send(search_results["hits"]["hits"])
+        send_batch(q, search_results["hits"]["hits"], slots, metrics=metrics)
         total_processed += len(search_results['hits']['hits'])
         search_results = es.scroll(scroll_id=sid, scroll='10m')
 
@@ -86,16 +167,20 @@ def es_query_scroll(q, index_name, host, port, search_size=10000, stop_after=-1)
     q.close()
 
 
-def es_query_search_after(q, index_name, host, port, search_size=10000, stop_after=-1):
+def es_query_search_after(q, index_name, host, port, search_size=10000, stop_after=-1, slots=None, search_after=None, metrics=None):
     """
     Fetch the logs data from Elasticsearch using search queries and scroll API. The logs are then sent to the main
-    process to be replayed.
-    :param q: multiprocessing queue used to send the logs' data to the main process
+    process to be replayed: each page of results is decoded once in a TraceBatch placed in shared memory and only its
+    descriptor is sent, the receiver is in charge of unlinking the batch.
+    :param q: multiprocessing queue used to send the logs' data (batch descriptors) to the main process
     :param index_name: name of the ES index used for running the search
     :param host: IP address of ES instance
     :param port: port of ES instance
     :param search_size: number of documents returned by each individual search (by default limited to 10,000 in ES)
     :param stop_after: the search stop after this number of data processed, -1 for not setting any limit
+    :param slots: semaphore acquired for every batch sent and released by the receiver once the batch is unlinked (bounds the shared memory used), None for no bound
+    :param search_after: sort values of the last log already processed to resume a replay (cursor of its batch), None to start from the first log. The logs with the same timestamp are ordered by the point-in-time: the replay is identical only if the index was not modified (or merged) meanwhile
+    :param metrics: metrics of the fetching stage (see cachesim.metrics.StageMetrics), None if not collected
     """
 
     # Requests from ES cluster
@@ -114,7 +199,7 @@ def es_query_search_after(q, index_name, host, port, search_size=10000, stop_aft
     search_results = es.search(_source=["path", "contentlength", "maxage", "livechannel"], query={"match_all": {}}, size=search_size,
                                docvalue_fields=[{"field": "@timestamp", "format": "epoch_second"}],
                                sort=[{"@timestamp": {"order": "asc"}}], pit={"id": pit, "keep_alive": "10m"},
-                               track_total_hits=True, version=False)
+                               track_total_hits=True, version=False, **({} if search_after is None else {"search_after": search_after}))
 
     print("Total number of logs: ", search_results['hits']['total']['value'])
     print("Count API: ", es.count(index=index_name)['count'])
@@ -128,7 +213,7 @@ def es_query_search_after(q, index_name, host, port, search_size=10000, stop_aft
     while len(search_results['hits']['hits']) > 0 and (stop_after == -1 or stop_after > total_processed):
         # Update the scroll ID
         last_value = search_results["hits"]["hits"][-1]["sort"]
-        q.send(search_results["hits"]["hits"])
+        send_batch(q, search_results["hits"]["hits"], slots, last_value, metrics)
         total_processed += len(search_results['hits']['hits'])
         search_results = es.search(_source=["path", "contentlength", "maxage", "livechannel"], search_after=last_value,
                                    query={"match_all": {}}, size=search_size,
@@ -142,22 +227,433 @@ def es_query_search_after(q, index_name, host, port, search_size=10000, stop_aft
     q.close()
 
 
-def cache_simulation(search_results, maxage, cache):
+# Lean search used by the sliced scroll: only the doc values are returned (no _source) and filter_path removes the metadata of the hits
+DOCVALUE_FIELDS = [{"field": "@timestamp", "format": "epoch_second"}, "path", "contentlength", "maxage", "livechannel"]
+FILTER_PATH = ["_scroll_id", "hits.total.value", "hits.hits.fields"]
+
+
+def es_scroll_slice(es, index_name, search_size, slice_id, slices, out, stop):
+    """
+    Fetch one slice of a sliced scroll, sorted by timestamp (thread started by es_query_sliced_scroll). The total number
+    of logs of the slice is put first in the output queue, then every page decoded in a TraceBatch and None at the end
+    (or the exception raised if the search failed).
+    :param es: Elasticsearch client
+    :param index_name: name of the ES index used for running the search
+    :param search_size: number of documents returned by each individual search
+    :param slice_id: identifier of the slice fetched
+    :param slices: number of slices
+    :param out: queue.Queue receiving the pages of the slice
+    :param stop: threading.Event set when the pages are not needed anymore
+    """
+    def put(item):
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=1)
+                return
+            except queue.Full:
+                pass
+
+    sid = None
+    try:
+        search = dict(index=index_name, scroll='10m', _source=False, size=search_size, docvalue_fields=DOCVALUE_FIELDS,
+                      sort=[{"@timestamp": {"order": "asc"}}], track_total_hits=True, filter_path=FILTER_PATH)
+        if slices > 1: search["slice"] = {"id": slice_id, "max": slices} # ES does not accept a single slice
+        search_results = es.search(**search)
+        sid = search_results['_scroll_id']
+        put(search_results['hits']['total']['value'])
+        hits = search_results['hits'].get('hits', []) # filter_path removes the empty lists
+        while len(hits) > 0 and not stop.is_set():
+            put(TraceBatch.from_docvalues(hits))
+            search_results = es.scroll(scroll_id=sid, scroll='10m', filter_path=FILTER_PATH)
+            sid = search_results['_scroll_id']
+            hits = search_results.get('hits', {}).get('hits', [])
+        put(None)
+    except Exception as error:
+        put(error)
+    finally:
+        if sid is not None: es.clear_scroll(scroll_id=sid)
+
+
+def es_query_sliced_scroll(q, index_name, host, port, search_size=10000, stop_after=-1, slots=None, slices=4, es=None, metrics=None):
+    """
+    Fetch the logs data from Elasticsearch with a sliced scroll: the slices are fetched concurrently (one thread per
+    slice, only the doc values are requested) and merged back in timestamp order before being sent to the main process,
+    exactly like es_query_scroll does. Every slice is sorted, so the pages can be merged as soon as every slice has
+    returned logs older than the ones already merged.
+    :param q: multiprocessing queue used to send the logs' data (batch descriptors) to the main process
+    :param index_name: name of the ES index used for running the search
+    :param host: IP address of ES instance
+    :param port: port of ES instance
+    :param search_size: number of documents returned by each individual search and of each batch sent
+    :param stop_after: the search stop after this number of data processed, -1 for not setting any limit
+    :param slots: semaphore acquired for every batch sent and released by the receiver once the batch is unlinked (bounds the shared memory used), None for no bound
+    :param slices: number of slices fetched concurrently
+    :param es: Elasticsearch client (or any object with the same interface), None to connect to host:port
+    :param metrics: metrics of the fetching stage (see cachesim.metrics.StageMetrics), None if not collected
+    """
+
+    # Requests from ES cluster
+    if es is None: es = connect_elasticsearch(host, port)
+
+    # End of task if the indices does not exist in ES 
+    if not es.indices.exists(index=index_name, allow_no_indices=False):
+        fail_message("Query failed: the index does not exist in Elasticsearch")
+        q.send(None)
+        q.close()
+        return
+
+    stop = threading.Event()
+    outs = [queue.Queue(maxsize=2) for _ in range(slices)] # pages fetched in advance by every slice
+    fetchers = [threading.Thread(target=es_scroll_slice, args=(es, index_name, search_size, slice_id, slices, out, stop), daemon=True) for slice_id, out in enumerate(outs)]
+    for fetcher in fetchers:
+        fetcher.start()
+
+    def next_page(slice_id):
+        page = outs[slice_id].get()
+        if isinstance(page, Exception): raise page
+        return page
+
+    try:
+        total = sum(next_page(slice_id) for slice_id in range(slices))
+        print("Total number of logs: ", total)
+        print("Count API: ", es.count(index=index_name)['count'])
+        if (total != es.count(index=index_name)['count']):
+            fail_message("Query failed: the total number of logs that can be fetched is not consistent (number of results should be " + str(es.count(index=index_name)['count']) + " but the search returned " + str(total) + " documents)")
+            return
+
+        pending = {} # key: slice id, value: columns of the logs fetched and not merged yet (never empty)
+        for slice_id in range(slices):
+            page = next_page(slice_id)
+            if page is not None: pending[slice_id] = page.columns()
+        merged = [] # columns merged and not sent yet
+        merged_size = 0
+        total_processed = 0
+        while len(pending) > 0 and (stop_after == -1 or stop_after > total_processed):
+            # every log older than the last one fetched by each slice can be merged: the slices are sorted
+            watermark = min(columns["timestamp"][-1] for columns in pending.values())
+            parts = []
+            for slice_id in sorted(pending):
+                columns = pending[slice_id]
+                cut = np.searchsorted(columns["timestamp"], watermark, side='right')
+                parts.append({column: values[:cut] for column, values in columns.items()})
+                if cut < len(columns["timestamp"]):
+                    pending[slice_id] = {column: values[cut:] for column, values in columns.items()}
+                else:
+                    page = next_page(slice_id)
+                    if page is None: del pending[slice_id]
+                    else: pending[slice_id] = page.columns()
+            part = {column: np.concatenate([columns[column] for columns in parts]) for column, _ in COLUMNS}
+            order = np.argsort(part["timestamp"], kind='stable')
+            merged.append({column: values[order] for column, values in part.items()})
+            merged_size += len(order)
+
+            # send the merged logs by batches of search_size
+            while merged_size >= search_size or (len(pending) == 0 and merged_size > 0):
+                columns = {column: np.concatenate([part[column] for part in merged]) for column, _ in COLUMNS}
+                send_columns(q, {column: values[:search_size] for column, values in columns.items()}, slots, metrics=metrics)
+                total_processed += min(search_size, merged_size)
+                merged_size = max(0, merged_size - search_size)
+                merged = [{column: values[search_size:] for column, values in columns.items()}]
+                if stop_after != -1 and stop_after <= total_processed: break
+    except Exception as error:
+        fail_message("Query failed: " + repr(error))
+    finally:
+        stop.set()
+        for fetcher in fetchers:
+            fetcher.join()
+        print("End of query")
+        q.send(None)
+        q.close()
+
+
+def trace_query(q, directory, search_size=10000, stop_after=-1, slots=None, start=0, metrics=None):
+    """
+    Replay the logs from a trace exported on the disk (see es_export_trace) instead of querying Elasticsearch. The trace
+    is memory-mapped and sent to the main process in batches, exactly like es_query_scroll does.
+    :param q: multiprocessing queue used to send the logs' data (batch descriptors) to the main process
+    :param directory: directory of the trace
+    :param search_size: number of documents of each batch
+    :param stop_after: the replay stop after this number of data processed, -1 for not setting any limit
+    :param slots: semaphore acquired for every batch sent and released by the receiver once the batch is unlinked (bounds the shared memory used), None for no bound
+    :param start: number of logs already processed to resume a replay (cursor of the last batch processed), 0 to start from the first log
+    :param metrics: metrics of the fetching stage (see cachesim.metrics.StageMetrics), None if not collected
+    """
+    header = read_header(directory)
+    print("Total number of logs: ", header["rows"])
+
+    total_processed = 0
+    for batch in read_trace(directory, search_size, start):
+        if stop_after != -1 and stop_after <= total_processed: break
+        send_columns(q, batch.columns(), slots, batch.cursor, metrics)
+        total_processed += len(batch)
+
+    print("End of replay")
+    q.send(None)
+    q.close()
+
+
+def pagination_query(pagination_technique):
+    """
+    Function fetching the logs from Elasticsearch with a pagination technique.
+    :param pagination_technique: 'Scroll', 'Search_after' or 'Sliced_scroll' (case insensitive, the words separated by '_', '-' or nothing)
+    :return: es_query_scroll, es_query_search_after or es_query_sliced_scroll
+    """
+    queries = {"scroll": es_query_scroll, "searchafter": es_query_search_after, "slicedscroll": es_query_sliced_scroll}
+    query = queries.get(pagination_technique.lower().replace("-", "").replace("_", ""))
+    if query is None:
+        raise ValueError(f"Pagination technique is invalid (should be scroll, search_after or sliced_scroll): '{pagination_technique}' received!")
+    return query
+
+
+def es_export_trace(index_name, host, port, directory, search_size=10000, stop_after=-1, pagination_technique="Scroll"):
+    """
+    Fetch the logs data from Elasticsearch once and write them on the disk (see cachesim.trace.TraceWriter), every page
+    of results becomes a chunk of the trace. The trace can then be replayed with trace_query, without Elasticsearch.
+    :param index_name: name of the ES index (or index pattern) used for running the search
+    :param host: IP address of ES instance
+    :param port: port of ES instance
+    :param directory: directory of the trace, must not hold a trace already
+    :param search_size: number of documents returned by each individual search (by default limited to 10,000 in ES)
+    :param stop_after: the search stop after this number of data processed, -1 for not setting any limit
+    :param pagination_technique: pagination technique used for paginating the results: 'Scroll', 'Search_after' or 'Sliced_scroll'
+    :return: header of the trace written
+    """
+    query = pagination_query(pagination_technique)
+    parent_query, child_query = mp.Pipe()
+    fetcher = threading.Thread(target=query, args=(child_query, index_name, host, port, search_size, stop_after))
+    fetcher.start()
+    with TraceWriter(directory, source=index_name) as writer:
+        for batch in receive_batches(parent_query):
+            writer.append(batch)
+    fetcher.join()
+    return read_header(directory)
+
+
+def cache_simulation(batch, maxage, cache):
     """
     Search results data are sent to the simulation.
 
-    :param search_results: multiprocessing queue used to send the logs' data to the main process
+    :param batch: logs' data (TraceBatch)
     :param maxage: default maxage used if not indicated in HTTP cache header
     :param cache: cache used for the simulation
+    :return: status code (see Status.code) of every request of the batch, uint8 array (the groups and sizes of the objects are the columns of the batch)
+    """
+    # the whole batch is placed at once (default value if maxage is not indicated)
+    return cache.recv_batch(batch.timestamp, batch.path, batch.size, batch.maxages(maxage), batch.livechannel, ReplayObj)
+
+
+def stack_simulation(batch, maxage, simulator):
+    """
+    Search results data are sent to the LRU stack simulation (every cache size at once).
+
+    :param batch: logs' data (TraceBatch)
+    :param maxage: default maxage used if not indicated in HTTP cache header
+    :param simulator: LRUStackSimulator used for the simulation
+    :return: for every cache size of the simulator, the same result as cache_simulation
+    """
+    objs = [ReplayObj(path, size, obj_maxage, group) for path, size, obj_maxage, group in zip(batch.path.tolist(), batch.size.tolist(), batch.maxages(maxage).tolist(), batch.livechannel.tolist())]
+    return simulator.simulate(batch.timestamp.tolist(), objs)
+
+
+def analyzer_message(batch):
+    """
+    Columns of a batch sent to the analyzers with the status codes of every cache: [timestamps, group ids, sizes].
+    The columns are copied once (the batch can be released before the queues send them) and shared by the messages
+    of every cache.
+
+    :param batch: logs' data (TraceBatch)
+    """
+    return [batch.timestamp.copy(), batch.livechannel.copy(), batch.size.copy()]
+
+
+def cache_worker(q, caches, maxage):
+    """
+    Simulation process owning some caches for the whole run. Each batch of logs received is replayed on every cache
+    owned and the results are sent back, the caches are sent back once the data are over.
+
+    :param q: pipe connection used to receive the logs' data (TraceBatch descriptors, None at the end) and to send back the results: for each batch the timestamp of the last log and the result of cache_simulation for every cache, at the end the caches (also sent back when "checkpoint" is received)
+    :param caches: caches simulated by this process
+    :param maxage: default maxage used if not indicated in HTTP cache header
     """
-    status_list=[] # list of status (hit, miss or pass) corresponding to the decisions made by the simulator
-    group_ids=[] # list of the group of the object (for example movie identifier), group_ids[i] is the group of the object corresponding to the decision stored in status_list[i]
-    sizes = [] # list of the sizes of the objects, sizes[i] is the size of the object corresponding to the decision stored in status_list[i]
-    for log in search_results:
-        if log["_source"]["livechannel"] is None: log["_source"]["livechannel"] = -1 # Default value if livechannel is not indicated
-        if isinstance(log["_source"]["maxage"], int): obj = Obj(int(log["_source"]["path"]), int(log["_source"]["contentlength"]), int(log["_source"]["maxage"]), int(log["_source"]["livechannel"]))
-        else: obj = Obj(int(log["_source"]["path"]), int(log["_source"]["contentlength"]), maxage, int(log["_source"]["livechannel"])) # default value if maxage is not indicated
-        status_list.append(cache.recv(float(log["fields"]["@timestamp"][0]), obj)) # keep trace of the status result from the cache simulation
-        sizes.append(obj.size_not_fetched)
-        group_ids.append(obj.group)
-    return [status_list, group_ids, sizes]
\ No newline at end of file
+    descriptor = q.recv()
+    while descriptor is not None:
+        if descriptor == "checkpoint":
+            q.send(caches)
+            descriptor = q.recv()
+            continue
+        batch = TraceBatch.attach(descriptor)
+        q.send([float(batch.timestamp[-1]), [cache_simulation(batch, maxage, cache) for cache in caches]])
+        batch.close()
+        descriptor = q.recv()
+    q.send(caches)
+    q.close()
+
+
+class FakeElasticsearch:
+    """
+    Local stand-in for the Elasticsearch client, serving a list of documents to the sliced scroll (the documents are
+    distributed between the slices by position, like ES does by _id).
+    """
+
+    class Indices:
+        def exists(self, index, allow_no_indices=False):
+            return True
+
+    def __init__(self, documents):
+        """
+        :param documents: fields of every document (key: name of the field, value: list of values like doc values).
+        """
+        self.indices = self.Indices()
+        self.documents = documents
+        self.searches = [] # parameters of the searches received
+        self.scrolls = {} # key: scroll id, value: documents not returned yet
+        self.lock = threading.Lock()
+
+    def search(self, index, scroll, size, sort, filter_path, slice=None, **parameters):
+        self.searches.append(dict(parameters, filter_path=filter_path, slice=slice))
+        documents = [fields for i, fields in enumerate(self.documents) if slice is None or i % slice["max"] == slice["id"]]
+        documents.sort(key=lambda fields: float(fields["@timestamp"][0]))
+        with self.lock:
+            sid = str(len(self.scrolls))
+            self.scrolls[sid] = (documents, size)
+        page = self.__page(sid)
+        page["hits"] = dict(page.get("hits", {}), total={"value": len(documents)})
+        return page
+
+    def scroll(self, scroll_id, scroll, filter_path):
+        return self.__page(scroll_id, consume=True)
+
+    def __page(self, sid, consume=False):
+        documents, size = self.scrolls[sid]
+        if consume:
+            documents = documents[size:]
+            self.scrolls[sid] = (documents, size)
+        page = {"_scroll_id": sid}
+        if len(documents) > 0: page["hits"] = {"hits": [{"fields": fields} for fields in documents[:size]]}
+        return page
+
+    def clear_scroll(self, scroll_id):
+        del self.scrolls[scroll_id]
+
+    def count(self, index):
+        return {"count": len(self.documents)}
+
+
+class TestTransport(unittest.TestCase):
+
+    def test_send_receive(self):
+        # 6 batches sent through a pipe with 2 slots: the columns are received unchanged, at most 2 batches are in flight
+        # and every block is destroyed once released
+        sent = [{"timestamp": np.arange(10.0) + 10 * i, "path": np.arange(10) + i, "size": np.full(10, 100 + i), "maxage": np.full(10, 300), "livechannel": np.full(10, i % 3)} for i in range(6)]
+        parent_query, child_query = mp.Pipe()
+        slots = mp.Semaphore(2)
+        progress = [0]  # batches sent
+
+        def sender():
+            for i, columns in enumerate(sent):
+                send_columns(child_query, columns, slots, cursor=i + 1)
+                progress[0] += 1
+            child_query.send(None)
+
+        fetcher = threading.Thread(target=sender)
+        fetcher.start()
+        descriptors = []
+        for i, batch in enumerate(receive_batches(parent_query, slots)):
+            time.sleep(0.05)  # let the sender fill the free slots
+            self.assertLessEqual(progress[0], i + 2)  # the batches before i are released
+            descriptors.append(batch.descriptor())
+            self.assertEqual(batch.cursor, i + 1)
+            for column, _ in COLUMNS:
+                np.testing.assert_array_equal(getattr(batch, column), sent[i][column])
+        fetcher.join()
+        self.assertEqual(len(descriptors), 6)
+        for descriptor in descriptors:
+            self.assertRaises(FileNotFoundError, TraceBatch.attach, descriptor)
+
+
+class TestCacheWorker(unittest.TestCase):
+
+    def test_cache_worker(self):
+        # a worker process owning two caches replays 3 batches, is checkpointed after the second one and stopped
+        from cachesim import LRUCache, ProtectedFIFOCache
+        rng = np.random.default_rng(0)
+        batches = [TraceBatch.from_columns({"timestamp": np.arange(100.0) + 100 * i, "path": rng.integers(0, 40, 100), "size": rng.integers(10, 200, 100),
+                                            "maxage": np.where(rng.random(100) < 0.2, MAXAGE_UNKNOWN, 300), "livechannel": np.full(100, -1)}, shared=True) for i in range(3)]
+        references = [LRUCache(2000), ProtectedFIFOCache(3000)]
+        parent_worker, child_worker = mp.Pipe()
+        worker = mp.Process(target=cache_worker, args=(child_worker, [LRUCache(2000), ProtectedFIFOCache(3000)], 60))
+        worker.start()
+        try:
+            for i, batch in enumerate(batches):
+                parent_worker.send(batch.descriptor())
+                timestamp, codes = parent_worker.recv()
+                self.assertEqual(timestamp, batch.timestamp[-1])
+                for cache_codes, reference in zip(codes, references):
+                    np.testing.assert_array_equal(cache_codes, reference.recv_batch(batch.timestamp, batch.path, batch.size, batch.maxages(60), batch.livechannel))
+                if i == 1:
+                    parent_worker.send("checkpoint")
+                    self.assertEqual([cache.used_bytes for cache in parent_worker.recv()], [cache.used_bytes for cache in references])
+            parent_worker.send(None)
+            caches = parent_worker.recv()
+            worker.join(10)
+            self.assertEqual(worker.exitcode, 0)
+            self.assertEqual([(type(cache), sorted(cache._index)) for cache in caches], [(type(cache), sorted(cache._index)) for cache in references])
+        finally:
+            for batch in batches:
+                batch.close()
+                batch.unlink()
+
+
+class TestPagination(unittest.TestCase):
+
+    def test_pagination_query(self):
+        for names, query in ((["Scroll", "scroll"], es_query_scroll), (["Search_after", "search-after", "searchafter", "SearchAfter"], es_query_search_after),
+                             (["Sliced_scroll", "sliced-scroll", "slicedscroll"], es_query_sliced_scroll)):
+            for name in names:
+                self.assertIs(pagination_query(name), query, name)
+        with self.assertRaisesRegex(ValueError, "scroll, search_after or sliced_scroll"):
+            pagination_query("point_in_time")
+        with self.assertRaises(ValueError):
+            es_export_trace("index", None, None, "unused", pagination_technique="searchbefore")
+
+
+class TestSlicedScroll(unittest.TestCase):
+
+    def setUp(self):
+        self.documents = []
+        for i in range(100):
+            fields = {"@timestamp": [str(1000 + (i * 37 % 100) / 4)], "path": [i % 13], "contentlength": [100 + i]}
+            if i % 3: fields["maxage"] = [300]
+            if i % 2: fields["livechannel"] = [i % 5]
+            self.documents.append(fields)
+
+    def fetch(self, **parameters):
+        parent_query, child_query = mp.Pipe()
+        fetcher = threading.Thread(target=es_query_sliced_scroll, args=(child_query, "index", None, None), kwargs=parameters)
+        fetcher.start()
+        batches = [batch.copy() for batch in receive_batches(parent_query)]
+        fetcher.join()
+        return batches
+
+    def test_sliced_scroll(self):
+        es = FakeElasticsearch(self.documents)
+        batches = self.fetch(search_size=7, slices=3, es=es)
+        self.assertEqual([len(batch) for batch in batches], [7] * 14 + [2])
+        timestamps = np.concatenate([batch.timestamp for batch in batches])
+        self.assertEqual(timestamps.tolist(), sorted(float(fields["@timestamp"][0]) for fields in self.documents))
+        expected = {float(fields["@timestamp"][0]): fields for fields in self.documents}
+        for batch in batches:
+            for timestamp, path, size, maxage, livechannel in zip(*(getattr(batch, column).tolist() for column, _ in COLUMNS)):
+                fields = expected[timestamp]
+                self.assertEqual((path, size), (fields["path"][0], fields["contentlength"][0]))
+                self.assertEqual(maxage, fields["maxage"][0] if "maxage" in fields else MAXAGE_UNKNOWN)
+                self.assertEqual(livechannel, fields["livechannel"][0] if "livechannel" in fields else -1)
+        self.assertEqual(len(es.searches), 3)
+        self.assertTrue(all(search["_source"] is False and search["filter_path"] == FILTER_PATH for search in es.searches))
+        self.assertEqual(es.scrolls, {}) # every scroll is cleared
+
+    def test_stop_after(self):
+        es = FakeElasticsearch(self.documents)
+        batches = self.fetch(search_size=10, stop_after=25, slices=4, es=es)
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 10])
+        self.assertEqual(es.scrolls, {})
@@ -1,18 +1,66 @@
 import multiprocessing as mp
-from itertools import repeat
-from multiprocessing import Pool
+from multiprocessing import resource_tracker
+import numpy as np
+import os
+import shutil
+import tempfile
 import time
 
-from cachesim import FIFOCache, ProtectedFIFOCache, Clairvoyant, Analyzer,  LFUCache, LSOCache, RANCache, LRUCache, SSOCache
-from cachesim import load
-from logs_replayer import *
+from cachesim import FIFOCache, ProtectedFIFOCache, Clairvoyant, Analyzer,  LFUCache, LSOCache, RANCache, LRUCache, SSOCache, SpatialSampler
+from cachesim import load, sweep
+from cachesim.checkpoint import save_checkpoint, load_checkpoint
+from cachesim.metrics import PipelineMetrics, StageMetrics, MetricsReporter, run_stage
+from cachesim.trace import next_access_times, read_trace
+from logs_replayer import ReplayObj, analyzer_message, cache_simulation, cache_worker, es_export_trace, es_query_search_after, fail_message, pagination_query, receive_batches, stack_simulation, trace_query
 
 import warnings
 warnings.filterwarnings('ignore', 'Elasticsearch built-in security.*', ) # Ignore ES security warning
 
 
 
-def processes_coordination_single_simulation(index_name, host, port, default_maxage=0, pagination_technique="Scroll", stop_after=-1, clairvoyant=False):
+def fetching_process(child_query, index_name, host, port, search_size, stop_after, slots, pagination_technique="Scroll", trace=None, cursor=None, metrics=None):
+    """
+    Create the process in charge of fetching the data (from elasticsearch or from a trace on the disk), see the
+    processes_coordination functions for the parameters.
+
+    :param cursor: cursor of the last batch processed to resume from (trace or search_after only, see TraceBatch.cursor), None to start from the first log
+    :param metrics: metrics of the fetching stage (see cachesim.metrics.StageMetrics), None if not collected
+    :return: the process (not started), None if the pagination technique is invalid
+    """
+    if trace is not None:
+        target, args = trace_query, (child_query, trace, search_size,stop_after,slots,cursor or 0)
+    else:
+        try:
+            target = pagination_query(pagination_technique)
+        except ValueError as error:
+            fail_message(f"{error} Please change parameter in main function")
+            return None
+        args = (child_query, index_name, host, port, search_size,stop_after,slots) + ((cursor,) if target is es_query_search_after else ())
+    if metrics is None: return mp.Process(target=target, args=args)
+    return mp.Process(target=run_stage, args=(metrics, target) + args) # the fetching stage is marked as finished at the end of the process
+
+
+def trace_next_access_times(trace, search_size, stop_after=-1):
+    """
+    Compute the next access time of every request of a trace on the disk replayed by trace_query (same batches, same
+    stop), for the clairvoyant cache. Only the timestamps and paths are read from the memory-mapped chunks.
+
+    :param trace: directory of the trace (see es_export_trace)
+    :param search_size: number of documents of each batch replayed
+    :param stop_after: -1 for the whole trace, other values stop after the batch reaching this number of requests (see trace_query)
+    :return: list of the next access times of the requests replayed (see next_access_times)
+    """
+    timestamps, paths, total = [], [], 0
+    for batch in read_trace(trace, search_size):
+        if stop_after != -1 and stop_after <= total: break
+        timestamps.append(batch.timestamp)
+        paths.append(batch.path)
+        total += len(batch)
+    if total == 0: return []
+    return next_access_times(np.concatenate(timestamps).tolist(), np.concatenate(paths).tolist())
+
+
+def processes_coordination_single_simulation(index_name, host, port, default_maxage=0, pagination_technique="Scroll", stop_after=-1, clairvoyant=False, batches_in_flight=4, trace=None):
     """
     Manage and coordinate the processes. Only one simulation can be done at the same time (see processes_coordination_parallel for running parallel simulations).
     This function is in charge of creating the processes, establishing the communication of the data between the processes and terminating them.
@@ -21,14 +69,16 @@ def processes_coordination_single_simulation(index_name, host, port, default_max
     :param host: IP address of ES instance
     :param port: port of ES instance
     :param default_maxage: default maxage value if not indicated in HTTP cache header
-    :param pagination_technique: pagination technique used for paginating the results: 'Scroll' or 'Search_after'
+    :param pagination_technique: pagination technique used for paginating the results: 'Scroll', 'Search_after' or 'Sliced_scroll' (slices fetched concurrently)
     :param stop_after: -1 means that we iterate over the whole index, other values stop the program after the number indicated (for example 100 to run the program only on the 100 first values from the index)
     :param clairvoyant: true if clairvoyant cache is used, false otherwise (warning: clairvoyant cannot be mixed with other type of caches as it requires knowledge of the future)
+    :param batches_in_flight: maximum number of batches fetched in advance (in shared memory)
+    :param trace: directory of a trace exported on the disk (see es_export_trace) replayed instead of querying Elasticsearch, None to query Elasticsearch (the clairvoyant cache exports the logs in a temporary trace first)
     """
 
     # create cache
-    cache = Clairvoyant(10000, connect_elasticsearch(host, port), index_name)
-    # cache = LSOCache(10000, write_log=True)
+    cache = Clairvoyant(10000) if clairvoyant else LSOCache(10000, write_log=True)
+    cache_name = "Clairvoyant" if clairvoyant else "LSO"
 
     # define objects
     # x = Obj('x', 1000, 300)
@@ -48,46 +98,49 @@ def processes_coordination_single_simulation(index_name, host, port, default_max
 
     search_size=1000 # number of documents returned by each individual search
 
-     # create the pipe and process in charge of fetching the data from elasticsearch
+    exported = None # temporary trace exported for the clairvoyant cache, removed at the end
+    if clairvoyant:
+        # the clairvoyant cache needs the next access time of every request: the logs are replayed from a trace on the disk, walked once beforehand to compute them
+        if trace is None:
+            exported = trace = tempfile.mkdtemp(prefix="trace_")
+            es_export_trace(index_name, host, port, trace, stop_after=stop_after, pagination_technique=pagination_technique)
+            stop_after = -1 # already applied to the trace
+        next_accesses = trace_next_access_times(trace, search_size, stop_after)
+        position = 0 # position of the first request of the batch in the whole trace
+
+     # create the pipe and process in charge of fetching the data from elasticsearch (the batches are exchanged in shared memory, at most batches_in_flight at the same time)
+    resource_tracker.ensure_running() # the shared memory blocks are created and destroyed by different processes: they must share the same tracker
+    slots = mp.Semaphore(batches_in_flight)
     parent_query, child_query = mp.Pipe()
-    if pagination_technique.lower()=="scroll":
-        p_query = mp.Process(target=es_query_scroll, args=(child_query, index_name, host, port, search_size,stop_after))
-    elif pagination_technique.lower() in ["search-after", "search_after", "searchafter"]:
-        p_query = mp.Process(target=es_query_search_after, args=(child_query, index_name, host, port, search_size,stop_after,))
-    else:
-        fail_message("Pagination technique is invalid (should be scroll or search_after): please change parameter in main function")
-        return 
+    p_query = fetching_process(child_query, index_name, host, port, search_size, stop_after, slots, pagination_technique, trace)
+    if p_query is None: return
 
     # create the queue and process in charge of analyzing the data resulting from the cache simulation
     analyzer_queue = mp.Queue()
-    p_analyzer_clairvoyant = mp.Process(target=Analyzer, args=(analyzer_queue,1,1000,3600,True,True,"CHR_Clairvoyant_time", "CHR_Clairvoyant_regular", "CHR_Clairvoyant_final","CHR_Clairvoyant_movies", "trafic_served_from_cache_Clairvoyant",))
-    # p_analyzer = mp.Process(target=Analyzer, args=(analyzer_queue,1,1000,3600, True,True,"CHR_LSO_time", "CHR_LSO_regular", "CHR_LSO_final", "CHR_LSO_movies", "trafic_served_from_cache_LSO",))
+    p_analyzer = mp.Process(target=Analyzer, args=(analyzer_queue,1,1000,3600,True,True,f"CHR_{cache_name}_time", f"CHR_{cache_name}_regular", f"CHR_{cache_name}_final", f"CHR_{cache_name}_movies", f"trafic_served_from_cache_{cache_name}",))
 
     # start the processes
     p_query.start()
-    p_analyzer_clairvoyant.start()
-    # p_analyzer.start()
+    p_analyzer.start()
 
     # receive the data from the process running the es queries, send them to the process in charge of the cache simulation and send the simulation data to the analyzer
-    search_results = parent_query.recv() # data are received from the process fetching es data
-    while search_results is not None:
-        status_list=[] # list of status (hit, miss or pass) corresponding to the decisions made by the simulator
-        group_ids=[] # list of the group of the object (for example movie identifier), group_ids[0] is the group of the object corresponding to the decision stored in status_list[0]
-        for log in search_results:
-            if log["_source"]["livechannel"] is None: log["_source"]["livechannel"] = -1
-            if isinstance(log["_source"]["maxage"], int): obj = Obj(int(log["_source"]["path"]), int(log["_source"]["contentlength"]), int(log["_source"]["maxage"]), int(log["_source"]["livechannel"]))
-            else: obj = Obj(int(log["_source"]["path"]), int(log["_source"]["contentlength"]), default_maxage, int(log["_source"]["livechannel"])) # default value if maxage is not indicated (300)
-            if clairvoyant: status_list.append(cache.recv(float(log["fields"]["@timestamp"][0]), log["_id"], obj))
-            else: status_list.append(cache.recv(float(log["fields"]["@timestamp"][0]), obj))
-            group_ids.append(obj.group)
-        analyzer_queue.put([float(search_results[-1]["fields"]["@timestamp"][0]), status_list, group_ids]) # last timestamp and list of status are sent to the analyzer at the end of the request
-        search_results = parent_query.recv() # data are received from the process fetching es data
+    for batch in receive_batches(parent_query, slots): # data are received from the process fetching es data
+        if clairvoyant:
+            codes = cache.recv_batch(batch.timestamp, batch.path, batch.size, batch.maxages(default_maxage), batch.livechannel, ReplayObj, next_accesses=next_accesses[position:position + len(batch)])
+            position += len(batch)
+        else:
+            codes = cache_simulation(batch, default_maxage, cache)
+        timestamps, group_ids, sizes = analyzer_message(batch) # the batch is released, the columns are copied
+        analyzer_queue.put([timestamps, codes, group_ids, sizes]) # time of the requests and status codes are sent to the analyzer at the end of the request
 
     analyzer_queue.put(None) # notify to the analyzer the end of the incoming data
+    if exported is not None:
+        p_query.join()
+        shutil.rmtree(exported)
 
 
 
-def processes_coordination_parallel(index_name, host, port, default_maxage=0, pagination_technique="Scroll", stop_after=-1):
+def processes_coordination_parallel(index_name, host, port, default_maxage=0, pagination_technique="Scroll", stop_after=-1, workers=None, batches_in_flight=4, trace=None, sweep_file=None, checkpoint=None, checkpoint_interval=3600, profile=False, metrics_interval=None, metrics_port=None):
     """
     Manage and coordinate every processes used for running for this program (elasticsearch fetching process, cache simulation processes, analyzer processes).
     This function is in charge of creating the processes, establishing the communication of the data between the processes and terminating them.
@@ -96,11 +149,26 @@ def processes_coordination_parallel(index_name, host, port, default_maxage=0, pa
     :param host: IP address of ES instance
     :param port: port of ES instance
     :param default_maxage: default maxage value if not indicated in HTTP cache header
-    :param pagination_technique: pagination technique used for paginating the results: 'Scroll' or 'Search_after'
+    :param pagination_technique: pagination technique used for paginating the results: 'Scroll', 'Search_after' or 'Sliced_scroll' (slices fetched concurrently)
     :param stop_after: -1 means that we iterate over the whole index, other values stop the program after the number indicated (for example 100 to run the program only on the 100 first values from the index)
+    :param workers: number of cache simulation processes (each one owns a part of the caches for the whole run, balanced by estimated cost), None for the workers of the sweep or every available core (see sweep.default_workers)
+    :param batches_in_flight: maximum number of batches fetched in advance (in shared memory)
+    :param trace: directory of a trace exported on the disk (see es_export_trace) replayed instead of querying Elasticsearch, None to query Elasticsearch
+    :param sweep_file: sweep file describing the caches simulated and their analyzers (see sweep.read_sweep), None for one protected cache of each policy
+    :param checkpoint: checkpoint file (caches, analyzers and position in the logs) written periodically, the simulation resumes from it if it exists and it is removed at the end of the simulation, None for no checkpoint (trace or search_after pagination only)
+    :param checkpoint_interval: minimum time between two checkpoints (in seconds)
+    :param profile: True to profile the requests to every cache (time of every phase, evictions), the profiles are written with the results of the analyzers (CHR_<cache>_profile.json)
+    :param metrics_interval: time between two snapshots of the metrics of the stages of the simulation (documents/s, bytes/s, time blocked, backlog of every stage, see cachesim.metrics) written in metrics.jsonl (in seconds), None for no metrics
+    :param metrics_port: port of a local HTTP endpoint serving the last snapshot of the metrics, None for no endpoint
     """
     
-    caches = load.one_each_cache(10000)
+    if sweep_file is None:
+        caches = load.one_each_cache(10000)
+    else:
+        description = sweep.read_sweep(sweep_file)
+        cells = sweep.expand(description)
+        caches = [cell.cache() for cell in cells]
+        workers = workers or description.get("workers")
 
     
     # define objects
@@ -121,48 +189,187 @@ def processes_coordination_parallel(index_name, host, port, default_maxage=0, pa
 
     search_size=100000 # number of documents returned by each individual search
 
-    # create the pipe and process in charge of fetching the data from elasticsearch
+    analyzer_pool = load.one_each_analyzers() if sweep_file is None else sweep.sweep_analyzers(cells, description) # one analyzer stream for each cache, every stream is analyzed by the same process
+
+    assert len(caches) == len(analyzer_pool), f"The number of caches should be equal to the number of analyzers!"
+
+    # resume from the last checkpoint: the caches, the analyzers and the position in the logs are restored
+    source = trace if trace is not None else index_name
+    resumed = None
+    if checkpoint is not None:
+        assert trace is not None or pagination_technique.lower() in ["search-after", "search_after", "searchafter"], f"Checkpoints require a trace or the search_after pagination (a scroll cannot be resumed)."
+        resumed = load_checkpoint(checkpoint)
+    if resumed is not None:
+        assert resumed["source"] == source and resumed["streams"] == analyzer_pool.names, f"The checkpoint {checkpoint} was written by another simulation."
+        caches = resumed["caches"]
+        if stop_after != -1: stop_after = max(0, stop_after - resumed["rows"])
+        print("Resume after log", resumed["rows"])
+    rows = 0 if resumed is None else resumed["rows"] # number of logs processed
+    last_checkpoint = time.time()
+
+    # metrics of the stages of the simulation: fetching process -> simulation (this process and the cache simulation processes) -> analyzer processes
+    metrics, reporter = None, None
+    if metrics_interval is not None or metrics_port is not None:
+        metrics = PipelineMetrics(dict({"fetch": None, "simulation": "fetch"}, **{stage: "simulation" for stage in analyzer_pool.stages}))
+        reporter = MetricsReporter(metrics, "metrics" if metrics_interval is not None else None, metrics_interval or 60, metrics_port)
+    simulation_metrics = StageMetrics() if metrics is None else metrics.stage("simulation")
+
+    # create the pipe and process in charge of fetching the data from elasticsearch (the batches are exchanged in shared memory, at most batches_in_flight at the same time)
+    resource_tracker.ensure_running() # the shared memory blocks are created and destroyed by different processes: they must share the same tracker
+    slots = mp.Semaphore(batches_in_flight)
     parent_query, child_query = mp.Pipe()
-    if pagination_technique.lower()=="scroll":
-        p_query = mp.Process(target=es_query_scroll, args=(child_query, index_name, host, port, search_size,stop_after))
-    elif pagination_technique.lower() in ["search-after", "search_after", "searchafter"]:
-        p_query = mp.Process(target=es_query_search_after, args=(child_query, index_name, host, port, search_size,stop_after,))
-    else:
-        fail_message("Pagination technique is invalid (should be scroll or search_after): please change parameter in main function")
-        return 
-
-    analyzer_queues, p_analyzers = load.one_each_analyzers()
-
-    assert len(caches) == len(analyzer_queues) == len(p_analyzers), f"The number of caches should be equal to the number of analyzers!"
+    p_query = fetching_process(child_query, index_name, host, port, search_size, stop_after, slots, pagination_technique, trace, None if resumed is None else resumed["cursor"], None if metrics is None else metrics.stage("fetch"))
+    if p_query is None: return
     
     # start the processes
     p_query.start()
+    if reporter is not None: reporter.start()
 
     
     # receive the data from the process running the es queries, send them to the process in charge of the cache simulation and send the simulation data to the analyzer
-    search_results = parent_query.recv() # data are received from the process fetching es data
+    batches = receive_batches(parent_query, slots, simulation_metrics) # data are received from the process fetching es data
+    batch = next(batches, None)
     
-    if search_results is None:
+    if batch is None:
         fail_message("Search failed (no search result returned): end of program")
+        if reporter is not None: reporter.stop()
         return 
 
-    for analyzer_process in p_analyzers:
-        analyzer_process.start()
+    analyzer_pool.start(None if resumed is None else resumed["analyzers"], metrics)
+
+    if profile:
+        for cache in caches: cache.enable_profiling() # kept when resuming from a checkpoint of a profiled simulation
+
+    # create the cache simulation processes: the caches are distributed between the processes by estimated cost and stay in the same process for the whole run
+    caches_ids = sweep.schedule([sweep.cache_cost(cache) for cache in caches], workers)
+    parent_workers = []
+    for worker_caches_ids in caches_ids:
+        parent_worker, child_worker = mp.Pipe()
+        p_worker = mp.Process(target=cache_worker, args=(child_worker, [caches[index] for index in worker_caches_ids], default_maxage))
+        p_worker.start()
+        parent_workers.append(parent_worker)
+
+    while batch is not None:
+
+        # Run all the cache simulations in parallel: only the descriptor of the batch (in shared memory) is sent to every simulation process
+        for parent_worker in parent_workers:
+            parent_worker.send(batch.descriptor())
+
+        # Send results to the analyzers (one individual analyzer stream for each simulation)
+        timestamps, group_ids, sizes = analyzer_message(batch) # the batch is released before the analyzer queue sends the data
+        codes = {}
+        for parent_worker, worker_caches_ids in zip(parent_workers, caches_ids):
+            _, codes_caches = parent_worker.recv()
+            for index, cache_codes in zip(worker_caches_ids, codes_caches):
+                codes[analyzer_pool.names[index]] = cache_codes
+        with simulation_metrics.blocked("send"): # the queues of the analyzers are bounded: waits while an analyzer is behind
+            analyzer_pool.put(timestamps, group_ids, sizes, codes) # time of the requests, group ids and sizes of the objects are sent once with the status codes of every simulation
+
+        # Periodic checkpoint, once every cache and analyzer has processed the batch
+        rows += len(batch)
+        if checkpoint is not None and time.time() - last_checkpoint >= checkpoint_interval:
+            checkpoint_caches = list(caches)
+            for parent_worker, worker_caches_ids in zip(parent_workers, caches_ids):
+                parent_worker.send("checkpoint")
+                for index, cache in zip(worker_caches_ids, parent_worker.recv()):
+                    checkpoint_caches[index] = cache
+            save_checkpoint(checkpoint, {"source": source, "streams": analyzer_pool.names, "cursor": batch.cursor, "rows": rows, "caches": checkpoint_caches, "analyzers": analyzer_pool.checkpoint()})
+            last_checkpoint = time.time()
+
+        batch = next(batches, None) # data are received from the process fetching es data (the previous batch is destroyed)
+
+    # stop the cache simulation processes and get back the final state of the caches
+    for parent_worker, worker_caches_ids in zip(parent_workers, caches_ids):
+        parent_worker.send(None)
+        for index, cache in zip(worker_caches_ids, parent_worker.recv()):
+            caches[index] = cache
+    if profile: analyzer_pool.put_profiles({name: cache.profiling.snapshot(cache) for name, cache in zip(analyzer_pool.names, caches)})
+
+    simulation_metrics.finish()
+    analyzer_pool.close() # notify to the analyzers the end of the incoming data
+    if reporter is not None: reporter.stop()
+    if checkpoint is not None and os.path.exists(checkpoint): os.remove(checkpoint) # the simulation is complete
+    return caches
+
+
+def processes_coordination_LRU_stack(index_name, host, port, default_maxage=0, pagination_technique="Scroll", stop_after=-1, batches_in_flight=4, trace=None):
+    """
+    Simulate the LRU caches of every size (see load.CACHE_SIZES) in a single pass, with a LRUStackSimulator, instead of
+    one LRUCache for each size. The results of every size are written by the usual analyzers and the miss ratio curve
+    of the LRU caches is written at the end (MRC_LRU).
 
-    while search_results is not None:
+    :param index_name: name of the ES index used for running the search
+    :param host: IP address of ES instance
+    :param port: port of ES instance
+    :param default_maxage: default maxage value if not indicated in HTTP cache header
+    :param pagination_technique: pagination technique used for paginating the results: 'Scroll', 'Search_after' or 'Sliced_scroll' (slices fetched concurrently)
+    :param stop_after: -1 means that we iterate over the whole index, other values stop the program after the number indicated (for example 100 to run the program only on the 100 first values from the index)
+    :param batches_in_flight: maximum number of batches fetched in advance (in shared memory)
+    :param trace: directory of a trace exported on the disk (see es_export_trace) replayed instead of querying Elasticsearch, None to query Elasticsearch
+    :return: the simulator
+    """
+    simulator = load.LRU_stack_simulator()
 
-        # Run all the cache simulations in parallel (Pool multiprocessing)
-        with Pool() as pool:
-            status_caches = pool.starmap(cache_simulation, zip(repeat(search_results), repeat(default_maxage), caches))
-        
-        # Send results to the analyzers (one individual analyzer for each simulation)
-        for index, status in enumerate(status_caches):
-            analyzer_queues[index].put([float(search_results[-1]["fields"]["@timestamp"][0]), status[0], status[1], status[2]]) # last timestamp and list of status (status[0]: status of the simulation, status[1]: group ids, status[2]: sizes of the objects] are sent to the analyzer at the end of the request
+    search_size=100000 # number of documents returned by each individual search
+
+    # create the pipe and process in charge of fetching the data (the batches are exchanged in shared memory, at most batches_in_flight at the same time)
+    resource_tracker.ensure_running() # the shared memory blocks are created and destroyed by different processes: they must share the same tracker
+    slots = mp.Semaphore(batches_in_flight)
+    parent_query, child_query = mp.Pipe()
+    p_query = fetching_process(child_query, index_name, host, port, search_size, stop_after, slots, pagination_technique, trace)
+    if p_query is None: return
+
+    analyzer_pool = load.analyzers("LRU")
+    assert len(simulator.maxsizes) == len(analyzer_pool), f"The number of cache sizes should be equal to the number of analyzers!"
+
+    # start the processes
+    p_query.start()
+    analyzer_pool.start()
+
+    for batch in receive_batches(parent_query, slots):
+        timestamps, group_ids, sizes = analyzer_message(batch) # the batch is released before the analyzer queue sends the data
+        analyzer_pool.put(timestamps, group_ids, sizes, dict(zip(analyzer_pool.names, stack_simulation(batch, default_maxage, simulator))))
+
+    analyzer_pool.close() # notify to the analyzers the end of the incoming data
+    simulator.write_miss_ratio_curve("MRC_LRU")
+    return simulator
+
+
+def processes_coordination_sampled(index_name, host, port, default_maxage=0, pagination_technique="Scroll", stop_after=-1, batches_in_flight=4, trace=None, caches=None, rate=0.01, max_objects=None):
+    """
+    Estimate the cache hit ratio of many caches on a spatial sample of the requests (see SpatialSampler), for example to
+    explore the cache sizes quickly on a huge index. The estimates are written at the end (CHR_sampled).
+
+    :param index_name: name of the ES index used for running the search
+    :param host: IP address of ES instance
+    :param port: port of ES instance
+    :param default_maxage: default maxage value if not indicated in HTTP cache header
+    :param pagination_technique: pagination technique used for paginating the results: 'Scroll', 'Search_after' or 'Sliced_scroll' (slices fetched concurrently)
+    :param stop_after: -1 means that we iterate over the whole index, other values stop the program after the number indicated (for example 100 to run the program only on the 100 first values from the index)
+    :param batches_in_flight: maximum number of batches fetched in advance (in shared memory)
+    :param trace: directory of a trace exported on the disk (see es_export_trace) replayed instead of querying Elasticsearch, None to query Elasticsearch
+    :param caches: caches simulated (sizes of the whole trace), None for every policy of every size (see load.all_normal_caches)
+    :param rate: initial sampling rate
+    :param max_objects: maximum number of objects sampled (the sampling rate is lowered to stay below), None for a fixed rate
+    :return: the sampler
+    """
+    sampler = SpatialSampler(load.all_normal_caches() if caches is None else caches, rate, max_objects)
+
+    search_size=100000 # number of documents returned by each individual search
+
+    # create the pipe and process in charge of fetching the data (the batches are exchanged in shared memory, at most batches_in_flight at the same time)
+    resource_tracker.ensure_running() # the shared memory blocks are created and destroyed by different processes: they must share the same tracker
+    slots = mp.Semaphore(batches_in_flight)
+    parent_query, child_query = mp.Pipe()
+    p_query = fetching_process(child_query, index_name, host, port, search_size, stop_after, slots, pagination_technique, trace)
+    if p_query is None: return
+    p_query.start()
 
-        search_results = parent_query.recv() # data are received from the process fetching es data
+    for batch in receive_batches(parent_query, slots):
+        sampler.simulate(batch, default_maxage, ReplayObj)
 
-    for queue in analyzer_queues:
-        queue.put(None) # notify to the analyzer the end of the incoming data
+    sampler.write_estimates("CHR_sampled")
+    return sampler
 
 
 
@@ -171,6 +378,8 @@ if __name__ == '__main__':
 
     # Check parameter doc from process_coordination function for more details
     processes_coordination_parallel(index_name="batch3-*", host="192.168.100.147", port=9200, default_maxage=300, pagination_technique="Scroll", stop_after=-1)
+    # es_export_trace(index_name="batch3-*", host="192.168.100.147", port=9200, directory="./traces/batch3") # export once, then replay offline with trace="./traces/batch3"
+    # processes_coordination_parallel(index_name="batch3-*", host="192.168.100.147", port=9200, default_maxage=300, trace="./traces/batch3", sweep_file="./sweeps/protected.json") # caches and analyzers described in a sweep file
     # processes_coordination_single_simulation(index_name="clairvoyant", host="192.168.100.147", port=9200, default_maxage=300, pagination_technique="Scroll", stop_after=-1, clairvoyant=True)
 
     end = time.time()